@@ -1,4 +1,14 @@
 -- Suppression des tables existantes (ordre inverse des dépendances)
+DROP TABLE IF EXISTS interventions_fts;
+DROP VIEW IF EXISTS interventions_historique;
+DROP TABLE IF EXISTS archives_interventions;
+DROP TABLE IF EXISTS agregats_archives;
+DROP TABLE IF EXISTS agregats_archives_equipement;
+DROP TABLE IF EXISTS journal_modifications;
+DROP TABLE IF EXISTS scores_fiabilite_etat;
+DROP TABLE IF EXISTS scores_fiabilite;
+DROP TABLE IF EXISTS regles_alerte;
+DROP TABLE IF EXISTS stats_equipement;
 DROP TABLE IF EXISTS interventions;
 DROP TABLE IF EXISTS equipements;
 DROP TABLE IF EXISTS techniciens;
@@ -37,6 +47,10 @@ CREATE TABLE interventions (
     duree_minutes INTEGER NOT NULL CHECK (duree_minutes > 0),
     cout REAL NOT NULL CHECK (cout >= 0),
     statut TEXT NOT NULL DEFAULT 'terminee' CHECK (statut IN ('planifiee', 'en_cours', 'terminee', 'annulee')),
+    -- Colonnes calculées (non stockées) pour les statistiques par période
+    annee INTEGER GENERATED ALWAYS AS (CAST(substr(date_intervention, 1, 4) AS INTEGER)) VIRTUAL,
+    mois TEXT GENERATED ALWAYS AS (substr(date_intervention, 6, 2)) VIRTUAL,
+    annee_mois TEXT GENERATED ALWAYS AS (substr(date_intervention, 1, 7)) VIRTUAL,
     FOREIGN KEY (equipement_id) REFERENCES equipements(id) ON DELETE RESTRICT,
     FOREIGN KEY (technicien_id) REFERENCES techniciens(id) ON DELETE RESTRICT
 );
@@ -120,3 +134,317 @@ INSERT INTO interventions (equipement_id, technicien_id, date_intervention, type
     -- Interventions sur Onduleur (équipement 10)
     (10, 5, '2024-04-05', 'preventive', 'Test batteries et autonomie', 60, 50.00, 'terminee'),
     (10, 5, '2024-10-20', 'corrective', 'Remplacement batterie défectueuse', 45, 280.00, 'terminee');
+
+
+-- ========== EVOLUTIONS ==========
+-- Objets ajoutés après la première version du schéma.
+-- Tout ce qui suit est idempotent: db_connection.mettre_a_jour_schema() le rejoue
+-- sur les bases existantes.
+
+-- Statistiques par période: les filtres portent sur des intervalles de dates [debut, fin[
+-- et les regroupements sur les colonnes calculées annee / annee_mois
+CREATE INDEX IF NOT EXISTS idx_interventions_statut_date ON interventions(statut, date_intervention);
+CREATE INDEX IF NOT EXISTS idx_interventions_statut_annee ON interventions(statut, annee);
+CREATE INDEX IF NOT EXISTS idx_interventions_statut_annee_mois ON interventions(statut, annee_mois);
+
+-- Pagination par clé (date_intervention, id): une page profonde coûte autant que la première
+-- (parcours de l'index à partir du curseur, sans OFFSET), avec ou sans filtre
+CREATE INDEX IF NOT EXISTS idx_interventions_equipement_date ON interventions(equipement_id, date_intervention, id);
+CREATE INDEX IF NOT EXISTS idx_interventions_technicien_date ON interventions(technicien_id, date_intervention, id);
+
+-- Recherche par préfixe des sélecteurs (LIKE 'texte%' insensible à la casse, comme ces index)
+CREATE INDEX IF NOT EXISTS idx_equipements_nom_nocase ON equipements(nom COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_equipements_numero_serie_nocase ON equipements(numero_serie COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_equipements_localisation_nocase ON equipements(localisation COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_techniciens_nom_nocase ON techniciens(nom COLLATE NOCASE, prenom COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_techniciens_prenom_nocase ON techniciens(prenom COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_techniciens_email_nocase ON techniciens(email COLLATE NOCASE);
+
+-- Statistiques par équipement et par statut d'intervention, tenues à jour par triggers
+-- (les tableaux de bord lisent une ligne par équipement au lieu de toutes les interventions)
+CREATE TABLE IF NOT EXISTS stats_equipement (
+    equipement_id INTEGER NOT NULL,
+    statut TEXT NOT NULL,
+    nb_interventions INTEGER NOT NULL DEFAULT 0,
+    nb_correctives INTEGER NOT NULL DEFAULT 0,
+    cout_total REAL NOT NULL DEFAULT 0,
+    duree_totale INTEGER NOT NULL DEFAULT 0,
+    derniere_intervention DATE,
+    PRIMARY KEY (equipement_id, statut)
+) WITHOUT ROWID;
+
+-- Remplissage initial (base existante ou nouvelle base avec données de test)
+INSERT INTO stats_equipement (equipement_id, statut, nb_interventions, nb_correctives,
+                              cout_total, duree_totale, derniere_intervention)
+SELECT equipement_id, statut, COUNT(*),
+       SUM(CASE WHEN type_intervention = 'corrective' THEN 1 ELSE 0 END),
+       SUM(cout), SUM(duree_minutes), MAX(date_intervention)
+FROM interventions
+WHERE NOT EXISTS (SELECT 1 FROM stats_equipement)
+GROUP BY equipement_id, statut;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_equipement_insert
+AFTER INSERT ON interventions
+BEGIN
+    INSERT INTO stats_equipement (equipement_id, statut, nb_interventions, nb_correctives,
+                                  cout_total, duree_totale, derniere_intervention)
+    VALUES (NEW.equipement_id, NEW.statut, 1,
+            CASE WHEN NEW.type_intervention = 'corrective' THEN 1 ELSE 0 END,
+            NEW.cout, NEW.duree_minutes, NEW.date_intervention)
+    ON CONFLICT (equipement_id, statut) DO UPDATE SET
+        nb_interventions = nb_interventions + 1,
+        nb_correctives = nb_correctives + excluded.nb_correctives,
+        cout_total = cout_total + excluded.cout_total,
+        duree_totale = duree_totale + excluded.duree_totale,
+        derniere_intervention = CASE
+            WHEN derniere_intervention IS NULL OR excluded.derniere_intervention > derniere_intervention
+            THEN excluded.derniere_intervention
+            ELSE derniere_intervention
+        END;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_equipement_delete
+AFTER DELETE ON interventions
+BEGIN
+    UPDATE stats_equipement SET
+        nb_interventions = nb_interventions - 1,
+        nb_correctives = nb_correctives - CASE WHEN OLD.type_intervention = 'corrective' THEN 1 ELSE 0 END,
+        cout_total = cout_total - OLD.cout,
+        duree_totale = duree_totale - OLD.duree_minutes,
+        derniere_intervention = CASE
+            WHEN OLD.date_intervention < derniere_intervention THEN derniere_intervention
+            ELSE (SELECT MAX(derniere) FROM (
+                      SELECT MAX(date_intervention) AS derniere FROM interventions
+                      WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut
+                      UNION ALL
+                      -- Interventions archivées (archivage.py)
+                      SELECT MAX(derniere_intervention) FROM agregats_archives_equipement
+                      WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut))
+        END
+    WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut;
+
+    DELETE FROM stats_equipement
+    WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut AND nb_interventions <= 0;
+END;
+
+-- Modification = retrait de l'ancienne ligne puis ajout de la nouvelle
+CREATE TRIGGER IF NOT EXISTS trg_stats_equipement_update
+AFTER UPDATE OF equipement_id, statut, type_intervention, cout, duree_minutes, date_intervention ON interventions
+BEGIN
+    UPDATE stats_equipement SET
+        nb_interventions = nb_interventions - 1,
+        nb_correctives = nb_correctives - CASE WHEN OLD.type_intervention = 'corrective' THEN 1 ELSE 0 END,
+        cout_total = cout_total - OLD.cout,
+        duree_totale = duree_totale - OLD.duree_minutes,
+        derniere_intervention = CASE
+            WHEN OLD.date_intervention < derniere_intervention THEN derniere_intervention
+            ELSE (SELECT MAX(derniere) FROM (
+                      SELECT MAX(date_intervention) AS derniere FROM interventions
+                      WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut
+                        AND id <> OLD.id
+                      UNION ALL
+                      -- Interventions archivées (archivage.py)
+                      SELECT MAX(derniere_intervention) FROM agregats_archives_equipement
+                      WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut))
+        END
+    WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut;
+
+    DELETE FROM stats_equipement
+    WHERE equipement_id = OLD.equipement_id AND statut = OLD.statut AND nb_interventions <= 0;
+
+    INSERT INTO stats_equipement (equipement_id, statut, nb_interventions, nb_correctives,
+                                  cout_total, duree_totale, derniere_intervention)
+    VALUES (NEW.equipement_id, NEW.statut, 1,
+            CASE WHEN NEW.type_intervention = 'corrective' THEN 1 ELSE 0 END,
+            NEW.cout, NEW.duree_minutes, NEW.date_intervention)
+    ON CONFLICT (equipement_id, statut) DO UPDATE SET
+        nb_interventions = nb_interventions + 1,
+        nb_correctives = nb_correctives + excluded.nb_correctives,
+        cout_total = cout_total + excluded.cout_total,
+        duree_totale = duree_totale + excluded.duree_totale,
+        derniere_intervention = CASE
+            WHEN derniere_intervention IS NULL OR excluded.derniere_intervention > derniere_intervention
+            THEN excluded.derniere_intervention
+            ELSE derniere_intervention
+        END;
+END;
+
+-- Règles d'alerte de maintenance (seuils configurables)
+-- indicateur : mesure calculée par équipement sur les interventions terminées
+-- message    : modèle Python, {valeur} est remplacé par la mesure
+CREATE TABLE IF NOT EXISTS regles_alerte (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT UNIQUE NOT NULL,
+    indicateur TEXT NOT NULL CHECK (indicateur IN ('nb_interventions', 'nb_pannes', 'cout_total', 'jours_depuis_derniere')),
+    operateur TEXT NOT NULL CHECK (operateur IN ('<', '<=', '=', '>=', '>')),
+    seuil REAL NOT NULL,
+    niveau TEXT NOT NULL CHECK (niveau IN ('CRITIQUE', 'ATTENTION', 'INFO')),
+    message TEXT NOT NULL,
+    ordre INTEGER NOT NULL DEFAULT 0,
+    actif INTEGER NOT NULL DEFAULT 1 CHECK (actif IN (0, 1))
+);
+
+-- Règles par défaut (désactiver avec actif = 0 plutôt que supprimer)
+INSERT OR IGNORE INTO regles_alerte (code, indicateur, operateur, seuil, niveau, message, ordre) VALUES
+    ('aucune_intervention', 'nb_interventions', '=', 0, 'INFO', 'Aucune intervention enregistrée', 1),
+    ('pannes_repetees', 'nb_pannes', '>=', 2, 'CRITIQUE', '{valeur} pannes enregistrées - envisager remplacement', 2),
+    ('cout_eleve', 'cout_total', '>', 1000, 'ATTENTION', 'Coût élevé: {valeur:.0f}€', 3),
+    ('maintenance_ancienne', 'jours_depuis_derniere', '>', 180, 'ATTENTION', 'Pas de maintenance depuis {valeur} jours', 4);
+
+-- Indice de fiabilité persistant, recalculé seulement pour les équipements modifiés
+-- (business_logic.rafraichir_indice_fiabilite). date_acquisition sert au calcul de l'âge
+-- à la lecture; indice_fiabilite est celui de la date_reference de scores_fiabilite_etat.
+CREATE TABLE IF NOT EXISTS scores_fiabilite (
+    equipement_id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    type TEXT NOT NULL,
+    date_acquisition DATE NOT NULL,
+    nb_pannes INTEGER NOT NULL,
+    cout_total REAL NOT NULL,
+    indice_fiabilite INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scores_fiabilite_nom ON scores_fiabilite(nom, equipement_id);
+
+-- Une seule ligne: dernier id du journal pris en compte et date de référence des scores.
+-- Sans ligne, le prochain rafraîchissement recalcule tout.
+CREATE TABLE IF NOT EXISTS scores_fiabilite_etat (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    dernier_journal INTEGER NOT NULL,
+    date_reference DATE NOT NULL
+);
+
+-- Équipements dont l'indice est à recalculer (rempli par triggers, vidé au rafraîchissement).
+-- Rien n'est journalisé tant que les scores n'ont pas été calculés une première fois.
+CREATE TABLE IF NOT EXISTS journal_modifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    equipement_id INTEGER NOT NULL
+);
+
+-- Balayage des dates: équipements qui franchissent 2 ou 5 ans d'âge entre deux dates de référence
+CREATE INDEX IF NOT EXISTS idx_equipements_date_acquisition ON equipements(date_acquisition);
+
+CREATE TRIGGER IF NOT EXISTS trg_journal_intervention_insert
+AFTER INSERT ON interventions
+WHEN EXISTS (SELECT 1 FROM scores_fiabilite_etat)
+BEGIN
+    INSERT INTO journal_modifications (equipement_id) VALUES (NEW.equipement_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_journal_intervention_delete
+AFTER DELETE ON interventions
+WHEN EXISTS (SELECT 1 FROM scores_fiabilite_etat)
+BEGIN
+    INSERT INTO journal_modifications (equipement_id) VALUES (OLD.equipement_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_journal_intervention_update
+AFTER UPDATE OF equipement_id, statut, type_intervention, cout ON interventions
+WHEN EXISTS (SELECT 1 FROM scores_fiabilite_etat)
+BEGIN
+    INSERT INTO journal_modifications (equipement_id) VALUES (OLD.equipement_id);
+    INSERT INTO journal_modifications (equipement_id)
+    SELECT NEW.equipement_id WHERE NEW.equipement_id <> OLD.equipement_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_journal_equipement_insert
+AFTER INSERT ON equipements
+WHEN EXISTS (SELECT 1 FROM scores_fiabilite_etat)
+BEGIN
+    INSERT INTO journal_modifications (equipement_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_journal_equipement_delete
+AFTER DELETE ON equipements
+WHEN EXISTS (SELECT 1 FROM scores_fiabilite_etat)
+BEGIN
+    INSERT INTO journal_modifications (equipement_id) VALUES (OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_journal_equipement_update
+AFTER UPDATE OF id, nom, type, date_acquisition ON equipements
+WHEN EXISTS (SELECT 1 FROM scores_fiabilite_etat)
+BEGIN
+    INSERT INTO journal_modifications (equipement_id) VALUES (OLD.id);
+    INSERT INTO journal_modifications (equipement_id) SELECT NEW.id WHERE NEW.id <> OLD.id;
+END;
+
+-- Archivage par année (archivage.py): les interventions des années closes sont déplacées dans
+-- une table archive_interventions_AAAA de la même base (le déplacement est une seule transaction)
+CREATE TABLE IF NOT EXISTS archives_interventions (
+    annee INTEGER PRIMARY KEY,
+    nom_table TEXT NOT NULL,
+    nb_interventions INTEGER NOT NULL,
+    date_archivage TEXT NOT NULL
+);
+
+-- Agrégats figés des années archivées: les statistiques les lisent au lieu des archives
+CREATE TABLE IF NOT EXISTS agregats_archives (
+    annee INTEGER NOT NULL,
+    mois TEXT NOT NULL,
+    statut TEXT NOT NULL,
+    type_intervention TEXT NOT NULL,
+    technicien_id INTEGER NOT NULL,
+    nb_interventions INTEGER NOT NULL,
+    cout_total REAL NOT NULL,
+    duree_totale INTEGER NOT NULL,
+    PRIMARY KEY (annee, mois, statut, type_intervention, technicien_id)
+) WITHOUT ROWID;
+
+-- Par équipement et par statut (mêmes colonnes que stats_equipement): stats_equipement continue
+-- de compter les interventions archivées et peut être reconstruite
+CREATE TABLE IF NOT EXISTS agregats_archives_equipement (
+    annee INTEGER NOT NULL,
+    equipement_id INTEGER NOT NULL,
+    statut TEXT NOT NULL,
+    nb_interventions INTEGER NOT NULL,
+    nb_correctives INTEGER NOT NULL,
+    cout_total REAL NOT NULL,
+    duree_totale INTEGER NOT NULL,
+    derniere_intervention DATE,
+    PRIMARY KEY (annee, equipement_id, statut)
+) WITHOUT ROWID;
+
+-- Interventions courantes et archivées (historique des équipements). archivage.py la recrée
+-- avec un UNION ALL par table d'archive.
+CREATE VIEW IF NOT EXISTS interventions_historique AS
+SELECT id, equipement_id, technicien_id, date_intervention, type_intervention, description,
+       duree_minutes, cout, statut
+FROM interventions;
+
+-- Recherche plein texte dans les descriptions d'interventions (FTS5, contenu externe:
+-- le texte reste dans interventions et les archives, lu par la vue interventions_historique).
+-- Les triggers ci-dessous tiennent l'index à jour; archivage.py réindexe les interventions
+-- déplacées dans une archive (leur suppression de interventions les retire de l'index).
+-- remove_diacritics: "verin" trouve "vérin"
+CREATE VIRTUAL TABLE IF NOT EXISTS interventions_fts USING fts5(
+    description,
+    content='interventions_historique',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+-- Remplissage initial (index vide: nouvelle base ou base antérieure à la recherche)
+INSERT INTO interventions_fts(interventions_fts)
+SELECT 'rebuild'
+WHERE NOT EXISTS (SELECT 1 FROM interventions_fts_docsize);
+
+CREATE TRIGGER IF NOT EXISTS trg_interventions_fts_insert
+AFTER INSERT ON interventions
+BEGIN
+    INSERT INTO interventions_fts(rowid, description) VALUES (NEW.id, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_interventions_fts_delete
+AFTER DELETE ON interventions
+BEGIN
+    INSERT INTO interventions_fts(interventions_fts, rowid, description)
+    VALUES ('delete', OLD.id, OLD.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_interventions_fts_update
+AFTER UPDATE OF description ON interventions
+BEGIN
+    INSERT INTO interventions_fts(interventions_fts, rowid, description)
+    VALUES ('delete', OLD.id, OLD.description);
+    INSERT INTO interventions_fts(rowid, description) VALUES (NEW.id, NEW.description);
+END;
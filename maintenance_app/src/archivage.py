@@ -0,0 +1,200 @@
+from datetime import date, datetime
+
+from cache_resultats import invalide_cache
+from db_connection import PREFIXE_TABLES_ARCHIVE, connexion_ecriture, connexion_lecture
+
+
+# Années gardées dans la table interventions en plus de l'année en cours
+# (2: en 2026, les années 2023 et antérieures sont archivées)
+HORIZON_ANNEES_DEFAUT = 2
+
+# Colonnes copiées dans les tables d'archive (les colonnes calculées y sont recréées)
+COLONNES_ARCHIVE = ('id', 'equipement_id', 'technicien_id', 'date_intervention', 'type_intervention',
+                    'description', 'duree_minutes', 'cout', 'statut')
+
+
+def nom_table_archive(annee):
+    """Nom de la table d'archive d'une année."""
+    return f"{PREFIXE_TABLES_ARCHIVE}{int(annee):04d}"
+
+
+def _bornes_annee(annee):
+    return (f"{annee:04d}-01-01", f"{annee + 1:04d}-01-01")
+
+
+def _creer_table_archive(conn, annee):
+    # Même structure que interventions; index de la pagination par équipement et par technicien
+    table = nom_table_archive(annee)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY,
+            equipement_id INTEGER NOT NULL,
+            technicien_id INTEGER NOT NULL,
+            date_intervention DATE NOT NULL,
+            type_intervention TEXT NOT NULL,
+            description TEXT NOT NULL,
+            duree_minutes INTEGER NOT NULL,
+            cout REAL NOT NULL,
+            statut TEXT NOT NULL,
+            annee INTEGER GENERATED ALWAYS AS (CAST(substr(date_intervention, 1, 4) AS INTEGER)) VIRTUAL,
+            mois TEXT GENERATED ALWAYS AS (substr(date_intervention, 6, 2)) VIRTUAL,
+            annee_mois TEXT GENERATED ALWAYS AS (substr(date_intervention, 1, 7)) VIRTUAL
+        )
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{table}_equipement_date
+        ON {table}(equipement_id, date_intervention, id)
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{table}_technicien_date
+        ON {table}(technicien_id, date_intervention, id)
+    """)
+    return table
+
+
+def _recreer_vue_historique(conn):
+    # interventions_historique = interventions + une branche UNION ALL par table d'archive
+    colonnes = ", ".join(COLONNES_ARCHIVE)
+    tables = ["interventions"] + [row[0] for row in conn.execute(
+        "SELECT nom_table FROM archives_interventions ORDER BY annee DESC")]
+    conn.execute("DROP VIEW IF EXISTS interventions_historique")
+    conn.execute("CREATE VIEW interventions_historique AS\n" + "\nUNION ALL\n".join(
+        f"SELECT {colonnes} FROM {table}" for table in tables))
+
+
+def annees_a_archiver(horizon_annees=HORIZON_ANNEES_DEFAUT, date_reference=None):
+    """Années closes (plus anciennes que l'horizon) qui ont encore des interventions non archivées."""
+    if horizon_annees < 0:
+        raise ValueError("horizon_annees doit être >= 0")
+    annee_limite = (date_reference or date.today()).year - horizon_annees
+    with connexion_lecture() as conn:
+        premiere = conn.execute("SELECT MIN(date_intervention) FROM interventions").fetchone()[0]
+        if premiere is None:
+            return []
+        annees = []
+        for annee in range(int(premiere[:4]), annee_limite):
+            # Parcours de l'index sur date_intervention: une ligne suffit
+            if conn.execute("""
+                SELECT 1 FROM interventions
+                WHERE date_intervention >= ? AND date_intervention < ?
+                LIMIT 1
+            """, _bornes_annee(annee)).fetchone():
+                annees.append(annee)
+        return annees
+
+
+@invalide_cache
+def archiver_annee(annee):
+    """Déplace les interventions d'une année dans sa table d'archive, en une transaction.
+
+    Les agrégats de l'année (agregats_archives, agregats_archives_equipement) sont complétés;
+    stats_equipement garde les interventions archivées. Une année déjà archivée peut l'être
+    de nouveau (interventions saisies après coup). Retourne le nombre d'interventions déplacées.
+    """
+    annee = int(annee)
+    colonnes = ", ".join(COLONNES_ARCHIVE)
+    with connexion_ecriture() as conn:
+        conn.execute("DROP TABLE IF EXISTS temp.lot_archive")
+        conn.execute(f"""
+            CREATE TEMP TABLE lot_archive AS
+            SELECT {colonnes} FROM interventions
+            WHERE date_intervention >= ? AND date_intervention < ?
+        """, _bornes_annee(annee))
+        nombre = conn.execute("SELECT COUNT(*) FROM temp.lot_archive").fetchone()[0]
+        if not nombre:
+            conn.execute("DROP TABLE temp.lot_archive")
+            return 0
+
+        table = _creer_table_archive(conn, annee)
+        conn.execute(f"INSERT INTO {table} ({colonnes}) SELECT {colonnes} FROM temp.lot_archive")
+
+        conn.execute("""
+            INSERT INTO agregats_archives (annee, mois, statut, type_intervention, technicien_id,
+                                           nb_interventions, cout_total, duree_totale)
+            SELECT ?, substr(date_intervention, 6, 2), statut, type_intervention, technicien_id,
+                   COUNT(*), SUM(cout), SUM(duree_minutes)
+            FROM temp.lot_archive
+            GROUP BY 2, statut, type_intervention, technicien_id
+            ON CONFLICT (annee, mois, statut, type_intervention, technicien_id) DO UPDATE SET
+                nb_interventions = nb_interventions + excluded.nb_interventions,
+                cout_total = cout_total + excluded.cout_total,
+                duree_totale = duree_totale + excluded.duree_totale
+        """, (annee,))
+        conn.execute("""
+            INSERT INTO agregats_archives_equipement (annee, equipement_id, statut, nb_interventions,
+                                                      nb_correctives, cout_total, duree_totale,
+                                                      derniere_intervention)
+            SELECT ?, equipement_id, statut, COUNT(*),
+                   SUM(CASE WHEN type_intervention = 'corrective' THEN 1 ELSE 0 END),
+                   SUM(cout), SUM(duree_minutes), MAX(date_intervention)
+            FROM temp.lot_archive
+            GROUP BY equipement_id, statut
+            ON CONFLICT (annee, equipement_id, statut) DO UPDATE SET
+                nb_interventions = nb_interventions + excluded.nb_interventions,
+                nb_correctives = nb_correctives + excluded.nb_correctives,
+                cout_total = cout_total + excluded.cout_total,
+                duree_totale = duree_totale + excluded.duree_totale,
+                derniere_intervention = MAX(derniere_intervention, excluded.derniere_intervention)
+        """, (annee,))
+
+        # Les triggers de interventions retirent ces lignes de stats_equipement et de l'index
+        # plein texte: elles y sont remises ensuite (stats_equipement compte aussi les archives,
+        # la recherche porte sur interventions_historique)
+        conn.execute("""
+            DELETE FROM interventions
+            WHERE date_intervention >= ? AND date_intervention < ?
+        """, _bornes_annee(annee))
+        conn.execute("""
+            INSERT INTO stats_equipement (equipement_id, statut, nb_interventions, nb_correctives,
+                                          cout_total, duree_totale, derniere_intervention)
+            SELECT equipement_id, statut, COUNT(*),
+                   SUM(CASE WHEN type_intervention = 'corrective' THEN 1 ELSE 0 END),
+                   SUM(cout), SUM(duree_minutes), MAX(date_intervention)
+            FROM temp.lot_archive
+            GROUP BY equipement_id, statut
+            ON CONFLICT (equipement_id, statut) DO UPDATE SET
+                nb_interventions = nb_interventions + excluded.nb_interventions,
+                nb_correctives = nb_correctives + excluded.nb_correctives,
+                cout_total = cout_total + excluded.cout_total,
+                duree_totale = duree_totale + excluded.duree_totale,
+                derniere_intervention = CASE
+                    WHEN derniere_intervention IS NULL OR excluded.derniere_intervention > derniere_intervention
+                    THEN excluded.derniere_intervention
+                    ELSE derniere_intervention
+                END
+        """)
+        conn.execute("""
+            INSERT INTO interventions_fts(rowid, description)
+            SELECT id, description FROM temp.lot_archive
+        """)
+
+        conn.execute("""
+            INSERT INTO archives_interventions (annee, nom_table, nb_interventions, date_archivage)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (annee) DO UPDATE SET
+                nb_interventions = nb_interventions + excluded.nb_interventions,
+                date_archivage = excluded.date_archivage
+        """, (annee, table, nombre, datetime.now().isoformat(timespec='seconds')))
+        _recreer_vue_historique(conn)
+        conn.execute("DROP TABLE temp.lot_archive")
+        return nombre
+
+
+def archiver_interventions(horizon_annees=HORIZON_ANNEES_DEFAUT, date_reference=None):
+    """Archive chaque année plus ancienne que l'horizon (une transaction par année).
+
+    Retourne {année: nombre d'interventions déplacées}.
+    """
+    return {annee: archiver_annee(annee)
+            for annee in annees_a_archiver(horizon_annees, date_reference)}
+
+
+def lister_archives():
+    """Années archivées: table, nombre d'interventions et date du dernier archivage."""
+    with connexion_lecture() as conn:
+        cursor = conn.execute("""
+            SELECT annee, nom_table, nb_interventions, date_archivage
+            FROM archives_interventions
+            ORDER BY annee
+        """)
+        return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,293 @@
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter le répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import db_connection
+import data_access
+import business_logic
+import cache_resultats
+import calcul_parallele
+import generateur_donnees
+import multi_sites
+
+
+# Dossier des bases générées (réutilisées d'une exécution à l'autre)
+DOSSIER_BASES = Path(__file__).parent.parent / "database" / "benchmark"
+
+# Fonctions qui modifient la base: exclues des mesures
+PREFIXES_ECRITURE = ('ajouter_', 'modifier_', 'reconstruire_', 'preparer_', 'rafraichir_', 'reinitialiser_')
+
+# Arguments des fonctions qui en exigent (les autres sont appelées sans argument)
+ARGUMENTS = {
+    'obtenir_equipement_par_id': lambda annee: (1,),
+    'iterer_historique_equipement': lambda annee: (1,),
+    'obtenir_historique_equipement': lambda annee: (1,),
+    'compter_historique_equipement': lambda annee: (1,),
+    'obtenir_page_historique_equipement': lambda annee: (1,),
+    'paginer_historique_equipement': lambda annee: (1,),
+    'rechercher_equipements': lambda annee: ("ma",),
+    'rechercher_techniciens': lambda annee: ("ma",),
+    'rechercher_interventions': lambda annee: ("remplacement",),
+    'iterer_agregats_fiabilite_tranche': lambda annee: (1, 100),
+    'obtenir_tranches_equipements': lambda annee: (4,),
+    'obtenir_interventions_par_mois': lambda annee: (annee,),
+    'obtenir_interventions_par_periode': lambda annee: (f"{annee}-01", f"{annee}-12"),
+}
+
+
+def fonctions_mesurees(module):
+    """Liste les fonctions publiques de lecture d'un module, dans l'ordre du fichier."""
+    fonctions = []
+    for nom, fonction in inspect.getmembers(module, inspect.isfunction):
+        if nom.startswith('_') or nom.startswith(PREFIXES_ECRITURE):
+            continue
+        if fonction.__module__ != module.__name__:
+            continue  # Fonction importée d'un autre module
+        fonctions.append((inspect.getsourcelines(fonction)[1], nom, fonction))
+    return [(nom, fonction) for _, nom, fonction in sorted(fonctions)]
+
+
+def _compter_lignes(resultat):
+    """Nombre de lignes d'un résultat (une pour un scalaire ou un dict); les générateurs sont consommés."""
+    if resultat is None or isinstance(resultat, (int, float, str, dict)):
+        return 1
+    return sum(1 for _ in resultat)
+
+
+def mesurer(fonction, *args, repetitions=1):
+    """Exécute une fonction et retourne durée, nombre de lignes et pic mémoire.
+
+    La durée (meilleure des répétitions) est prise sans tracemalloc, qui ralentit
+    fortement Python; le pic mémoire vient d'une exécution supplémentaire.
+    """
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        lignes = _compter_lignes(fonction(*args))
+        durees.append(time.perf_counter() - debut)
+    duree = min(durees)
+
+    tracemalloc.start()
+    try:
+        _compter_lignes(fonction(*args))
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'secondes': round(duree, 6),
+        'lignes': lignes,
+        'lignes_par_seconde': round(lignes / duree, 1) if duree > 0 else None,
+        'memoire_pic_kio': round(pic / 1024, 1),
+    }
+
+
+def mesurer_echelle(chemin, annee=2024, repetitions=1):
+    """Mesure toutes les fonctions de lecture sur une base; garde la meilleure durée."""
+    db_connection.definir_chemin_base(chemin)
+    mesures = []
+    for module in (data_access, business_logic):
+        for nom, fonction in fonctions_mesurees(module):
+            parametres = inspect.signature(fonction).parameters.values()
+            obligatoires = [p for p in parametres
+                            if p.default is inspect.Parameter.empty
+                            and p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+            if nom in ARGUMENTS:
+                args = ARGUMENTS[nom](annee)
+            elif obligatoires:
+                continue  # Pas d'argument connu pour cette fonction
+            else:
+                args = ()
+
+            mesure = mesurer(fonction, *args, repetitions=repetitions)
+            mesure['fonction'] = f"{module.__name__}.{nom}"
+            mesures.append(mesure)
+    db_connection.fermer_connexion()
+    return mesures
+
+
+def mesurer_parallelisme(chemin, nb_processus=(1, 2, 4, 8), repetitions=1):
+    """Compare l'indice de fiabilité séquentiel (mode 'sql') au mode 'parallele'.
+
+    Pour chaque nombre de processus: durée du premier appel (démarrage du pool compris),
+    meilleure durée des appels suivants, accélération et identité du résultat.
+    """
+    db_connection.definir_chemin_base(chemin)
+    date_reference = datetime.now()
+
+    def chronometrer(**options):
+        debut = time.perf_counter()
+        resultat = business_logic.calculer_indice_fiabilite(date_reference=date_reference, **options)
+        return time.perf_counter() - debut, resultat
+
+    sequentiel, reference = min((chronometrer() for _ in range(repetitions)), key=lambda m: m[0])
+    mesures = []
+    for nombre in nb_processus:
+        calcul_parallele.arreter_executeur()
+        demarrage, resultat = chronometrer(mode='parallele', nb_processus=nombre)
+        identique = resultat == reference
+        duree = demarrage
+        for _ in range(repetitions):
+            seconde, resultat = chronometrer(mode='parallele', nb_processus=nombre)
+            duree = min(duree, seconde)
+            identique = identique and resultat == reference
+        mesures.append({
+            'nb_processus': nombre,
+            'premier_appel_secondes': round(demarrage, 6),
+            'secondes': round(duree, 6),
+            'acceleration': round(sequentiel / duree, 2) if duree > 0 else None,
+            'identique': identique,
+        })
+    calcul_parallele.arreter_executeur()
+    db_connection.fermer_connexion()
+    return {'sequentiel_secondes': round(sequentiel, 6), 'coeurs': os.cpu_count(), 'mesures': mesures}
+
+
+def mesurer_sites(dossier, echelle, graine=generateur_donnees.GRAINE_DEFAUT, nb_sites=(1, 2, 4, 8),
+                  repetitions=1):
+    """Durée de multi_sites.statistiques_sites selon le nombre de sites, pour chaque mode.
+
+    Les sites sont des bases de l'échelle générées avec les graines graine, graine + 1, ...
+    Chaque mode est exécuté une fois avant la mesure (démarrage des processus, cache disque).
+    """
+    nb_equipements, nb_interventions = generateur_donnees.ECHELLES[echelle]
+    chemins = []
+    for numero in range(max(nb_sites)):
+        chemin = generateur_donnees.chemin_echelle(dossier, echelle, graine + numero)
+        if not chemin.exists():
+            generateur_donnees.generer_base(chemin, nb_equipements, nb_interventions, graine=graine + numero)
+        chemins.append(chemin)
+    db_connection.fermer_connexion()
+
+    mesures = []
+    for nombre in nb_sites:
+        sites = {f"site_{numero + 1}": chemin for numero, chemin in enumerate(chemins[:nombre])}
+        mesure = {'nb_sites': nombre}
+        for mode in multi_sites.MODES_SITES:
+            multi_sites.statistiques_sites(sites, mode=mode)
+            durees = []
+            for _ in range(repetitions):
+                debut = time.perf_counter()
+                multi_sites.statistiques_sites(sites, mode=mode)
+                durees.append(time.perf_counter() - debut)
+            mesure[mode] = round(min(durees), 6)
+        mesures.append(mesure)
+    calcul_parallele.arreter_executeur()
+    return mesures
+
+
+def executer(echelles, graine=generateur_donnees.GRAINE_DEFAUT, repetitions=1,
+             dossier=DOSSIER_BASES, regenerer=False, nb_processus=None, nb_sites=None):
+    """Génère (si besoin) la base de chaque échelle puis mesure toutes les fonctions."""
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    # Le cache fausserait les mesures répétées
+    cache_resultats.cache.actif = False
+    chemin_initial = db_connection.DATABASE_PATH
+
+    resultats = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'graine': graine,
+        'python': sys.version.split()[0],
+        'sqlite': db_connection.sqlite3.sqlite_version,
+        'echelles': [],
+    }
+    try:
+        for echelle in echelles:
+            nb_equipements, nb_interventions = generateur_donnees.ECHELLES[echelle]
+            chemin = generateur_donnees.chemin_echelle(dossier, echelle, graine)
+            generation = None
+            if regenerer or not chemin.exists():
+                generation = generateur_donnees.generer_base(chemin, nb_equipements,
+                                                             nb_interventions, graine=graine)
+            resultats['echelles'].append({
+                'echelle': echelle,
+                'nb_equipements': nb_equipements,
+                'nb_interventions': nb_interventions,
+                'generation': generation,
+                'mesures': mesurer_echelle(chemin, repetitions=repetitions),
+                'parallelisme': (mesurer_parallelisme(chemin, nb_processus, repetitions)
+                                 if nb_processus else None),
+                'multi_sites': (mesurer_sites(dossier, echelle, graine, nb_sites, repetitions)
+                                if nb_sites else None),
+            })
+    finally:
+        cache_resultats.cache.actif = True
+        db_connection.definir_chemin_base(chemin_initial)
+    return resultats
+
+
+def afficher_resultats(resultats):
+    """Affiche un tableau par échelle."""
+    for echelle in resultats['echelles']:
+        print(f"\n  Échelle {echelle['echelle']}: {echelle['nb_equipements']} équipements, "
+              f"{echelle['nb_interventions']} interventions")
+        if echelle['generation']:
+            print(f"  Génération: {echelle['generation']['secondes']} s")
+        print(f"  {'Fonction':58} | {'Durée (s)':>10} | {'Lignes':>9} | {'Lignes/s':>12} | {'Pic (Kio)':>10}")
+        print(f"  {'-' * 112}")
+        for m in echelle['mesures']:
+            debit = m['lignes_par_seconde'] if m['lignes_par_seconde'] is not None else '-'
+            print(f"  {m['fonction']:58} | {m['secondes']:>10.4f} | {m['lignes']:>9} | "
+                  f"{debit:>12} | {m['memoire_pic_kio']:>10}")
+
+        parallelisme = echelle.get('parallelisme')
+        if parallelisme:
+            print(f"\n  Indice de fiabilité en parallèle ({parallelisme['coeurs']} cœur(s)), "
+                  f"séquentiel: {parallelisme['sequentiel_secondes']:.4f} s")
+            print(f"  {'Processus':>9} | {'1er appel (s)':>13} | {'Durée (s)':>10} | {'Accélération':>12} | Identique")
+            print(f"  {'-' * 66}")
+            for m in parallelisme['mesures']:
+                print(f"  {m['nb_processus']:>9} | {m['premier_appel_secondes']:>13.4f} | {m['secondes']:>10.4f} | "
+                      f"{m['acceleration']:>12} | {'oui' if m['identique'] else 'NON'}")
+
+        if echelle.get('multi_sites'):
+            print("\n  Statistiques multi-sites (durée en s, ms par site entre parenthèses)")
+            print(f"  {'Sites':>5} | " + " | ".join(f"{mode:>20}" for mode in multi_sites.MODES_SITES))
+            print(f"  {'-' * (8 + 23 * len(multi_sites.MODES_SITES))}")
+            for m in echelle['multi_sites']:
+                colonnes = [f"{m[mode]:.4f} ({m[mode] * 1000 / m['nb_sites']:.1f})"
+                            for mode in multi_sites.MODES_SITES]
+                print(f"  {m['nb_sites']:>5} | " + " | ".join(f"{colonne:>20}" for colonne in colonnes))
+
+
+def lire_arguments(argv=None):
+    """Analyse les options de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Mesure les fonctions de data_access et business_logic")
+    parser.add_argument("--echelles", nargs="+", choices=generateur_donnees.ECHELLES, default=['mini'],
+                        help="échelles à mesurer (défaut: mini)")
+    parser.add_argument("--graine", type=int, default=generateur_donnees.GRAINE_DEFAUT)
+    parser.add_argument("--repetitions", type=int, default=1, help="exécutions par fonction (meilleure gardée)")
+    parser.add_argument("--dossier", default=DOSSIER_BASES, help="dossier des bases générées")
+    parser.add_argument("--regenerer", action="store_true", help="régénère les bases même si elles existent")
+    parser.add_argument("--processus", nargs="+", type=int,
+                        help="mesure aussi l'indice de fiabilité en parallèle avec ces nombres de processus (ex: 1 2 4 8)")
+    parser.add_argument("--sites", nargs="+", type=int,
+                        help="mesure aussi les statistiques multi-sites pour ces nombres de sites (ex: 1 2 4 8 16)")
+    parser.add_argument("--json", help="fichier JSON où écrire les résultats")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande."""
+    arguments = lire_arguments(argv)
+    resultats = executer(arguments.echelles, arguments.graine, arguments.repetitions,
+                         arguments.dossier, arguments.regenerer, arguments.processus, arguments.sites)
+    afficher_resultats(resultats)
+    if arguments.json:
+        with open(arguments.json, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, ensure_ascii=False, indent=2)
+        print(f"\n  Résultats écrits dans {arguments.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,145 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import calcul_parallele
 import data_access
+import db_connection
+import stockage_colonnes
+from db_connection import connexion_lecture
+
+
+# ========== INSTANTANÉ DE RAPPORT ==========
+class InstantaneRapport:
+    """Données partagées par les sections d'un rapport, chargées au plus une fois.
+
+    Utilisé dans un bloc "with", toutes les lectures se font dans une même transaction
+    de lecture: le rapport est cohérent même si la base change pendant son calcul.
+    Les données sont chargées à la demande, dans le thread qui a ouvert le bloc.
+    """
+
+    def __init__(self):
+        self._donnees = {}
+        self._contexte = None
+        self._conn = None
+
+    def __enter__(self):
+        self._contexte = connexion_lecture()
+        self._conn = self._contexte.__enter__()
+        self._conn.execute("BEGIN")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._conn.commit()
+        finally:
+            self._contexte.__exit__(exc_type, exc, tb)
+            self._contexte = None
+            self._conn = None
+        return False
+
+    def _charger(self, cle, fonction, *args):
+        if cle not in self._donnees:
+            self._donnees[cle] = fonction(*args)
+        return self._donnees[cle]
+
+    @property
+    def equipements(self):
+        return self._charger('equipements', data_access.obtenir_tous_equipements)
+
+    @property
+    def agregats_interventions(self):
+        # Totaux par équipement calculés en Python (mode 'python' de l'indice de fiabilité)
+        return self._charger('agregats_interventions', _agreger_interventions,
+                             data_access.iterer_interventions_completes())
+
+    @property
+    def indicateurs_globaux(self):
+        return self._charger('indicateurs_globaux', lambda: {
+            'cout_total': data_access.obtenir_cout_total(),
+            'nombre_interventions': data_access.obtenir_nombre_interventions(),
+            'duree_moyenne_minutes': data_access.obtenir_duree_moyenne(),
+        })
 
+    def equipements_sollicites(self, limit=5):
+        return self._charger(('equipements_sollicites', limit),
+                             data_access.obtenir_equipements_sollicites, limit)
 
-# ========== CALCULS SIMPLES ==========
-def calculer_taux_disponibilite():
-    equipements = data_access.obtenir_tous_equipements()
+    @property
+    def agregats_fiabilite(self):
+        return self._charger('agregats_fiabilite', data_access.obtenir_agregats_fiabilite)
+
+    def alertes(self, date_reference=None):
+        return self._charger(('alertes', date_reference), data_access.obtenir_alertes, date_reference)
+
+    def interventions_par_mois(self, annee):
+        return self._charger(('interventions_par_mois', annee), data_access.obtenir_interventions_par_mois, annee)
+
+    @property
+    def frequence_par_type(self):
+        return self._charger('frequence_par_type', data_access.obtenir_frequence_par_type)
+
+    @property
+    def colonnes(self):
+        # Interventions et équipements en colonnes typées (modes 'colonnes')
+        return self._charger('colonnes', stockage_colonnes.charger_colonnes)
+
+    @property
+    def regles_alerte(self):
+        return self._charger('regles_alerte', data_access.obtenir_regles_alerte)
+
+
+def _equipements(instantane):
+    # Équipements de l'instantané, sinon lecture en flux
+    if instantane is not None:
+        return instantane.equipements
+    return data_access.iterer_tous_equipements()
+
+
+def _agregats_interventions(instantane):
+    if instantane is not None:
+        return instantane.agregats_interventions
+    return _agreger_interventions(data_access.iterer_interventions_completes())
+
+
+def _colonnes(instantane):
+    # Colonnes de l'instantané, sinon celles des données courantes (gardées tant qu'elles n'ont pas changé)
+    if instantane is not None:
+        return instantane.colonnes
+    return stockage_colonnes.obtenir_colonnes()
+
+
+def _verifier_mode(mode, modes):
+    if mode not in modes:
+        raise ValueError(f"Mode inconnu: {mode} (modes: {', '.join(modes)})")
 
-    # Compter par type
+
+# Modes de calcul: 'colonnes' regroupe en mémoire un instantané en colonnes typées
+# (stockage_colonnes, NumPy si disponible); les autres modes lisent la base à chaque appel
+MODES_DISPONIBILITE = ('python', 'colonnes')
+MODES_CALCUL = ('sql', 'colonnes')
+
+
+# ========== CALCULS SIMPLES ==========
+def calculer_taux_disponibilite(instantane=None, mode='python'):
+    # mode 'python'   : comptage en une passe sur les équipements lus en flux
+    # mode 'colonnes' : comptage par type sur les colonnes d'équipements
+    _verifier_mode(mode, MODES_DISPONIBILITE)
     stats_types = {}  # {type: {'total': 0, 'actifs': 0}}
 
-    for eq in equipements:
-        type_eq = eq['type']
+    if mode == 'colonnes':
+        for type_eq, total, actifs in _colonnes(instantane).disponibilite_par_type():
+            stats_types[type_eq] = {'total': total, 'actifs': actifs}
+    else:
+        for eq in _equipements(instantane):
+            type_eq = eq['type']
 
-        # Initialiser si pas encore vu
-        if type_eq not in stats_types:
-            stats_types[type_eq] = {'total': 0, 'actifs': 0}
+            # Initialiser si pas encore vu
+            if type_eq not in stats_types:
+                stats_types[type_eq] = {'total': 0, 'actifs': 0}
 
-        # Compter
-        stats_types[type_eq]['total'] += 1
-        if eq['statut'] == 'actif':
-            stats_types[type_eq]['actifs'] += 1
+            # Compter
+            stats_types[type_eq]['total'] += 1
+            if eq['statut'] == 'actif':
+                stats_types[type_eq]['actifs'] += 1
 
     # Calculer le pourcentage
     resultats = {}
@@ -31,71 +151,236 @@ def calculer_taux_disponibilite():
     return resultats
 
 
-def calculer_indice_fiabilite():
-    equipements = data_access.obtenir_tous_equipements()
-    interventions = data_access.obtenir_interventions_completes()
+def _agreger_interventions(interventions):
+    # Une seule passe sur les interventions: seuls les totaux par équipement restent en mémoire
+    par_equipement = {}  # {eq_id: {'nb_interventions', 'nb_pannes', 'cout_total', 'derniere_date'}}
 
-    # Regrouper les interventions par équipement
-    interventions_par_equipement = {}
     for inter in interventions:
         eq_id = inter['equipement_id']
-        if eq_id not in interventions_par_equipement:
-            interventions_par_equipement[eq_id] = []
-        interventions_par_equipement[eq_id].append(inter)
+        if eq_id not in par_equipement:
+            par_equipement[eq_id] = {'nb_interventions': 0, 'nb_pannes': 0,
+                                     'cout_total': 0, 'derniere_date': None}
+        agg = par_equipement[eq_id]
+
+        agg['nb_interventions'] += 1
+        if inter['type_intervention'] == 'corrective':
+            agg['nb_pannes'] += 1
+        agg['cout_total'] += inter['cout']
+
+        # Les dates sont au format YYYY-MM-DD: l'ordre des chaînes est celui des dates
+        date_inter = inter['date_intervention']
+        if agg['derniere_date'] is None or date_inter > agg['derniere_date']:
+            agg['derniere_date'] = date_inter
+
+    return par_equipement
+
+
+def _score_fiabilite(nb_pannes, cout_total, age_annees):
+    # Calculer l'indice (score sur 100)
+    score = 100
+
+    # Enlever des points pour chaque panne
+    score -= nb_pannes * 15
+
+    # Enlever des points si coût élevé
+    if cout_total > 500:
+        score -= 10
+    if cout_total > 1000:
+        score -= 10
+
+    # Bonus si équipement récent
+    if age_annees < 2:
+        score += 10
+    # Malus si équipement ancien
+    elif age_annees > 5:
+        score -= 10
+
+    # Garder entre 0 et 100
+    if score < 0:
+        score = 0
+    if score > 100:
+        score = 100
 
-    resultats = []
-    date_maintenant = datetime.now()
-
-    for eq in equipements:
-        eq_id = eq['id']
-        inters = interventions_par_equipement.get(eq_id, [])
-
-        # Compter les pannes (interventions correctives)
-        nb_pannes = 0
-        cout_total = 0
-        for inter in inters:
-            if inter['type_intervention'] == 'corrective':
-                nb_pannes += 1
-            cout_total += inter['cout']
-
-        # Calculer l'âge en années
-        date_acq = datetime.strptime(eq['date_acquisition'], '%Y-%m-%d')
-        age_jours = (date_maintenant - date_acq).days
-        age_annees = age_jours / 365
+    return score
+
+
+def _scores_fiabilite_vectorises(nb_pannes, cout_total, age_annees):
+    # Même barème que _score_fiabilite, sur des tableaux NumPy (une opération par règle)
+    np = stockage_colonnes.np
+    score = 100 - nb_pannes * 15
+    score = score - 10 * (cout_total > 500) - 10 * (cout_total > 1000)
+    score = score + 10 * (age_annees < 2) - 10 * (age_annees > 5)
+    return np.clip(score, 0, 100)
+
+
+def _date_calcul(date_reference):
+    # datetime du calcul des âges: maintenant par défaut, minuit pour une date sans heure
+    if date_reference is None:
+        return datetime.now()
+    if not isinstance(date_reference, datetime):
+        return datetime.combine(date_reference, datetime.min.time())
+    return date_reference
+
+
+def _age_annees(date_acquisition, date_maintenant):
+    # Calculer l'âge en années
+    date_acq = datetime.strptime(date_acquisition, '%Y-%m-%d')
+    age_jours = (date_maintenant - date_acq).days
+    return age_jours / 365
+
+
+def _ligne_fiabilite(eq, nb_pannes, cout_total, date_maintenant):
+    age_annees = _age_annees(eq['date_acquisition'], date_maintenant)
+
+    return {
+        'nom': eq['nom'],
+        'type': eq['type'],
+        'age_annees': round(age_annees, 1),
+        'nb_pannes': nb_pannes,
+        'cout_total': round(cout_total, 2),
+        'indice_fiabilite': int(_score_fiabilite(nb_pannes, cout_total, age_annees))
+    }
 
-        # Calculer l'indice (score sur 100)
-        score = 100
 
-        # Enlever des points pour chaque panne
-        score -= nb_pannes * 15
-
-        # Enlever des points si coût élevé
-        if cout_total > 500:
-            score -= 10
-        if cout_total > 1000:
-            score -= 10
-
-        # Bonus si équipement récent
-        if age_annees < 2:
-            score += 10
-        # Malus si équipement ancien
-        elif age_annees > 5:
-            score -= 10
-
-        # Garder entre 0 et 100
-        if score < 0:
-            score = 0
-        if score > 100:
-            score = 100
-
-        resultats.append({
-            'nom': eq['nom'],
-            'type': eq['type'],
-            'age_annees': round(age_annees, 1),
-            'nb_pannes': nb_pannes,
-            'cout_total': round(cout_total, 2),
+def _fiabilite_colonnes(colonnes, date_maintenant):
+    # Indice de tous les équipements calculé sur les colonnes (ordre nom, id comme en SQL)
+    agregats = colonnes.agregats_equipements()
+    age_jours = colonnes.ages_equipements(date_maintenant.date())
+    nb_pannes, cout_total = agregats['nb_pannes'], agregats['cout_total']
+
+    if stockage_colonnes.np is not None:
+        age_annees = age_jours / 365
+        scores = _scores_fiabilite_vectorises(nb_pannes, cout_total, age_annees).tolist()
+        age_annees, nb_pannes, cout_total = age_annees.tolist(), nb_pannes.tolist(), cout_total.tolist()
+    else:
+        age_annees = [age / 365 for age in age_jours]
+        scores = [_score_fiabilite(*valeurs) for valeurs in zip(nb_pannes, cout_total, age_annees)]
+
+    equipements = colonnes.equipements
+    return [
+        {
+            'nom': nom,
+            'type': data_access.TYPES_EQUIPEMENT[type_code],
+            'age_annees': round(age, 1),
+            'nb_pannes': pannes,
+            'cout_total': round(cout, 2),
             'indice_fiabilite': int(score)
-        })
+        }
+        for nom, type_code, age, pannes, cout, score
+        in zip(equipements['nom'], equipements['type'], age_annees, nb_pannes, cout_total, scores)
+    ]
+
+
+def _fiabilite_tranche(chemin_base, id_debut, id_fin, date_maintenant):
+    # Exécuté dans un processus de calcul_parallele, avec ses propres connexions en lecture
+    if db_connection.DATABASE_PATH != Path(chemin_base):
+        db_connection.definir_chemin_base(chemin_base)
+    return [
+        (ligne['nom'], ligne['id'], _ligne_fiabilite(ligne, ligne['nb_pannes'], ligne['cout_total'], date_maintenant))
+        for ligne in data_access.iterer_agregats_fiabilite_tranche(id_debut, id_fin)
+    ]
+
+
+def _fiabilite_parallele(date_maintenant, nb_processus):
+    # Tranches d'ids calculées en parallèle, puis remises dans l'ordre du mode 'sql' (nom, id)
+    nb_processus = nb_processus or calcul_parallele.NB_PROCESSUS_DEFAUT
+    tranches = data_access.obtenir_tranches_equipements(nb_processus * calcul_parallele.TRANCHES_PAR_PROCESSUS)
+    taches = [(str(db_connection.DATABASE_PATH), id_debut, id_fin, date_maintenant)
+              for id_debut, id_fin in tranches]
+
+    lignes = []
+    for resultat_tranche in calcul_parallele.executer_en_parallele(_fiabilite_tranche, taches, nb_processus):
+        lignes.extend(resultat_tranche)
+    lignes.sort(key=lambda ligne: (ligne[0], ligne[1]))
+    return [ligne for _, _, ligne in lignes]
+
+
+# Âges (en jours) où le bonus / malus d'âge de _score_fiabilite change:
+# bonus sous 2 ans (age_jours < 730), malus au-delà de 5 ans (age_jours > 1825)
+SEUIL_BONUS_AGE_JOURS = 2 * 365
+SEUIL_MALUS_AGE_JOURS = 5 * 365
+
+
+def _plages_changement_age(date_precedente, date_reference):
+    # Dates d'acquisition (plages incluses) dont le bonus / malus d'âge diffère entre les deux dates
+    debut, fin = sorted(date.fromisoformat(jour) for jour in (date_precedente, date_reference))
+    plages = [
+        # age_jours < 730 à une date, >= 730 à l'autre
+        (debut - timedelta(days=SEUIL_BONUS_AGE_JOURS - 1), fin - timedelta(days=SEUIL_BONUS_AGE_JOURS)),
+        # age_jours <= 1825 à une date, > 1825 à l'autre
+        (debut - timedelta(days=SEUIL_MALUS_AGE_JOURS), fin - timedelta(days=SEUIL_MALUS_AGE_JOURS + 1)),
+    ]
+    return [(premier.isoformat(), dernier.isoformat()) for premier, dernier in plages]
+
+
+def rafraichir_indice_fiabilite(date_reference=None):
+    # Met à jour les scores persistants (table scores_fiabilite) pour date_reference:
+    # seuls les équipements modifiés depuis le dernier rafraîchissement (journal_modifications)
+    # et ceux qui ont franchi 2 ou 5 ans d'âge depuis l'ancienne date sont recalculés
+    date_maintenant = _date_calcul(date_reference)
+    return data_access.rafraichir_scores_fiabilite(
+        date_maintenant.date().isoformat(),
+        lambda ligne: _ligne_fiabilite(ligne, ligne['nb_pannes'], ligne['cout_total'],
+                                       date_maintenant)['indice_fiabilite'],
+        _plages_changement_age)
+
+
+def _fiabilite_incrementale(date_maintenant):
+    # Scores persistants rafraîchis, âge recalculé à la lecture pour date_maintenant
+    rafraichir_indice_fiabilite(date_maintenant)
+    return [
+        {
+            'nom': ligne['nom'],
+            'type': ligne['type'],
+            'age_annees': round(_age_annees(ligne['date_acquisition'], date_maintenant), 1),
+            'nb_pannes': ligne['nb_pannes'],
+            'cout_total': round(ligne['cout_total'], 2),
+            'indice_fiabilite': ligne['indice_fiabilite']
+        }
+        for ligne in data_access.iterer_scores_fiabilite()
+    ]
+
+
+# Modes de calcul de l'indice de fiabilité
+MODES_FIABILITE = ('sql', 'python', 'colonnes', 'parallele', 'incremental')
+
+
+def calculer_indice_fiabilite(instantane=None, mode='sql', nb_processus=None, date_reference=None):
+    # mode 'sql'       : agrégation GROUP BY côté base, une ligne par équipement
+    # mode 'python'    : regroupement des interventions en Python (calcul d'origine)
+    # mode 'colonnes'  : regroupement vectorisé sur l'instantané en colonnes
+    # mode 'parallele' : mode 'sql' réparti par tranches d'ids sur nb_processus processus
+    #                    (chacun lit la base avec sa connexion: instantane n'est pas utilisé)
+    # mode 'incremental': scores persistants, recalculés seulement pour les équipements
+    #                    modifiés depuis l'appel précédent (écrit en base: instantane n'est pas utilisé)
+    # date_reference : date du calcul des âges (date ou datetime, maintenant par défaut)
+    _verifier_mode(mode, MODES_FIABILITE)
+
+    resultats = []
+    date_maintenant = _date_calcul(date_reference)
+
+    if mode == 'sql':
+        if instantane is not None:
+            lignes = instantane.agregats_fiabilite
+        else:
+            lignes = data_access.iterer_agregats_fiabilite()
+
+        for ligne in lignes:
+            resultats.append(_ligne_fiabilite(ligne, ligne['nb_pannes'], ligne['cout_total'], date_maintenant))
+    elif mode == 'colonnes':
+        resultats = _fiabilite_colonnes(_colonnes(instantane), date_maintenant)
+    elif mode == 'parallele':
+        resultats = _fiabilite_parallele(date_maintenant, nb_processus)
+    elif mode == 'incremental':
+        resultats = _fiabilite_incrementale(date_maintenant)
+    else:
+        agregats = _agregats_interventions(instantane)
+
+        for eq in _equipements(instantane):
+            agg = agregats.get(eq['id'])
+            nb_pannes = agg['nb_pannes'] if agg else 0
+            cout_total = agg['cout_total'] if agg else 0
+            resultats.append(_ligne_fiabilite(eq, nb_pannes, cout_total, date_maintenant))
 
     # Trier du plus fiable au moins fiable
     resultats.sort(key=lambda x: x['indice_fiabilite'], reverse=True)
@@ -103,22 +388,63 @@ def calculer_indice_fiabilite():
     return resultats
 
 
-def calculer_tendance_couts(annee=2024):
-    interventions = data_access.obtenir_interventions_completes()
+def comparer_modes_fiabilite():
+    # Calcule l'indice avec les deux modes sur les mêmes données et liste les écarts
+    with InstantaneRapport() as instantane:
+        resultat_sql = calculer_indice_fiabilite(instantane, mode='sql')
+        resultat_python = calculer_indice_fiabilite(instantane, mode='python')
 
-    # Regrouper par mois
-    couts_par_mois = {}  # {1: 150.0, 2: 200.0, ...}
+    differences = []
+    for ligne_sql, ligne_python in zip(resultat_sql, resultat_python):
+        if ligne_sql != ligne_python:
+            differences.append({'sql': ligne_sql, 'python': ligne_python})
+    if len(resultat_sql) != len(resultat_python):
+        differences.append({'sql': len(resultat_sql), 'python': len(resultat_python)})
 
-    for inter in interventions:
-        date_inter = datetime.strptime(inter['date_intervention'], '%Y-%m-%d')
+    return {
+        'identique': not differences,
+        'nb_equipements': len(resultat_sql),
+        'differences': differences
+    }
 
-        if date_inter.year == annee:
-            mois = date_inter.month
 
-            if mois not in couts_par_mois:
-                couts_par_mois[mois] = 0
+def comparer_modes_colonnes(annee=2024):
+    # Calcule chaque indicateur avec son mode par défaut et en mode 'colonnes' sur les mêmes données
+    with InstantaneRapport() as instantane:
+        paires = {
+            'taux_disponibilite': (calculer_taux_disponibilite(instantane),
+                                   calculer_taux_disponibilite(instantane, mode='colonnes')),
+            'indice_fiabilite': (calculer_indice_fiabilite(instantane),
+                                 calculer_indice_fiabilite(instantane, mode='colonnes')),
+            'tendance_couts': (calculer_tendance_couts(annee, instantane),
+                               calculer_tendance_couts(annee, instantane, mode='colonnes')),
+            'alertes': (generer_alertes(instantane), generer_alertes(instantane, mode='colonnes')),
+        }
+
+    identiques = {nom: reference == colonnes for nom, (reference, colonnes) in paires.items()}
+    return {
+        'identique': all(identiques.values()),
+        'calculs': identiques,
+        'numpy': stockage_colonnes.np is not None
+    }
 
-            couts_par_mois[mois] += inter['cout']
+
+def calculer_tendance_couts(annee=2024, instantane=None, mode='sql'):
+    # mode 'sql'      : coûts par mois agrégés en SQL (intervalle de dates de l'année, via index)
+    # mode 'colonnes' : somme par mois sur les colonnes d'interventions
+    _verifier_mode(mode, MODES_CALCUL)
+
+    if mode == 'colonnes':
+        couts_par_mois = _colonnes(instantane).couts_par_mois(annee)
+    else:
+        if instantane is not None:
+            lignes = instantane.interventions_par_mois(annee)
+        else:
+            lignes = data_access.obtenir_interventions_par_mois(annee)
+
+        couts_par_mois = {}  # {1: 150.0, 2: 200.0, ...}
+        for ligne in lignes:
+            couts_par_mois[int(ligne['mois'])] = ligne['cout_total']
 
     # Calculer les totaux par semestre
     cout_s1 = 0  # Mois 1 à 6
@@ -153,82 +479,86 @@ def calculer_tendance_couts(annee=2024):
     }
 
 
-def generer_alertes():
-    equipements = data_access.obtenir_tous_equipements()
-    interventions = data_access.obtenir_interventions_completes()
+def _alertes_colonnes(colonnes, regles, date_reference):
+    # Règles actives appliquées aux agrégats par équipement des colonnes, une comparaison
+    # vectorisée par règle; même ordre que data_access.iterer_alertes
+    agregats = colonnes.agregats_equipements()
+    reference = stockage_colonnes.jour_julien(date_reference or date.today())
+    dernier_jour = agregats['dernier_jour']
+    if stockage_colonnes.np is not None:
+        jours = reference - dernier_jour
+        presentes = dernier_jour >= 0
+    else:
+        jours = [reference - jour for jour in dernier_jour]
+        presentes = [jour >= 0 for jour in dernier_jour]
 
-    # Regrouper les interventions par équipement
-    interventions_par_equipement = {}
-    for inter in interventions:
-        eq_id = inter['equipement_id']
-        if eq_id not in interventions_par_equipement:
-            interventions_par_equipement[eq_id] = []
-        interventions_par_equipement[eq_id].append(inter)
+    # indicateur -> (valeurs par équipement, masque des valeurs définies, conversion)
+    # Coûts arrondis au centime comme dans data_access.iterer_alertes
+    if stockage_colonnes.np is not None:
+        couts = stockage_colonnes.np.round(agregats['cout_total'], 2)
+    else:
+        couts = [round(cout, 2) for cout in agregats['cout_total']]
 
-    alertes = []
-    date_maintenant = datetime.now()
-
-    for eq in equipements:
-        eq_id = eq['id']
-        inters = interventions_par_equipement.get(eq_id, [])
-
-        if not inters:
-            # Pas d'intervention enregistrée
-            alertes.append({
-                'equipement': eq['nom'],
-                'niveau': 'INFO',
-                'message': "Aucune intervention enregistrée"
-            })
+    mesures = {
+        'nb_interventions': (agregats['nb_interventions'], None, int),
+        'nb_pannes': (agregats['nb_pannes'], None, int),
+        'cout_total': (couts, None, float),
+        'jours_depuis_derniere': (jours, presentes, int),
+    }
+    rangs = {'CRITIQUE': 0, 'ATTENTION': 1}
+    noms, ids = colonnes.equipements['nom'], colonnes.equipements['id']
+
+    lignes = []
+    for regle in regles:
+        if not regle['actif']:
             continue
+        valeurs, definies, conversion = mesures[regle['indicateur']]
+        for position in colonnes.selection_regle(valeurs, regle['operateur'], regle['seuil'], definies):
+            cle = (rangs.get(regle['niveau'], 2), noms[position], int(ids[position]), regle['ordre'], regle['id'])
+            lignes.append((cle, {
+                'equipement': noms[position],
+                'niveau': regle['niveau'],
+                'message': regle['message'],
+                'valeur': conversion(valeurs[position])
+            }))
+    lignes.sort(key=lambda ligne: ligne[0])
+    return [ligne for _, ligne in lignes]
+
+
+def generer_alertes(instantane=None, date_reference=None, mode='sql'):
+    # Les seuils sont dans la table regles_alerte
+    # mode 'sql'      : détection faite en SQL
+    # mode 'colonnes' : comparaisons sur les agrégats calculés à partir des colonnes
+    _verifier_mode(mode, MODES_CALCUL)
+
+    if mode == 'colonnes':
+        regles = instantane.regles_alerte if instantane is not None else data_access.obtenir_regles_alerte()
+        lignes = _alertes_colonnes(_colonnes(instantane), regles, date_reference)
+    elif instantane is not None:
+        lignes = instantane.alertes(date_reference)
+    else:
+        lignes = data_access.iterer_alertes(date_reference)
 
-        # Compter les pannes
-        nb_pannes = sum(1 for i in inters if i['type_intervention'] == 'corrective')
-
-        if nb_pannes >= 2:
-            alertes.append({
-                'equipement': eq['nom'],
-                'niveau': 'CRITIQUE',
-                'message': f"{nb_pannes} pannes enregistrées - envisager remplacement"
-            })
-
-        # Vérifier le coût total
-        cout_total = sum(i['cout'] for i in inters)
-        if cout_total > 1000:
-            alertes.append({
-                'equipement': eq['nom'],
-                'niveau': 'ATTENTION',
-                'message': f"Coût élevé: {cout_total:.0f}€"
-            })
-
-        # Dernière intervention
-        dates = [datetime.strptime(i['date_intervention'], '%Y-%m-%d') for i in inters]
-        derniere = max(dates)
-        jours_depuis = (date_maintenant - derniere).days
-
-        if jours_depuis > 180:
-            alertes.append({
-                'equipement': eq['nom'],
-                'niveau': 'ATTENTION',
-                'message': f"Pas de maintenance depuis {jours_depuis} jours"
-            })
-
-    # Trier par niveau (CRITIQUE d'abord)
-    ordre = {'CRITIQUE': 0, 'ATTENTION': 1, 'INFO': 2}
-    alertes.sort(key=lambda x: ordre.get(x['niveau'], 3))
+    # Lignes déjà triées par niveau (CRITIQUE d'abord)
+    alertes = []
+    for ligne in lignes:
+        alertes.append({
+            'equipement': ligne['equipement'],
+            'niveau': ligne['niveau'],
+            'message': ligne['message'].format(valeur=ligne['valeur'])
+        })
 
     return alertes
 
 
 def generer_rapport_synthese():
-    return {
-        'indicateurs_globaux': {
-            'cout_total': data_access.obtenir_cout_total(),
-            'nombre_interventions': data_access.obtenir_nombre_interventions(),
-            'duree_moyenne_minutes': data_access.obtenir_duree_moyenne(),
-        },
-        'taux_disponibilite': calculer_taux_disponibilite(),
-        'tendance_couts': calculer_tendance_couts(),
-        'top_equipements_sollicites': data_access.obtenir_equipements_sollicites(5),
-        'frequence_par_type': data_access.obtenir_frequence_par_type(),
-        'alertes': generer_alertes()
-    }
+    # Toutes les sections partagent le même instantané (une transaction, une lecture par jeu de données)
+    with InstantaneRapport() as instantane:
+        return {
+            'indicateurs_globaux': instantane.indicateurs_globaux,
+            'taux_disponibilite': calculer_taux_disponibilite(instantane),
+            'tendance_couts': calculer_tendance_couts(instantane=instantane),
+            'top_equipements_sollicites': instantane.equipements_sollicites(5),
+            'frequence_par_type': instantane.frequence_par_type,
+            'alertes': generer_alertes(instantane)
+        }
@@ -0,0 +1,134 @@
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+import db_connection
+
+
+# Nombre maximum de résultats conservés (les moins récemment utilisés sont évincés)
+TAILLE_CACHE_DEFAUT = 128
+
+
+class CacheResultats:
+    """Cache LRU des résultats de requêtes, valable pour une version des données.
+
+    La version combine un compteur local (incrémenté par les fonctions d'écriture de
+    data_access) et PRAGMA data_version (écritures faites par d'autres processus).
+    """
+
+    def __init__(self, taille_max=TAILLE_CACHE_DEFAUT):
+        if taille_max < 1:
+            raise ValueError("taille_max doit être >= 1")
+        self.taille_max = taille_max
+        self.actif = True
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+        self._version_locale = 0
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def version(self):
+        """Retourne la version courante des données."""
+        return (self._version_locale, db_connection.version_donnees())
+
+    def lire(self, cle, version):
+        """Retourne (trouvé, valeur) pour une clé, si elle a été calculée sur cette version."""
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None and entree[0] == version:
+                self._entrees.move_to_end(cle)
+                self.succes += 1
+                return True, entree[1]
+            if entree is not None:
+                del self._entrees[cle]
+            self.echecs += 1
+            return False, None
+
+    def ecrire(self, cle, version, valeur):
+        """Enregistre un résultat et évince les plus anciens au-delà de taille_max."""
+        with self._verrou:
+            if version[0] != self._version_locale:
+                return  # Une écriture a eu lieu pendant le calcul
+            self._entrees[cle] = (version, valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def invalider(self):
+        """Marque toutes les entrées comme périmées (appelé après une écriture)."""
+        with self._verrou:
+            self._version_locale += 1
+            self._entrees.clear()
+
+    def vider(self):
+        """Vide le cache et remet les compteurs à zéro."""
+        with self._verrou:
+            self._entrees.clear()
+            self.succes = 0
+            self.echecs = 0
+            self.evictions = 0
+
+    def statistiques(self):
+        """Retourne les compteurs du cache."""
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'evictions': self.evictions,
+                'taux_succes': round(self.succes / total * 100, 2) if total else 0.0,
+                'taille': len(self._entrees),
+                'taille_max': self.taille_max,
+            }
+
+
+# Cache partagé par les fonctions de data_access
+cache = CacheResultats()
+
+
+def mis_en_cache(fonction):
+    """Décorateur: met en cache le résultat selon la fonction et ses arguments.
+
+    Chaque appel reçoit une copie, le résultat en cache ne peut pas être modifié.
+    Dans un bloc connexion_lecture() déjà ouvert (instantané de rapport), le cache est
+    ignoré: la transaction en cours peut voir une version plus ancienne des données.
+    """
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        if not cache.actif or db_connection.lecture_en_cours():
+            return fonction(*args, **kwargs)
+
+        cle = (fonction.__name__, args, tuple(sorted(kwargs.items())))
+        version = cache.version()
+        trouve, valeur = cache.lire(cle, version)
+        if not trouve:
+            valeur = fonction(*args, **kwargs)
+            cache.ecrire(cle, version, valeur)
+        return copy.deepcopy(valeur)
+
+    return enveloppe
+
+
+def invalide_cache(fonction):
+    """Décorateur: invalide le cache après l'appel d'une fonction d'écriture."""
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            cache.invalider()
+
+    return enveloppe
+
+
+def statistiques_cache():
+    """Retourne les compteurs succès / échecs / évictions du cache."""
+    return cache.statistiques()
+
+
+def vider_cache():
+    """Vide le cache (compteurs compris)."""
+    cache.vider()
@@ -0,0 +1,59 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Nombre de processus par défaut: un par cœur
+NB_PROCESSUS_DEFAUT = os.cpu_count() or 1
+# Tranches de travail par processus (plusieurs petites tranches équilibrent la charge)
+TRANCHES_PAR_PROCESSUS = 4
+
+# Pool gardé entre les appels (démarrer un processus coûte plus que la plupart des tranches)
+_executeur = None
+_nb_processus = None
+_verrou = threading.Lock()
+
+
+def obtenir_executeur(nb_processus=None):
+    """Pool de nb_processus processus, recréé si le nombre demandé change.
+
+    Les processus sont démarrés par "spawn": ils n'héritent d'aucune connexion SQLite
+    du parent et ouvrent les leurs (db_connection) à la première tâche.
+    """
+    global _executeur, _nb_processus
+    nb_processus = nb_processus or NB_PROCESSUS_DEFAUT
+    if nb_processus < 1:
+        raise ValueError("nb_processus doit être >= 1")
+    with _verrou:
+        if _executeur is None or _nb_processus != nb_processus:
+            if _executeur is not None:
+                _executeur.shutdown()
+            _executeur = ProcessPoolExecutor(max_workers=nb_processus,
+                                             mp_context=multiprocessing.get_context("spawn"))
+            _nb_processus = nb_processus
+        return _executeur
+
+
+def arreter_executeur():
+    """Arrête les processus du pool (rappelé automatiquement à la sortie)."""
+    global _executeur, _nb_processus
+    with _verrou:
+        if _executeur is not None:
+            _executeur.shutdown()
+        _executeur = None
+        _nb_processus = None
+
+
+atexit.register(arreter_executeur)
+
+
+def executer_en_parallele(fonction, taches, nb_processus=None):
+    """Exécute fonction(*tache) pour chaque tâche dans le pool; résultats dans l'ordre des tâches.
+
+    fonction doit être définie au niveau d'un module (elle est importée par les processus).
+    """
+    executeur = obtenir_executeur(nb_processus)
+    futures = [executeur.submit(fonction, *tache) for tache in taches]
+    return [future.result() for future in futures]
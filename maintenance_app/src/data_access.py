@@ -1,243 +1,1444 @@
-from db_connection import obtenir_connexion
+import base64
+import binascii
+import json
+import re
+import sqlite3
+from datetime import date, datetime
+
+from db_connection import connexion_ecriture, connexion_lecture, expliquer_plan
+from cache_resultats import invalide_cache, mis_en_cache
+
+
+# Valeurs autorisées par les contraintes CHECK de schema.sql
+TYPES_EQUIPEMENT = ('ordinateur', 'machine', 'equipement_technique')
+STATUTS_EQUIPEMENT = ('actif', 'en_panne', 'en_maintenance', 'reforme')
+TYPES_INTERVENTION = ('preventive', 'corrective', 'installation', 'mise_a_jour')
+STATUTS_INTERVENTION = ('planifiee', 'en_cours', 'terminee', 'annulee')
+
+# Colonnes attendues par les fonctions d'insertion en masse (ordre de l'INSERT)
+COLONNES_TECHNICIEN = ('nom', 'prenom', 'specialite', 'email', 'date_embauche')
+COLONNES_EQUIPEMENT = ('nom', 'type', 'marque', 'modele', 'numero_serie',
+                       'date_acquisition', 'localisation', 'statut')
+COLONNES_INTERVENTION = ('equipement_id', 'technicien_id', 'date_intervention', 'type_intervention',
+                         'description', 'duree_minutes', 'cout', 'statut')
+
+# Clés naturelles acceptées à la place des IDs d'une intervention (import CSV):
+# colonne ID -> colonne de la ligne, table et colonne où la rechercher (sans tenir compte de la casse)
+CLES_NATURELLES_INTERVENTION = {
+    'equipement_id': ('numero_serie', 'equipements', 'numero_serie'),
+    'technicien_id': ('email_technicien', 'techniciens', 'email'),
+}
+
+# Nombre de lignes insérées par transaction
+TAILLE_LOT_DEFAUT = 1000
+
+# Nombre de lignes lues par fetchmany dans les fonctions iterer_*
+TAILLE_CHUNK_DEFAUT = 500
+# Nombre de lignes par paquet de l'export des interventions (tuples, voir iterer_paquets_interventions_detaillees)
+TAILLE_CHUNK_EXPORT = 5000
+
+# Colonnes de l'export des interventions détaillées: nom de la colonne -> expression SQL
+COLONNES_INTERVENTIONS_DETAILLEES = {
+    'id': 'i.id',
+    'date_intervention': 'i.date_intervention',
+    'type_intervention': 'i.type_intervention',
+    'statut': 'i.statut',
+    'description': 'i.description',
+    'duree_minutes': 'i.duree_minutes',
+    'cout': 'i.cout',
+    'equipement_id': 'i.equipement_id',
+    'equipement_nom': 'e.nom',
+    'equipement_type': 'e.type',
+    'numero_serie': 'e.numero_serie',
+    'localisation': 'e.localisation',
+    'technicien_id': 'i.technicien_id',
+    'technicien_nom': 't.nom',
+    'technicien_prenom': 't.prenom',
+    'technicien_email': 't.email',
+}
+
+# Taille de page par défaut de la pagination par clé
+TAILLE_PAGE_DEFAUT = 50
+# Filtres acceptés par paginer_interventions (clé -> condition SQL)
+FILTRES_INTERVENTIONS = {
+    'equipement_id': "i.equipement_id = ?",
+    'technicien_id': "i.technicien_id = ?",
+    'statut': "i.statut = ?",
+    'type_intervention': "i.type_intervention = ?",
+    'date_debut': "i.date_intervention >= ?",
+    'date_fin': "i.date_intervention < ?",
+}
+
+# Nombre maximal de résultats des recherches d'équipement / de technicien
+LIMITE_RECHERCHE_DEFAUT = 20
+# Recherche plein texte: résultats par défaut et marqueurs des termes trouvés dans l'extrait
+LIMITE_RECHERCHE_TEXTE = 50
+MARQUES_EXTRAIT = ('[', ']')
 
 
 # FONCTIONS DE BASE 
+def _iterer_lignes(cursor, taille_chunk):
+    #Parcourt le résultat d'un curseur par paquets de taille_chunk lignes
+    while True:
+        rows = cursor.fetchmany(taille_chunk)
+        if not rows:
+            break
+        for row in rows:
+            yield dict(row)
+
+
+def iterer_tous_equipements(taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Parcourt tous les équipements sans charger la table en mémoire
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM equipements ORDER BY nom, id")
+        yield from _iterer_lignes(cursor, taille_chunk)
+
+
 def obtenir_tous_equipements():
     #Retourne tous les équipements
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM equipements ORDER BY nom")
-    return [dict(row) for row in cursor.fetchall()]
+    return list(iterer_tous_equipements())
 
 
 def obtenir_equipement_par_id(equipement_id):
     #Retourne un équipement par son ID
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM equipements WHERE id = ?", (equipement_id,))
-    row = cursor.fetchone()
-    return dict(row) if row else None
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM equipements WHERE id = ?", (equipement_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+
+def iterer_toutes_interventions(taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Parcourt toutes les interventions, archives comprises, sans charger la table en mémoire
+    #Colonnes nommées: les colonnes calculées annee / mois / annee_mois restent internes
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, {', '.join(COLONNES_INTERVENTION)} FROM interventions_historique "
+                       "ORDER BY date_intervention DESC")
+        yield from _iterer_lignes(cursor, taille_chunk)
 
 
 def obtenir_toutes_interventions():
     #Retourne toutes les interventions
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM interventions ORDER BY date_intervention DESC")
-    return [dict(row) for row in cursor.fetchall()]
+    return list(iterer_toutes_interventions())
 
 
 # STATISTIQUES SIMPLES 
+@mis_en_cache
 def obtenir_cout_total():
     #Calcule le coût total de maintenance
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT SUM(cout) as total FROM interventions WHERE statut = 'terminee'")
-    result = cursor.fetchone()
-    return result['total'] if result['total'] else 0.0
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        # Années archivées: agrégats figés (agregats_archives)
+        cursor.execute("""
+            SELECT COALESCE(SUM(cout), 0)
+                   + COALESCE((SELECT SUM(cout_total) FROM agregats_archives WHERE statut = 'terminee'), 0) as total
+            FROM interventions WHERE statut = 'terminee'
+        """)
+        result = cursor.fetchone()
+        return result['total'] if result['total'] else 0.0
 
 
+@mis_en_cache
 def obtenir_nombre_interventions():
     #Compte le nombre total d'interventions
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) as count FROM interventions")
-    return cursor.fetchone()['count']
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*)
+                   + COALESCE((SELECT SUM(nb_interventions) FROM agregats_archives), 0) as count
+            FROM interventions
+        """)
+        return cursor.fetchone()['count']
 
 
+@mis_en_cache
 def obtenir_duree_moyenne():
     #Calcule la durée moyenne des interventions
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT AVG(duree_minutes) as moyenne FROM interventions WHERE statut = 'terminee'")
-    result = cursor.fetchone()
-    return round(result['moyenne'], 2) if result['moyenne'] else 0.0
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT SUM(duree_minutes) as duree, COUNT(*) as nombre FROM interventions WHERE statut = 'terminee'
+            UNION ALL
+            SELECT SUM(duree_totale), SUM(nb_interventions) FROM agregats_archives WHERE statut = 'terminee'
+        """)
+        duree = nombre = 0
+        for row in cursor.fetchall():
+            duree += row['duree'] or 0
+            nombre += row['nombre'] or 0
+        return round(duree / nombre, 2) if nombre else 0.0
 
 
 # STATISTIQUES AVANCÉES 
+SQL_EQUIPEMENTS_SOLLICITES = """
+    SELECT e.id, e.nom, e.type,
+           SUM(s.nb_interventions) as nombre_interventions,
+           SUM(s.cout_total) as cout_total,
+           SUM(s.duree_totale) as duree_totale
+    FROM stats_equipement s
+    INNER JOIN equipements e ON e.id = s.equipement_id
+    GROUP BY e.id
+    HAVING SUM(s.nb_interventions) > 0
+"""
+
+
+@mis_en_cache
 def obtenir_equipements_sollicites(limit=5):
     #Retourne les équipements avec le plus d'interventions
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT e.id, e.nom, e.type,
-               COUNT(i.id) as nombre_interventions,
-               SUM(i.cout) as cout_total,
-               SUM(i.duree_minutes) as duree_totale
-        FROM equipements e
-        LEFT JOIN interventions i ON e.id = i.equipement_id
-        GROUP BY e.id
-        HAVING COUNT(i.id) > 0
-        ORDER BY nombre_interventions DESC
-        LIMIT ?
-    """, (limit,))
-    return [dict(row) for row in cursor.fetchall()]
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_EQUIPEMENTS_SOLLICITES + """
+            ORDER BY nombre_interventions DESC, e.id
+            LIMIT ?
+        """, (limit,))
+        return [dict(row) for row in cursor.fetchall()]
 
 
+@mis_en_cache
 def obtenir_frequence_par_type():
     #Nombre d'interventions par type
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT type_intervention,
-               COUNT(*) as nombre,
-               SUM(cout) as cout_total,
-               AVG(cout) as cout_moyen,
-               AVG(duree_minutes) as duree_moyenne
-        FROM interventions
-        WHERE statut = 'terminee'
-        GROUP BY type_intervention
-        ORDER BY nombre DESC
-    """)
-    return [dict(row) for row in cursor.fetchall()]
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT type_intervention,
+                   SUM(nombre) as nombre,
+                   SUM(cout_total) as cout_total,
+                   SUM(cout_total) / SUM(nombre) as cout_moyen,
+                   CAST(SUM(duree_totale) AS REAL) / SUM(nombre) as duree_moyenne
+            FROM (
+                SELECT type_intervention, COUNT(*) as nombre, SUM(cout) as cout_total,
+                       SUM(duree_minutes) as duree_totale
+                FROM interventions
+                WHERE statut = 'terminee'
+                GROUP BY type_intervention
+                UNION ALL
+                SELECT type_intervention, SUM(nb_interventions), SUM(cout_total), SUM(duree_totale)
+                FROM agregats_archives
+                WHERE statut = 'terminee'
+                GROUP BY type_intervention
+            )
+            GROUP BY type_intervention
+            ORDER BY nombre DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
 
 
+@mis_en_cache
 def obtenir_cout_par_type_equipement():
     #Coût de maintenance par type d'équipement
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT e.type,
-               COUNT(DISTINCT e.id) as nombre_equipements,
-               COUNT(i.id) as nombre_interventions,
-               SUM(i.cout) as cout_total,
-               AVG(i.cout) as cout_moyen_intervention
-        FROM equipements e
-        LEFT JOIN interventions i ON e.id = i.equipement_id AND i.statut = 'terminee'
-        GROUP BY e.type
-        ORDER BY cout_total DESC
-    """)
-    return [dict(row) for row in cursor.fetchall()]
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT e.type,
+                   COUNT(DISTINCT e.id) as nombre_equipements,
+                   COALESCE(SUM(s.nb_interventions), 0) as nombre_interventions,
+                   SUM(s.cout_total) as cout_total,
+                   SUM(s.cout_total) / SUM(s.nb_interventions) as cout_moyen_intervention
+            FROM equipements e
+            LEFT JOIN stats_equipement s ON e.id = s.equipement_id AND s.statut = 'terminee'
+            GROUP BY e.type
+            ORDER BY cout_total DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+# Statistiques par période: intervalles [debut, fin[ sur la date ou sur les colonnes
+# calculées annee / annee_mois, qui sont indexées (pas de strftime sur chaque ligne)
+SQL_INTERVENTIONS_PAR_MOIS = """
+    SELECT mois,
+           COUNT(*) as nombre_interventions,
+           SUM(cout) as cout_total,
+           SUM(duree_minutes) as duree_totale
+    FROM interventions
+    WHERE statut = 'terminee'
+      AND date_intervention >= ? AND date_intervention < ?
+    GROUP BY mois
+    ORDER BY mois
+"""
+
+SQL_INTERVENTIONS_PAR_PERIODE = """
+    SELECT annee_mois,
+           COUNT(*) as nombre_interventions,
+           SUM(cout) as cout_total,
+           SUM(duree_minutes) as duree_totale
+    FROM interventions
+    WHERE statut = 'terminee'
+      AND annee_mois >= ? AND annee_mois < ?
+    GROUP BY annee_mois
+    ORDER BY annee_mois
+"""
 
+SQL_INTERVENTIONS_PAR_ANNEE = """
+    SELECT annee,
+           COUNT(*) as nombre_interventions,
+           SUM(cout) as cout_total,
+           SUM(duree_minutes) as duree_totale
+    FROM interventions
+    WHERE statut = 'terminee'
+      AND annee >= ? AND annee < ?
+    GROUP BY annee
+    ORDER BY annee
+"""
 
+
+# Mêmes statistiques sur les agrégats figés des années archivées (agregats_archives)
+SQL_ARCHIVES_PAR_MOIS = """
+    SELECT mois,
+           SUM(nb_interventions) as nombre_interventions,
+           SUM(cout_total) as cout_total,
+           SUM(duree_totale) as duree_totale
+    FROM agregats_archives
+    WHERE statut = 'terminee' AND annee = ?
+    GROUP BY mois
+"""
+
+SQL_ARCHIVES_PAR_PERIODE = """
+    SELECT printf('%04d-%s', annee, mois) as annee_mois,
+           SUM(nb_interventions) as nombre_interventions,
+           SUM(cout_total) as cout_total,
+           SUM(duree_totale) as duree_totale
+    FROM agregats_archives
+    WHERE statut = 'terminee' AND annee BETWEEN ? AND ?
+    GROUP BY annee, mois
+    HAVING annee_mois >= ? AND annee_mois < ?
+"""
+
+SQL_ARCHIVES_PAR_ANNEE = """
+    SELECT annee,
+           SUM(nb_interventions) as nombre_interventions,
+           SUM(cout_total) as cout_total,
+           SUM(duree_totale) as duree_totale
+    FROM agregats_archives
+    WHERE statut = 'terminee' AND annee >= ? AND annee < ?
+    GROUP BY annee
+"""
+
+
+def _bornes_annee(annee):
+    #Intervalle [1er janvier, 1er janvier suivant[ d'une année
+    annee = int(annee)
+    return (f"{annee:04d}-01-01", f"{annee + 1:04d}-01-01")
+
+
+def _archives_dans(conn, annee_debut, annee_fin):
+    #Vrai si une année de [annee_debut, annee_fin] est archivée (ses agrégats doivent être lus)
+    cursor = conn.execute("SELECT 1 FROM archives_interventions WHERE annee BETWEEN ? AND ? LIMIT 1",
+                          (annee_debut, annee_fin))
+    return cursor.fetchone() is not None
+
+
+def _statistiques_periode(sql, parametres, sql_archives, parametres_archives, annees, cle):
+    #Statistique par période sur interventions, complétée par les agrégats des années archivées
+    #de l'intervalle annees (les années non archivées ne lisent que interventions)
+    with connexion_lecture() as conn:
+        lignes = [dict(row) for row in conn.execute(sql, parametres).fetchall()]
+        if not _archives_dans(conn, *annees):
+            return lignes
+
+        # Une année archivée peut encore avoir des interventions saisies après l'archivage
+        par_cle = {ligne[cle]: ligne for ligne in lignes}
+        for row in conn.execute(sql_archives, parametres_archives).fetchall():
+            ligne = par_cle.get(row[cle])
+            if ligne is None:
+                par_cle[row[cle]] = dict(row)
+            else:
+                for colonne in ('nombre_interventions', 'cout_total', 'duree_totale'):
+                    ligne[colonne] += row[colonne]
+        return [par_cle[valeur] for valeur in sorted(par_cle)]
+
+
+@mis_en_cache
 def obtenir_interventions_par_mois(annee):
     #Interventions groupées par mois pour une année
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT strftime('%m', date_intervention) as mois,
-               COUNT(*) as nombre_interventions,
-               SUM(cout) as cout_total,
-               SUM(duree_minutes) as duree_totale
-        FROM interventions
-        WHERE strftime('%Y', date_intervention) = ?
-          AND statut = 'terminee'
-        GROUP BY strftime('%m', date_intervention)
-        ORDER BY mois
-    """, (str(annee),))
-    return [dict(row) for row in cursor.fetchall()]
+    annee = int(annee)
+    return _statistiques_periode(SQL_INTERVENTIONS_PAR_MOIS, _bornes_annee(annee),
+                                 SQL_ARCHIVES_PAR_MOIS, (annee,), (annee, annee), 'mois')
+
+
+@mis_en_cache
+def obtenir_interventions_par_periode(mois_debut, mois_fin):
+    #Interventions groupées par mois, de mois_debut (inclus) à mois_fin (exclu), au format YYYY-MM
+    annees = (int(mois_debut[:4]), int(mois_fin[:4]))
+    return _statistiques_periode(SQL_INTERVENTIONS_PAR_PERIODE, (mois_debut, mois_fin),
+                                 SQL_ARCHIVES_PAR_PERIODE, (*annees, mois_debut, mois_fin), annees,
+                                 'annee_mois')
 
 
+@mis_en_cache
+def obtenir_interventions_par_annee(annee_debut=1, annee_fin=9999):
+    #Interventions groupées par année, de annee_debut à annee_fin incluses
+    bornes = (int(annee_debut), int(annee_fin) + 1)
+    return _statistiques_periode(SQL_INTERVENTIONS_PAR_ANNEE, bornes, SQL_ARCHIVES_PAR_ANNEE, bornes,
+                                 (int(annee_debut), int(annee_fin)), 'annee')
+
+
+def verifier_plans_index(annee=2024):
+    #Vérifie avec EXPLAIN QUERY PLAN que les statistiques par période passent par un index
+    requetes = [
+        ('interventions_par_mois', SQL_INTERVENTIONS_PAR_MOIS, _bornes_annee(annee)),
+        ('interventions_par_periode', SQL_INTERVENTIONS_PAR_PERIODE, (f"{int(annee):04d}-01", f"{int(annee) + 1:04d}-01")),
+        ('interventions_par_annee', SQL_INTERVENTIONS_PAR_ANNEE, (int(annee), int(annee) + 1)),
+    ]
+
+    resultats = []
+    for nom, sql, parametres in requetes:
+        plan = expliquer_plan(sql, parametres)
+        # "SEARCH ... USING INDEX" = parcours d'une plage d'index; "SCAN interventions" = table entière
+        parcours_complet = any(ligne.startswith('SCAN') and 'INDEX' not in ligne for ligne in plan)
+        index_utilise = any('USING INDEX' in ligne or 'USING COVERING INDEX' in ligne for ligne in plan)
+        resultats.append({
+            'requete': nom,
+            'plan': plan,
+            'index_utilise': index_utilise and not parcours_complet
+        })
+    return resultats
+
+
+SQL_AGREGATS_FIABILITE = """
+    SELECT e.id, e.nom, e.type, e.date_acquisition,
+           COALESCE(s.nb_correctives, 0) as nb_pannes,
+           COALESCE(s.cout_total, 0) as cout_total
+    FROM equipements e
+    LEFT JOIN stats_equipement s ON e.id = s.equipement_id AND s.statut = 'terminee'
+"""
+
+
+def iterer_agregats_fiabilite(taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Une ligne par équipement: pannes (correctives) et coût des interventions terminées (table stats_equipement)
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_AGREGATS_FIABILITE + """
+            ORDER BY e.nom, e.id
+        """)
+        yield from _iterer_lignes(cursor, taille_chunk)
+
+
+def iterer_agregats_fiabilite_tranche(id_debut, id_fin, taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Agrégats de fiabilité des équipements dont l'id est entre id_debut et id_fin (inclus)
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_AGREGATS_FIABILITE + """
+            WHERE e.id BETWEEN ? AND ?
+            ORDER BY e.nom, e.id
+        """, (id_debut, id_fin))
+        yield from _iterer_lignes(cursor, taille_chunk)
+
+
+def obtenir_tranches_equipements(nb_tranches):
+    #Découpe les ids d'équipements en nb_tranches intervalles [id_debut, id_fin] de tailles égales
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT MIN(id) as id_debut, MAX(id) as id_fin
+            FROM (SELECT id, NTILE(?) OVER (ORDER BY id) as tranche FROM equipements)
+            GROUP BY tranche
+            ORDER BY tranche
+        """, (nb_tranches,))
+        return [(row['id_debut'], row['id_fin']) for row in cursor.fetchall()]
+
+
+@mis_en_cache
+def obtenir_agregats_fiabilite():
+    #Agrégats par équipement pour l'indice de fiabilité (calculés en SQL)
+    return list(iterer_agregats_fiabilite())
+
+
+def obtenir_etat_scores_fiabilite():
+    #Dernier id du journal pris en compte et date de référence des scores persistants (None: jamais calculés)
+    with connexion_lecture() as conn:
+        row = conn.execute("SELECT dernier_journal, date_reference FROM scores_fiabilite_etat").fetchone()
+        return dict(row) if row else None
+
+
+def iterer_scores_fiabilite(taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Scores persistants (table scores_fiabilite), dans l'ordre de iterer_agregats_fiabilite
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT equipement_id as id, nom, type, date_acquisition, nb_pannes, cout_total, indice_fiabilite
+            FROM scores_fiabilite
+            ORDER BY nom, equipement_id
+        """)
+        yield from _iterer_lignes(cursor, taille_chunk)
+
+
+def iterer_alertes(date_reference=None, taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Applique les règles actives de regles_alerte aux agrégats de chaque équipement (stats_equipement)
+    #cout_total est arrondi au centime: l'ordre des additions (triggers, archivage) laisse des
+    #écarts d'arrondi flottant qui feraient changer le montant affiché
+    #date_reference (YYYY-MM-DD, aujourd'hui par défaut) sert au calcul de jours_depuis_derniere
+    date_reference = date_reference or date.today().isoformat()
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            WITH agregats AS (
+                SELECT e.id, e.nom,
+                       COALESCE(s.nb_interventions, 0) as nb_interventions,
+                       COALESCE(s.nb_correctives, 0) as nb_pannes,
+                       ROUND(COALESCE(s.cout_total, 0), 2) as cout_total,
+                       CAST(julianday(?) - julianday(s.derniere_intervention) AS INTEGER) as jours_depuis_derniere
+                FROM equipements e
+                LEFT JOIN stats_equipement s ON e.id = s.equipement_id AND s.statut = 'terminee'
+            ),
+            mesures AS (
+                SELECT a.id, a.nom, r.id as regle_id, r.code, r.ordre, r.niveau, r.message,
+                       r.operateur, r.seuil,
+                       CASE r.indicateur
+                           WHEN 'nb_interventions' THEN a.nb_interventions
+                           WHEN 'nb_pannes' THEN a.nb_pannes
+                           WHEN 'cout_total' THEN a.cout_total
+                           WHEN 'jours_depuis_derniere' THEN a.jours_depuis_derniere
+                       END as valeur
+                FROM agregats a
+                CROSS JOIN regles_alerte r
+                WHERE r.actif = 1
+            )
+            SELECT id as equipement_id, nom as equipement, code as regle, niveau, message, valeur
+            FROM mesures
+            WHERE valeur IS NOT NULL
+              AND CASE operateur
+                      WHEN '<' THEN valeur < seuil
+                      WHEN '<=' THEN valeur <= seuil
+                      WHEN '=' THEN valeur = seuil
+                      WHEN '>=' THEN valeur >= seuil
+                      WHEN '>' THEN valeur > seuil
+                  END
+            ORDER BY CASE niveau WHEN 'CRITIQUE' THEN 0 WHEN 'ATTENTION' THEN 1 ELSE 2 END,
+                     nom, id, ordre, regle_id
+        """, (date_reference,))
+        yield from _iterer_lignes(cursor, taille_chunk)
+
+
+def obtenir_alertes(date_reference=None):
+    #Alertes déclenchées (une ligne par équipement et par règle)
+    return list(iterer_alertes(date_reference))
+
+
+def obtenir_regles_alerte():
+    #Retourne les règles d'alerte
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM regles_alerte ORDER BY ordre, id")
+        return [dict(row) for row in cursor.fetchall()]
+
+
+# a: agrégats figés des années archivées (au plus une ligne par technicien)
+SQL_PERFORMANCE_TECHNICIENS = """
+    SELECT t.id,
+           t.nom || ' ' || t.prenom as technicien,
+           t.specialite,
+           COUNT(i.id) + COALESCE(a.nombre, 0) as nombre_interventions,
+           COALESCE(SUM(i.duree_minutes) + a.temps, SUM(i.duree_minutes), a.temps) as temps_total,
+           COALESCE(SUM(i.cout) + a.valeur, SUM(i.cout), a.valeur) as valeur_interventions
+    FROM techniciens t
+    LEFT JOIN interventions i ON t.id = i.technicien_id AND i.statut = 'terminee'
+    LEFT JOIN (
+        SELECT technicien_id, SUM(nb_interventions) as nombre, SUM(duree_totale) as temps,
+               SUM(cout_total) as valeur
+        FROM agregats_archives
+        WHERE statut = 'terminee'
+        GROUP BY technicien_id
+    ) a ON t.id = a.technicien_id
+    GROUP BY t.id
+"""
+
+
+@mis_en_cache
 def obtenir_performance_techniciens():
     #Performance des techniciens
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.id,
-               t.nom || ' ' || t.prenom as technicien,
-               t.specialite,
-               COUNT(i.id) as nombre_interventions,
-               SUM(i.duree_minutes) as temps_total,
-               SUM(i.cout) as valeur_interventions
-        FROM techniciens t
-        LEFT JOIN interventions i ON t.id = i.technicien_id AND i.statut = 'terminee'
-        GROUP BY t.id
-        ORDER BY nombre_interventions DESC
-    """)
-    return [dict(row) for row in cursor.fetchall()]
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_PERFORMANCE_TECHNICIENS + """
+            ORDER BY nombre_interventions DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+# PAGES TRIÉES (grilles de l'interface)
+# Colonnes de tri autorisées: clé exposée -> expression SQL (le tri n'est jamais injecté tel quel)
+TRI_EQUIPEMENTS_SOLLICITES = {
+    'nom': 'nom', 'type': 'type', 'nombre_interventions': 'nombre_interventions',
+    'cout_total': 'cout_total', 'duree_totale': 'duree_totale',
+}
+TRI_PERFORMANCE_TECHNICIENS = {
+    'technicien': 'technicien', 'specialite': 'specialite',
+    'nombre_interventions': 'nombre_interventions', 'temps_total': 'temps_total',
+    'valeur_interventions': 'valeur_interventions',
+}
+TRI_HISTORIQUE = {
+    'date_intervention': 'i.date_intervention', 'type_intervention': 'i.type_intervention',
+    'description': 'i.description', 'duree_minutes': 'i.duree_minutes', 'cout': 'i.cout',
+    'statut': 'i.statut', 'technicien': 'technicien',
+}
+
+
+def _lire_page(sql, parametres, colonnes_tri, tri, descendant, limite, decalage, departage):
+    #Une page (LIMIT / OFFSET) d'une requête triée sur une colonne autorisée
+    #departage: colonne unique (croissante) ajoutée au tri pour un ordre stable d'une page à l'autre
+    if tri not in colonnes_tri:
+        raise ValueError(f"Tri non autorisé: {tri} (colonnes: {', '.join(colonnes_tri)})")
+    sens = "DESC" if descendant else "ASC"
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            {sql}
+            ORDER BY {colonnes_tri[tri]} {sens}, {departage}
+            LIMIT ? OFFSET ?
+        """, (*parametres, limite, decalage))
+        return [dict(row) for row in cursor.fetchall()]
+
+
+@mis_en_cache
+def compter_equipements_sollicites():
+    #Nombre d'équipements ayant au moins une intervention
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT equipement_id FROM stats_equipement
+                GROUP BY equipement_id
+                HAVING SUM(nb_interventions) > 0
+            )
+        """)
+        return cursor.fetchone()[0]
+
+
+@mis_en_cache
+def obtenir_page_equipements_sollicites(tri='nombre_interventions', descendant=True, limite=100, decalage=0):
+    #Page des équipements sollicités, triée sur une colonne de TRI_EQUIPEMENTS_SOLLICITES
+    return _lire_page(SQL_EQUIPEMENTS_SOLLICITES, (), TRI_EQUIPEMENTS_SOLLICITES,
+                      tri, descendant, limite, decalage, 'e.id')
+
+
+@mis_en_cache
+def compter_techniciens():
+    #Nombre de techniciens
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM techniciens")
+        return cursor.fetchone()[0]
+
+
+@mis_en_cache
+def obtenir_page_performance_techniciens(tri='nombre_interventions', descendant=True, limite=100, decalage=0):
+    #Page de la performance des techniciens, triée sur une colonne de TRI_PERFORMANCE_TECHNICIENS
+    return _lire_page(SQL_PERFORMANCE_TECHNICIENS, (), TRI_PERFORMANCE_TECHNICIENS,
+                      tri, descendant, limite, decalage, 't.id')
+
+
+@mis_en_cache
+def compter_historique_equipement(equipement_id):
+    #Nombre d'interventions d'un équipement
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM interventions_historique WHERE equipement_id = ?", (equipement_id,))
+        return cursor.fetchone()[0]
+
+
+@mis_en_cache
+def obtenir_page_historique_equipement(equipement_id, tri='date_intervention', descendant=True,
+                                       limite=100, decalage=0):
+    #Page de l'historique d'un équipement, triée sur une colonne de TRI_HISTORIQUE
+    #Même ordre que _lire_page (colonne, puis id croissant), mais table par table: voir _lire_historique
+    if tri not in TRI_HISTORIQUE:
+        raise ValueError(f"Tri non autorisé: {tri} (colonnes: {', '.join(TRI_HISTORIQUE)})")
+    sens = "DESC" if descendant else "ASC"
+
+    def trier(lignes):
+        lignes.sort(key=lambda ligne: ligne['id'])
+        lignes.sort(key=lambda ligne: ligne[tri], reverse=descendant)
+        return lignes
+
+    with connexion_lecture() as conn:
+        lignes = _lire_historique(conn, _tables_historique(conn, descendant), f"""
+            SELECT i.id,
+                   i.date_intervention,
+                   i.type_intervention,
+                   i.description,
+                   i.duree_minutes,
+                   i.cout,
+                   i.statut,
+                   t.nom || ' ' || t.prenom as technicien
+            FROM {{table}} i
+            INNER JOIN techniciens t ON i.technicien_id = t.id
+            WHERE i.equipement_id = ?
+            ORDER BY {TRI_HISTORIQUE[tri]} {sens}, i.id
+            LIMIT ?
+        """, (equipement_id,), decalage + limite, trier, descendant if tri == 'date_intervention' else None)
+    return lignes[decalage:]
+
+
+def iterer_historique_equipement(equipement_id, taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Parcourt l'historique d'un équipement par paquets (interventions courantes et archivées)
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT i.date_intervention,
+                   i.type_intervention,
+                   i.description,
+                   i.duree_minutes,
+                   i.cout,
+                   i.statut,
+                   t.nom || ' ' || t.prenom as technicien
+            FROM interventions_historique i
+            INNER JOIN techniciens t ON i.technicien_id = t.id
+            WHERE i.equipement_id = ?
+            ORDER BY i.date_intervention DESC
+        """, (equipement_id,))
+        yield from _iterer_lignes(cursor, taille_chunk)
 
 
 def obtenir_historique_equipement(equipement_id):
     #Historique complet d'un équipement
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT i.date_intervention,
+    return list(iterer_historique_equipement(equipement_id))
+
+
+# PAGINATION PAR CLÉ
+# Ordre: date_intervention puis id, du plus récent au plus ancien. Le curseur contient la clé
+# (date, id) de la dernière ligne vue: la page suivante reprend l'index à partir de cette clé
+# au lieu de sauter OFFSET lignes.
+def _encoder_curseur(ligne, sens, filtres):
+    #Curseur opaque (base64 d'un JSON) pour repartir de cette ligne dans un sens
+    donnees = {'d': ligne['date_intervention'], 'i': ligne['id'], 's': sens, 'f': filtres}
+    return base64.urlsafe_b64encode(json.dumps(donnees, sort_keys=True).encode()).decode()
+
+
+def _decoder_curseur(curseur, filtres):
+    #Retourne (date, id, sens); le curseur doit avoir été produit avec les mêmes filtres
+    try:
+        donnees = json.loads(base64.urlsafe_b64decode(curseur.encode()))
+        cle = (donnees['d'], int(donnees['i']), donnees['s'])
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError("Curseur de pagination invalide")
+    if cle[2] not in ('suivant', 'precedent'):
+        raise ValueError("Curseur de pagination invalide")
+    if donnees.get('f') != filtres:
+        raise ValueError("Le curseur a été créé avec d'autres filtres")
+    return cle
+
+
+def paginer_interventions(taille_page=TAILLE_PAGE_DEFAUT, curseur=None, **filtres):
+    #Une page d'interventions (plus récentes d'abord), archives comprises, avec équipement et technicien
+    #curseur: None pour la première page, sinon curseur_suivant / curseur_precedent d'une page
+    #filtres: voir FILTRES_INTERVENTIONS (equipement_id, technicien_id, statut, type_intervention,
+    #date_debut, date_fin [exclue])
+    #Retourne {'lignes': [...], 'curseur_suivant': str ou None, 'curseur_precedent': str ou None}
+    return _paginer(taille_page, curseur, filtres)
+
+
+def _tables_historique(conn, descendant=True):
+    #[(table, annee)] de l'historique: interventions (annee None), puis les tables d'archive de la
+    #plus récente à la plus ancienne (descendant) ou de la plus ancienne à la plus récente
+    tables = [(row[0], row[1]) for row in conn.execute(
+        f"SELECT nom_table, annee FROM archives_interventions ORDER BY annee {'DESC' if descendant else 'ASC'}")]
+    return [("interventions", None)] + tables
+
+
+def _tables_periode(tables, date_debut=None, date_fin=None):
+    #tables de _tables_historique sans les archives dont l'année est hors de [date_debut, date_fin[
+    return [(table, annee) for table, annee in tables
+            if annee is None or ((date_debut is None or str(date_debut) < f"{annee + 1:04d}-01-01")
+                                 and (date_fin is None or str(date_fin) > f"{annee:04d}-01-01"))]
+
+
+def _lire_historique(conn, tables, sql, parametres, nombre, trier, descendant=None):
+    #Les nombre premières lignes de sql ({table} remplacé par chaque table, LIMIT ? en dernier
+    #paramètre), fusionnées par trier(lignes)
+    #Chaque table est lue avec son propre ORDER BY ... LIMIT (l'historique d'un équipement dans
+    #l'ordre de l'index (equipement_id, date_intervention, id)), au lieu de trier toute la vue
+    #interventions_historique.
+    #descendant (tri par date seulement, sinon None): une table d'archive ne contient que son
+    #année; quand la page est pleine et que sa dernière ligne est hors de cette année, ni
+    #cette archive ni les suivantes ne peuvent y entrer et la lecture s'arrête.
+    #interventions est toujours lue: elle peut contenir des dates d'années déjà archivées.
+    lignes = []
+    for table, annee in tables:
+        if annee is not None and descendant is not None and len(lignes) >= nombre:
+            date_limite = lignes[nombre - 1]['date_intervention']
+            if (date_limite >= f"{annee + 1:04d}-01-01") if descendant else (date_limite < f"{annee:04d}-01-01"):
+                break
+        lignes += [dict(row) for row in conn.execute(sql.format(table=table), (*parametres, nombre))]
+        lignes = trier(lignes)[:nombre]
+    return lignes
+
+
+def _paginer(taille_page, curseur, filtres, depuis_la_fin=False):
+    #Pagination par clé sur l'historique (interventions et archives)
+    #depuis_la_fin (sans curseur): première page = les lignes les plus anciennes
+    if taille_page < 1:
+        raise ValueError("taille_page doit être >= 1")
+    inconnus = set(filtres) - set(FILTRES_INTERVENTIONS)
+    if inconnus:
+        raise ValueError(f"Filtres inconnus: {', '.join(sorted(inconnus))}")
+    filtres = {cle: valeur for cle, valeur in filtres.items() if valeur is not None}
+
+    conditions = [FILTRES_INTERVENTIONS[cle] for cle in sorted(filtres)]
+    parametres = [filtres[cle] for cle in sorted(filtres)]
+    sens = 'precedent' if depuis_la_fin else 'suivant'
+    if curseur:
+        date_curseur, id_curseur, sens = _decoder_curseur(curseur, filtres)
+        # Comparaison de tuples: (date, id) strictement avant / après la clé du curseur
+        conditions.append("(i.date_intervention, i.id) < (?, ?)" if sens == 'suivant'
+                          else "(i.date_intervention, i.id) > (?, ?)")
+        parametres += [date_curseur, id_curseur]
+    ordre = "DESC" if sens == 'suivant' else "ASC"
+
+    # Une ligne de plus que demandé: indique s'il existe une page au-delà.
+    # CROSS JOIN fixe l'ordre des jointures dans SQLite: la table est parcourue dans
+    # l'ordre de l'index (sinon l'optimiseur peut partir des techniciens et tout trier)
+    sql = f"""
+        SELECT i.id, i.equipement_id, i.technicien_id, i.date_intervention,
+               i.type_intervention, i.description, i.duree_minutes, i.cout, i.statut,
+               e.nom as equipement,
+               t.nom || ' ' || t.prenom as technicien
+        FROM {{table}} i
+        CROSS JOIN equipements e ON i.equipement_id = e.id
+        CROSS JOIN techniciens t ON i.technicien_id = t.id
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY i.date_intervention {ordre}, i.id {ordre}
+        LIMIT ?
+    """
+    descendant = sens == 'suivant'
+
+    def trier(lignes):
+        lignes.sort(key=lambda ligne: (ligne['date_intervention'], ligne['id']), reverse=descendant)
+        return lignes
+
+    with connexion_lecture() as conn:
+        tables = _tables_periode(_tables_historique(conn, descendant),
+                                 filtres.get('date_debut'), filtres.get('date_fin'))
+        lignes = _lire_historique(conn, tables, sql, parametres, taille_page + 1, trier, descendant)
+
+    encore = len(lignes) > taille_page
+    lignes = lignes[:taille_page]
+    if sens == 'precedent':
+        lignes.reverse()
+
+    # En avançant, une page précédente existe dès qu'on est parti d'un curseur; en reculant,
+    # la page suivante existe toujours (on en vient), sauf pour la première page depuis la fin
+    a_suivante = encore if sens == 'suivant' else bool(curseur)
+    a_precedente = bool(curseur) if sens == 'suivant' else encore
+    return {
+        'lignes': lignes,
+        'curseur_suivant': _encoder_curseur(lignes[-1], 'suivant', filtres) if lignes and a_suivante else None,
+        'curseur_precedent': _encoder_curseur(lignes[0], 'precedent', filtres) if lignes and a_precedente else None,
+    }
+
+
+def paginer_historique_equipement(equipement_id, taille_page=TAILLE_PAGE_DEFAUT, curseur=None, depuis_la_fin=False):
+    #Historique d'un équipement page par page, archives comprises (voir paginer_interventions)
+    #depuis_la_fin: sans curseur, la première page est celle des plus anciennes interventions,
+    #les suivantes (plus récentes) sont lues avec curseur_precedent
+    return _paginer(taille_page, curseur, {'equipement_id': equipement_id}, depuis_la_fin=depuis_la_fin)
+
+
+# RECHERCHE (sélecteurs d'équipement et de technicien)
+# Les colonnes cherchées ont un index COLLATE NOCASE: "texte%" est une recherche par intervalle
+# dans ces index; la recherche "%texte%" (parcours) ne sert qu'à compléter les résultats.
+def _motif_like(texte):
+    #Échappe les jokers de LIKE (% et _) dans un texte saisi
+    return texte.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _rechercher(table, colonnes, colonnes_recherche, tri, texte, limite):
+    #Lignes dont une colonne de colonnes_recherche commence par texte (ordre de tri),
+    #complétées par celles qui le contiennent; au plus limite lignes
+    texte = (texte or "").strip()
+    ordre = ", ".join(f"{col} COLLATE NOCASE" for col in tri) + ", id"
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        if not texte:
+            cursor.execute(f"SELECT {colonnes} FROM {table} ORDER BY {ordre} LIMIT ?", (limite,))
+            return [dict(row) for row in cursor.fetchall()]
+
+        condition = " OR ".join(f"{col} LIKE ? ESCAPE '\\'" for col in colonnes_recherche)
+        prefixe = [_motif_like(texte) + "%"] * len(colonnes_recherche)
+        cursor.execute(f"""
+            SELECT {colonnes} FROM {table}
+            WHERE {condition}
+            ORDER BY {ordre}
+            LIMIT ?
+        """, (*prefixe, limite))
+        lignes = [dict(row) for row in cursor.fetchall()]
+
+        if len(lignes) < limite:
+            contient = ["%" + _motif_like(texte) + "%"] * len(colonnes_recherche)
+            cursor.execute(f"""
+                SELECT {colonnes} FROM {table}
+                WHERE ({condition}) AND NOT ({condition})
+                ORDER BY {ordre}
+                LIMIT ?
+            """, (*contient, *prefixe, limite - len(lignes)))
+            lignes.extend(dict(row) for row in cursor.fetchall())
+        return lignes
+
+
+def rechercher_equipements(texte, limite=LIMITE_RECHERCHE_DEFAUT):
+    #Équipements dont le nom, le numéro de série ou la localisation commence par (puis contient) texte
+    return _rechercher("equipements", "id, nom, type, numero_serie, localisation, statut",
+                       ('nom', 'numero_serie', 'localisation'), ('nom',), texte, limite)
+
+
+def rechercher_techniciens(texte, limite=LIMITE_RECHERCHE_DEFAUT):
+    #Techniciens dont le nom, le prénom ou l'email commence par (puis contient) texte
+    return _rechercher("techniciens", "id, nom, prenom, specialite, email",
+                       ('nom', 'prenom', 'email'), ('nom', 'prenom'), texte, limite)
+
+
+def _requete_plein_texte(texte):
+    #Requête FTS5 à partir d'un texte saisi: chaque mot est un préfixe ("hydrau" trouve
+    #"hydraulique") et tous les mots doivent être présents; la syntaxe FTS5 n'est pas interprétée
+    mots = re.findall(r"\w+", texte or "")
+    return " ".join(f'"{mot}"*' for mot in mots)
+
+
+def rechercher_interventions(texte, date_debut=None, date_fin=None, type_equipement=None,
+                             type_intervention=None, limite=LIMITE_RECHERCHE_TEXTE, decalage=0,
+                             marques=MARQUES_EXTRAIT):
+    #Interventions dont la description contient les mots de texte, les plus pertinentes d'abord (bm25)
+    #Filtres facultatifs: période [date_debut, date_fin[, type d'équipement, type d'intervention
+    #extrait: passage de la description avec les termes trouvés entre marques
+    requete = _requete_plein_texte(texte)
+    if not requete:
+        return []
+    if type_equipement is not None and type_equipement not in TYPES_EQUIPEMENT:
+        raise ValueError(f"Type d'équipement inconnu: {type_equipement}")
+    if type_intervention is not None and type_intervention not in TYPES_INTERVENTION:
+        raise ValueError(f"Type d'intervention inconnu: {type_intervention}")
+
+    conditions = ["interventions_fts MATCH ?"]
+    parametres = [requete]
+    for condition, valeur in (("i.date_intervention >= ?", date_debut),
+                              ("i.date_intervention < ?", date_fin),
+                              ("e.type = ?", type_equipement),
+                              ("i.type_intervention = ?", type_intervention)):
+        if valeur is not None:
+            conditions.append(condition)
+            parametres.append(valeur)
+
+    # Table par table (voir _lire_historique): une jointure sur la vue interventions_historique
+    # la matérialiserait. Les archives hors de la période ne sont pas lues. Avec ORDER BY ...
+    # LIMIT, SQLite ne calcule l'extrait que des lignes qui peuvent entrer dans la page.
+    sql = f"""
+        SELECT i.id,
+               i.date_intervention,
                i.type_intervention,
                i.description,
                i.duree_minutes,
                i.cout,
                i.statut,
-               t.nom || ' ' || t.prenom as technicien
-        FROM interventions i
-        INNER JOIN techniciens t ON i.technicien_id = t.id
-        WHERE i.equipement_id = ?
-        ORDER BY i.date_intervention DESC
-    """, (equipement_id,))
-    return [dict(row) for row in cursor.fetchall()]
+               e.id as equipement_id,
+               e.nom as equipement,
+               e.type as equipement_type,
+               t.prenom || ' ' || t.nom as technicien,
+               snippet(interventions_fts, 0, ?, ?, '…', 12) as extrait,
+               bm25(interventions_fts) as score
+        FROM interventions_fts
+        JOIN {{table}} i ON i.id = interventions_fts.rowid
+        JOIN equipements e ON e.id = i.equipement_id
+        JOIN techniciens t ON t.id = i.technicien_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY score, i.date_intervention DESC, i.id DESC
+        LIMIT ?
+    """
+
+    def trier(lignes):
+        lignes.sort(key=lambda ligne: (ligne['date_intervention'], ligne['id']), reverse=True)
+        lignes.sort(key=lambda ligne: ligne['score'])
+        return lignes
+
+    with connexion_lecture() as conn:
+        tables = _tables_periode(_tables_historique(conn), date_debut, date_fin)
+        lignes = _lire_historique(conn, tables, sql, (*marques, *parametres), decalage + limite, trier)
+    return lignes[decalage:]
+
+
+def iterer_interventions_completes(taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Parcourt les interventions terminées avec détails, par paquets (calculs Python en une passe)
+    #Interventions courantes et archivées: mêmes totaux que stats_equipement (mode 'sql')
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT i.*,
+                   e.nom as equipement_nom,
+                   e.type as equipement_type
+            FROM interventions_historique i
+            INNER JOIN equipements e ON i.equipement_id = e.id
+            WHERE i.statut = 'terminee'
+            ORDER BY i.date_intervention
+        """)
+        yield from _iterer_lignes(cursor, taille_chunk)
 
 
 def obtenir_interventions_completes():
     #Toutes les interventions avec détails (pour les calculs Python).
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT i.*,
-               e.nom as equipement_nom,
-               e.type as equipement_type
-        FROM interventions i
-        INNER JOIN equipements e ON i.equipement_id = e.id
-        WHERE i.statut = 'terminee'
-        ORDER BY i.date_intervention
-    """)
-    return [dict(row) for row in cursor.fetchall()]
+    return list(iterer_interventions_completes())
+
+
+def iterer_paquets_interventions_detaillees(taille_chunk=TAILLE_CHUNK_EXPORT):
+    #Parcourt toutes les interventions (courantes et archivées) avec équipement et technicien,
+    #par paquets de tuples dans l'ordre de COLONNES_INTERVENTIONS_DETAILLEES (export)
+    #Pas d'ORDER BY (un tri de toute la table passerait par un B-tree temporaire) et CROSS JOIN:
+    #les interventions sont lues dans l'ordre de la table, équipement et technicien par clé primaire
+    colonnes = ", ".join(f"{expression} as {nom}" for nom, expression in COLONNES_INTERVENTIONS_DETAILLEES.items())
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f"""
+            SELECT {colonnes}
+            FROM interventions_historique i
+            CROSS JOIN equipements e ON e.id = i.equipement_id
+            CROSS JOIN techniciens t ON t.id = i.technicien_id
+        """)
+        while True:
+            rows = cursor.fetchmany(taille_chunk)
+            if not rows:
+                break
+            yield rows
 
 
 # FONCTIONS D'INSERTION 
+@invalide_cache
 def ajouter_technicien(nom, prenom, specialite, email, date_embauche):
     #Ajoute un nouveau technicien
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    try:
+    with connexion_ecriture() as conn:
+        cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO techniciens (nom, prenom, specialite, email, date_embauche)
             VALUES (?, ?, ?, ?, ?)
         """, (nom, prenom, specialite, email, date_embauche))
-        conn.commit()
         return cursor.lastrowid
-    except Exception as e:
-        conn.rollback()
-        raise e
 
 
+@invalide_cache
 def ajouter_equipement(nom, type_eq, marque, modele, numero_serie, date_acquisition, localisation, statut='actif'):
     #Ajoute un nouvel équipement
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    try:
+    with connexion_ecriture() as conn:
+        cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO equipements (nom, type, marque, modele, numero_serie, date_acquisition, localisation, statut)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (nom, type_eq, marque, modele, numero_serie, date_acquisition, localisation, statut))
-        conn.commit()
         return cursor.lastrowid
-    except Exception as e:
-        conn.rollback()
-        raise e
 
 
+@invalide_cache
 def ajouter_intervention(equipement_id, technicien_id, date_intervention, type_intervention,
                         description, duree_minutes, cout, statut='terminee'):
     #Ajoute une nouvelle intervention
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    try:
+    with connexion_ecriture() as conn:
+        cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO interventions (equipement_id, technicien_id, date_intervention,
                                       type_intervention, description, duree_minutes, cout, statut)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (equipement_id, technicien_id, date_intervention, type_intervention,
               description, duree_minutes, cout, statut))
-        conn.commit()
         return cursor.lastrowid
-    except Exception as e:
-        conn.rollback()
-        raise e
+
+
+def iterer_tous_techniciens(taille_chunk=TAILLE_CHUNK_DEFAUT):
+    #Parcourt tous les techniciens par paquets
+    with connexion_lecture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM techniciens ORDER BY nom, prenom")
+        yield from _iterer_lignes(cursor, taille_chunk)
+
+
+@invalide_cache
+def ajouter_regle_alerte(code, indicateur, operateur, seuil, niveau, message, ordre=0, actif=1):
+    #Ajoute une règle d'alerte (message: modèle avec {valeur})
+    with connexion_ecriture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO regles_alerte (code, indicateur, operateur, seuil, niveau, message, ordre, actif)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (code, indicateur, operateur, seuil, niveau, message, ordre, actif))
+        return cursor.lastrowid
+
+
+@invalide_cache
+def modifier_regle_alerte(code, seuil=None, actif=None):
+    #Change le seuil et/ou active/désactive une règle
+    with connexion_ecriture() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE regles_alerte
+            SET seuil = COALESCE(?, seuil),
+                actif = COALESCE(?, actif)
+            WHERE code = ?
+        """, (seuil, actif, code))
+        return cursor.rowcount
+
+
+@invalide_cache
+def reconstruire_stats_equipement():
+    #Recalcule entièrement stats_equipement depuis interventions et les agrégats des archives
+    #(après un import hors application...)
+    with connexion_ecriture() as conn:
+        conn.execute("DELETE FROM stats_equipement")
+        cursor = conn.execute("""
+            INSERT INTO stats_equipement (equipement_id, statut, nb_interventions, nb_correctives,
+                                          cout_total, duree_totale, derniere_intervention)
+            SELECT equipement_id, statut, SUM(nb_interventions), SUM(nb_correctives),
+                   SUM(cout_total), SUM(duree_totale), MAX(derniere_intervention)
+            FROM (
+                SELECT equipement_id, statut, COUNT(*) as nb_interventions,
+                       SUM(CASE WHEN type_intervention = 'corrective' THEN 1 ELSE 0 END) as nb_correctives,
+                       SUM(cout) as cout_total, SUM(duree_minutes) as duree_totale,
+                       MAX(date_intervention) as derniere_intervention
+                FROM interventions
+                GROUP BY equipement_id, statut
+                UNION ALL
+                -- Interventions archivées (archivage.py)
+                SELECT equipement_id, statut, nb_interventions, nb_correctives, cout_total,
+                       duree_totale, derniere_intervention
+                FROM agregats_archives_equipement
+            )
+            GROUP BY equipement_id, statut
+        """)
+        rowcount = cursor.rowcount
+        # Les modifications faites hors application n'ont pas été journalisées
+        reinitialiser_scores_fiabilite()
+        return rowcount
+
+
+def rafraichir_scores_fiabilite(date_reference, calculer_indice, plages_balayage):
+    #Met à jour scores_fiabilite pour la date_reference (YYYY-MM-DD), en une transaction
+    #Recalcule les équipements du journal_modifications postérieurs au dernier rafraîchissement,
+    #plus ceux dont date_acquisition est dans une des plages (debut, fin) retournées par
+    #plages_balayage(date_precedente, date_reference) si la date a changé; tout au premier appel.
+    #calculer_indice(ligne) donne l'indice d'une ligne de SQL_AGREGATS_FIABILITE.
+    with connexion_ecriture() as conn:
+        etat = conn.execute("SELECT dernier_journal, date_reference FROM scores_fiabilite_etat").fetchone()
+        # Filigrane: les entrées du journal au-delà seront traitées au prochain rafraîchissement
+        filigrane = conn.execute("SELECT MAX(id) FROM journal_modifications").fetchone()[0]
+        if filigrane is None:
+            # Journal vide (déjà purgé): le filigrane ne bouge pas
+            filigrane = etat['dernier_journal'] if etat else 0
+
+        if etat is None:
+            conn.execute("DELETE FROM scores_fiabilite")
+            selection, parametres = "", ()
+        else:
+            a_recalculer = "SELECT equipement_id FROM journal_modifications WHERE id > ? AND id <= ?"
+            parametres = (etat['dernier_journal'], filigrane)
+            if etat['date_reference'] != date_reference:
+                plages = plages_balayage(etat['date_reference'], date_reference)
+                if plages:
+                    a_recalculer += " UNION SELECT id FROM equipements WHERE " + " OR ".join(
+                        "date_acquisition BETWEEN ? AND ?" for _ in plages)
+                    parametres += tuple(borne for plage in plages for borne in plage)
+            conn.execute(f"DELETE FROM scores_fiabilite WHERE equipement_id IN ({a_recalculer})", parametres)
+            selection = f"WHERE e.id IN ({a_recalculer})"
+
+        cursor = conn.execute(SQL_AGREGATS_FIABILITE + selection, parametres)
+        lignes = [
+            (row['id'], row['nom'], row['type'], row['date_acquisition'], row['nb_pannes'],
+             row['cout_total'], calculer_indice(row))
+            for row in cursor
+        ]
+        conn.executemany("""
+            INSERT INTO scores_fiabilite (equipement_id, nom, type, date_acquisition,
+                                          nb_pannes, cout_total, indice_fiabilite)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, lignes)
+
+        conn.execute("DELETE FROM journal_modifications WHERE id <= ?", (filigrane,))
+        conn.execute("""
+            INSERT OR REPLACE INTO scores_fiabilite_etat (id, dernier_journal, date_reference)
+            VALUES (1, ?, ?)
+        """, (filigrane, date_reference))
+        return {'complet': etat is None, 'recalcules': len(lignes)}
+
+
+def reinitialiser_scores_fiabilite():
+    #Oublie les scores persistants: le prochain rafraîchissement recalcule tout
+    with connexion_ecriture() as conn:
+        conn.execute("DELETE FROM scores_fiabilite_etat")
+        conn.execute("DELETE FROM journal_modifications")
 
 
 def obtenir_tous_techniciens():
     #Retourne tous les techniciens
-    conn = obtenir_connexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM techniciens ORDER BY nom, prenom")
-    return [dict(row) for row in cursor.fetchall()]
+    return list(iterer_tous_techniciens())
+
+
+# INSERTION EN MASSE
+def _valeurs_ligne(ligne, colonnes, defauts):
+    #Transforme une ligne (dict ou séquence dans l'ordre des colonnes) en dict
+    if isinstance(ligne, dict):
+        valeurs = {col: ligne.get(col, defauts.get(col)) for col in colonnes}
+    else:
+        ligne = list(ligne)
+        if len(ligne) > len(colonnes):
+            raise ValueError(f"{len(ligne)} valeurs pour {len(colonnes)} colonnes")
+        valeurs = dict(defauts)
+        valeurs.update(zip(colonnes, ligne))
+        for col in colonnes:
+            valeurs.setdefault(col, None)
+
+    # Les chaînes vides sont traitées comme des valeurs absentes
+    for col, valeur in valeurs.items():
+        if isinstance(valeur, str):
+            valeur = valeur.strip()
+            valeurs[col] = valeur if valeur else defauts.get(col)
+    return valeurs
+
+
+def _verifier_date(valeurs, col, erreurs):
+    #Vérifie le format YYYY-MM-DD d'une date obligatoire
+    if not valeurs[col]:
+        erreurs.append(f"{col} obligatoire")
+        return
+    try:
+        datetime.strptime(str(valeurs[col]), '%Y-%m-%d')
+    except ValueError:
+        erreurs.append(f"{col} invalide (YYYY-MM-DD): {valeurs[col]}")
+
+
+def _verifier_obligatoires(valeurs, colonnes, erreurs):
+    for col in colonnes:
+        if valeurs[col] is None:
+            erreurs.append(f"{col} obligatoire")
+
+
+def preparer_technicien(ligne):
+    #Valide une ligne technicien et retourne le tuple à insérer (ValueError sinon)
+    valeurs = _valeurs_ligne(ligne, COLONNES_TECHNICIEN, {})
+    erreurs = []
+    _verifier_obligatoires(valeurs, ('nom', 'prenom', 'specialite', 'email'), erreurs)
+    if valeurs['email'] and '@' not in valeurs['email']:
+        erreurs.append(f"email invalide: {valeurs['email']}")
+    _verifier_date(valeurs, 'date_embauche', erreurs)
+
+    if erreurs:
+        raise ValueError("; ".join(erreurs))
+    return tuple(valeurs[col] for col in COLONNES_TECHNICIEN)
+
+
+def preparer_equipement(ligne):
+    #Valide une ligne équipement et retourne le tuple à insérer (ValueError sinon)
+    valeurs = _valeurs_ligne(ligne, COLONNES_EQUIPEMENT, {'statut': 'actif'})
+    erreurs = []
+    _verifier_obligatoires(valeurs, ('nom', 'numero_serie', 'localisation'), erreurs)
+    if valeurs['type'] not in TYPES_EQUIPEMENT:
+        erreurs.append(f"type invalide: {valeurs['type']}")
+    if valeurs['statut'] not in STATUTS_EQUIPEMENT:
+        erreurs.append(f"statut invalide: {valeurs['statut']}")
+    _verifier_date(valeurs, 'date_acquisition', erreurs)
+
+    if erreurs:
+        raise ValueError("; ".join(erreurs))
+    return tuple(valeurs[col] for col in COLONNES_EQUIPEMENT)
+
+
+def charger_correspondances_cles():
+    #Charge une fois les tables de correspondance clé naturelle -> ID (voir CLES_NATURELLES_INTERVENTION)
+    #Clés en minuscules; une clé présente deux fois à la casse près correspond à None (ambiguë)
+    correspondances = {}
+    with connexion_lecture() as conn:
+        for col, (_, table, colonne_table) in CLES_NATURELLES_INTERVENTION.items():
+            ids = {}
+            for cle, id_ligne in conn.execute(f"SELECT {colonne_table}, id FROM {table}"):
+                cle = cle.lower()
+                ids[cle] = None if cle in ids else id_ligne
+            correspondances[col] = ids
+    return correspondances
+
+
+def _resoudre_cles_naturelles(ligne, valeurs, correspondances, erreurs):
+    #Remplace un ID absent par celui de sa clé naturelle (numero_serie, email_technicien)
+    #Retourne les colonnes dont la clé naturelle n'a pas été trouvée
+    non_resolues = set()
+    for col, (colonne_ligne, _, _) in CLES_NATURELLES_INTERVENTION.items():
+        if valeurs[col] is not None or col not in correspondances:
+            continue
+        cle = ligne.get(colonne_ligne)
+        cle = cle.strip() if isinstance(cle, str) else cle
+        if not cle:
+            continue
+        ids = correspondances[col]
+        if cle.lower() not in ids:
+            erreurs.append(f"{colonne_ligne} inconnu: {cle}")
+            non_resolues.add(col)
+        elif ids[cle.lower()] is None:
+            erreurs.append(f"{colonne_ligne} ambigu: {cle}")
+            non_resolues.add(col)
+        else:
+            valeurs[col] = ids[cle.lower()]
+    return non_resolues
+
+
+def preparer_intervention(ligne, equipements_connus=None, techniciens_connus=None, correspondances=None):
+    #Valide une ligne intervention et retourne le tuple à insérer (ValueError sinon)
+    #equipements_connus / techniciens_connus : ensembles d'IDs pour vérifier les clés étrangères
+    #correspondances : tables de charger_correspondances_cles(), pour les lignes (dicts) qui donnent
+    #numero_serie / email_technicien au lieu de equipement_id / technicien_id
+    valeurs = _valeurs_ligne(ligne, COLONNES_INTERVENTION, {'statut': 'terminee'})
+    erreurs = []
+    non_resolues = set()
+    if correspondances and isinstance(ligne, dict):
+        non_resolues = _resoudre_cles_naturelles(ligne, valeurs, correspondances, erreurs)
+
+    for col, connus in (('equipement_id', equipements_connus), ('technicien_id', techniciens_connus)):
+        if col in non_resolues:
+            # Déjà signalée par sa clé naturelle
+            continue
+        try:
+            valeurs[col] = int(valeurs[col])
+        except (TypeError, ValueError):
+            erreurs.append(f"{col} invalide: {valeurs[col]}")
+            continue
+        if connus is not None and valeurs[col] not in connus:
+            erreurs.append(f"{col} inconnu: {valeurs[col]}")
+
+    _verifier_date(valeurs, 'date_intervention', erreurs)
+    if valeurs['type_intervention'] not in TYPES_INTERVENTION:
+        erreurs.append(f"type_intervention invalide: {valeurs['type_intervention']}")
+    if valeurs['statut'] not in STATUTS_INTERVENTION:
+        erreurs.append(f"statut invalide: {valeurs['statut']}")
+    if not valeurs['description']:
+        erreurs.append("description obligatoire")
+
+    try:
+        valeurs['duree_minutes'] = int(valeurs['duree_minutes'])
+        if valeurs['duree_minutes'] <= 0:
+            erreurs.append("duree_minutes doit être > 0")
+    except (TypeError, ValueError):
+        erreurs.append(f"duree_minutes invalide: {valeurs['duree_minutes']}")
+
+    try:
+        valeurs['cout'] = float(valeurs['cout'])
+        if valeurs['cout'] < 0:
+            erreurs.append("cout doit être >= 0")
+    except (TypeError, ValueError):
+        erreurs.append(f"cout invalide: {valeurs['cout']}")
+
+    if erreurs:
+        raise ValueError("; ".join(erreurs))
+    return tuple(valeurs[col] for col in COLONNES_INTERVENTION)
+
+
+def _ecrire_lot(sql, lot, numero_lot):
+    #Insère un lot dans une seule transaction.
+    #Si une contrainte de la base échoue (UNIQUE...), le lot est rejoué ligne par ligne
+    #pour n'écarter que les lignes fautives.
+    inseres = 0
+    rejets = []
+
+    try:
+        with connexion_ecriture() as conn:
+            conn.executemany(sql, [valeurs for _, valeurs in lot])
+        inseres = len(lot)
+    except sqlite3.IntegrityError:
+        # Le lot a été annulé: on le rejoue ligne par ligne dans une nouvelle transaction
+        with connexion_ecriture() as conn:
+            for numero, valeurs in lot:
+                try:
+                    conn.execute(sql, valeurs)
+                    inseres += 1
+                except sqlite3.IntegrityError as e:
+                    rejets.append({'lot': numero_lot, 'ligne': numero, 'valeurs': valeurs, 'raison': str(e)})
+
+    return inseres, rejets
+
+
+def _inserer_en_masse(sql, lignes, preparer, taille_lot, au_rejet=None, au_lot=None):
+    #Valide puis insère les lignes par lots de taille_lot (une transaction par lot)
+    #au_rejet(rejet) : reçoit les rejets à la fin de chaque lot au lieu de les garder dans
+    #resultat['rejets'] (mémoire constante pour les gros fichiers)
+    #au_lot(bilan) : appelé après chaque lot avec {'lot', 'inseres', 'rejetes'}
+    if taille_lot < 1:
+        raise ValueError("taille_lot doit être >= 1")
+
+    resultat = {'inseres': 0, 'rejets': [], 'lots': []}
+    lot = []
+    rejets_lot = []
+
+    def terminer_lot():
+        numero_lot = len(resultat['lots']) + 1
+        inseres, rejets = _ecrire_lot(sql, lot, numero_lot) if lot else (0, [])
+        for rejet in rejets_lot:
+            rejet['lot'] = numero_lot
+        bilan = {'lot': numero_lot, 'inseres': inseres, 'rejetes': len(rejets) + len(rejets_lot)}
+        resultat['inseres'] += inseres
+        resultat['lots'].append(bilan)
+        for rejet in rejets_lot + rejets:
+            if au_rejet is None:
+                resultat['rejets'].append(rejet)
+            else:
+                au_rejet(rejet)
+        if au_lot is not None:
+            au_lot(bilan)
+
+    for numero, ligne in enumerate(lignes, 1):
+        try:
+            lot.append((numero, preparer(ligne)))
+        except (ValueError, TypeError) as e:
+            rejets_lot.append({'lot': None, 'ligne': numero, 'valeurs': ligne, 'raison': str(e)})
+
+        if len(lot) + len(rejets_lot) >= taille_lot:
+            terminer_lot()
+            lot = []
+            rejets_lot = []
+
+    if lot or rejets_lot:
+        terminer_lot()
+
+    return resultat
+
+
+@invalide_cache
+def ajouter_techniciens_en_masse(lignes, taille_lot=TAILLE_LOT_DEFAUT, au_rejet=None, au_lot=None):
+    #Insère un itérable de techniciens (dicts ou tuples dans l'ordre de COLONNES_TECHNICIEN)
+    #Retourne {'inseres': n, 'rejets': [...], 'lots': [...]} (au_rejet, au_lot : voir _inserer_en_masse)
+    return _inserer_en_masse("""
+        INSERT INTO techniciens (nom, prenom, specialite, email, date_embauche)
+        VALUES (?, ?, ?, ?, ?)
+    """, lignes, preparer_technicien, taille_lot, au_rejet, au_lot)
+
+
+@invalide_cache
+def ajouter_equipements_en_masse(lignes, taille_lot=TAILLE_LOT_DEFAUT, au_rejet=None, au_lot=None):
+    #Insère un itérable d'équipements (dicts ou tuples dans l'ordre de COLONNES_EQUIPEMENT)
+    return _inserer_en_masse("""
+        INSERT INTO equipements (nom, type, marque, modele, numero_serie, date_acquisition, localisation, statut)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, lignes, preparer_equipement, taille_lot, au_rejet, au_lot)
+
+
+@invalide_cache
+def ajouter_interventions_en_masse(lignes, taille_lot=TAILLE_LOT_DEFAUT, au_rejet=None, au_lot=None,
+                                   cles_naturelles=False):
+    #Insère un itérable d'interventions (dicts ou tuples dans l'ordre de COLONNES_INTERVENTION)
+    #Les IDs d'équipements et de techniciens sont chargés une fois pour vérifier les clés étrangères
+    #cles_naturelles=True : les dicts peuvent donner numero_serie / email_technicien à la place des IDs
+    with connexion_lecture() as conn:
+        equipements_connus = {row[0] for row in conn.execute("SELECT id FROM equipements")}
+        techniciens_connus = {row[0] for row in conn.execute("SELECT id FROM techniciens")}
+    correspondances = charger_correspondances_cles() if cles_naturelles else None
+
+    def preparer(ligne):
+        return preparer_intervention(ligne, equipements_connus, techniciens_connus, correspondances)
+
+    return _inserer_en_masse("""
+        INSERT INTO interventions (equipement_id, technicien_id, date_intervention,
+                                  type_intervention, description, duree_minutes, cout, statut)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, lignes, preparer, taille_lot, au_rejet, au_lot)
+
+
+if __name__ == "__main__":
+    # Contrôle des plans d'exécution: python data_access.py [annee]
+    import sys
+    from db_connection import fermer_connexion, mettre_a_jour_schema
+
+    mettre_a_jour_schema()
+    for verification in verifier_plans_index(sys.argv[1] if len(sys.argv) > 1 else 2024):
+        etat = "OK " if verification['index_utilise'] else "KO "
+        print(f"  [{etat}] {verification['requete']}")
+        for ligne in verification['plan']:
+            print(f"          {ligne}")
+    fermer_connexion()
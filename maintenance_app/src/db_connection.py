@@ -1,32 +1,469 @@
+import itertools
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+import profilage
+
 
 # Chemin vers la base de données
 DATABASE_PATH = Path(__file__).parent.parent / "database" / "maintenance.db"
 SCHEMA_PATH = Path(__file__).parent.parent / "database" / "schema.sql"
 
-# Connexion globale (plus simple qu'un Singleton)
-connexion = None
+# Début de la partie idempotente de schema.sql (rejouée sur les bases existantes)
+MARQUEUR_EVOLUTIONS = "-- ========== EVOLUTIONS =========="
+
+# Colonnes calculées de schema.sql à ajouter aux bases créées avant leur apparition
+# (ALTER TABLE n'a pas de "IF NOT EXISTS")
+COLONNES_GENEREES = {
+    'interventions': [
+        ('annee', "INTEGER GENERATED ALWAYS AS (CAST(substr(date_intervention, 1, 4) AS INTEGER)) VIRTUAL"),
+        ('mois', "TEXT GENERATED ALWAYS AS (substr(date_intervention, 6, 2)) VIRTUAL"),
+        ('annee_mois', "TEXT GENERATED ALWAYS AS (substr(date_intervention, 1, 7)) VIRTUAL"),
+    ],
+}
+
+# Objets de schema.sql dont la définition a changé: {nom: (type, extrait de l'ancienne
+# définition)}. Un objet trouvé avec l'ancienne définition est supprimé, puis recréé (et rempli)
+# par les évolutions du schéma (ni CREATE VIRTUAL TABLE ni CREATE TRIGGER n'ont d'ALTER)
+DEFINITIONS_PERIMEES = {
+    'interventions_fts': ('table', "content='interventions'"),
+    # derniere_intervention recalculée sans les interventions archivées
+    'trg_stats_equipement_delete': ('trigger', "(SELECT MAX(date_intervention) FROM interventions"),
+    'trg_stats_equipement_update': ('trigger', "(SELECT MAX(date_intervention) FROM interventions"),
+}
+
+# Préfixe des tables d'archive annuelles (archivage.py), absentes de schema.sql
+PREFIXE_TABLES_ARCHIVE = "archive_interventions_"
+
+# Variable d'environnement pour choisir le profil de connexion
+VARIABLE_PROFIL = "MAINTENANCE_PROFIL"
+
+# Profils de connexion: PRAGMA appliqués à l'ouverture
+# cache_size négatif = taille en Kio, mmap_size en octets, wal_autocheckpoint en pages,
+# cached_statements = cache de requêtes préparées
+# Le journal WAL (lectures du pool pendant une écriture) est commun à tous les profils.
+# synchronous FULL: un commit terminé survit à une coupure de courant (comme avant les profils)
+PROFILS_CONNEXION = {
+    # Usage courant (CLI, GUI)
+    'defaut': {
+        'journal_mode': 'wal',
+        'synchronous': 'full',
+        'cache_size': -8000,
+        'mmap_size': 0,
+        'temp_store': 'default',
+        'wal_autocheckpoint': 1000,
+        'cached_statements': 128,
+    },
+    # Tableaux de bord et rapports: gros cache, lecture via mmap, tris en mémoire
+    'lecture_intensive': {
+        'journal_mode': 'wal',
+        'synchronous': 'full',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'memory',
+        'wal_autocheckpoint': 1000,
+        'cached_statements': 256,
+    },
+    # Imports en masse: synchronous NORMAL (pas de fsync à chaque commit: les derniers lots
+    # peuvent être perdus sur coupure de courant, la base reste cohérente), gros cache et
+    # checkpoints espacés (le WAL grandit jusqu'à ~40 Mo avant d'être recopié dans la base)
+    'ecriture_intensive': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'cache_size': -128000,
+        'mmap_size': 0,
+        'temp_store': 'memory',
+        'wal_autocheckpoint': 10000,
+        'cached_statements': 64,
+    },
+}
+
+# Valeurs textuelles acceptées pour chaque PRAGMA (les autres sont des entiers)
+_VALEURS_PRAGMAS = {
+    'journal_mode': ('delete', 'truncate', 'persist', 'memory', 'wal', 'off'),
+    'synchronous': ('off', 'normal', 'full', 'extra'),
+    'temp_store': ('default', 'file', 'memory'),
+}
+
+# Nombre maximum de connexions de lecture ouvertes en même temps
+TAILLE_POOL_LECTURE = 4
+# Attente maximale (secondes) d'une connexion de lecture libre
+DELAI_ATTENTE_POOL = 30
+
+# Pool global, créé à la première utilisation
+pool = None
+# Numérotation des pools (un nouveau pool peut pointer vers une autre base)
+_numeros_pool = itertools.count(1)
+
+
+def choisir_profil(profil=None):
+    """Retourne le nom du profil: argument, sinon variable d'environnement, sinon 'defaut'."""
+    nom = profil or os.environ.get(VARIABLE_PROFIL) or 'defaut'
+    if nom not in PROFILS_CONNEXION:
+        raise ValueError(f"Profil de connexion inconnu: {nom} "
+                         f"(profils disponibles: {', '.join(PROFILS_CONNEXION)})")
+    return nom
+
+
+def appliquer_profil(conn, profil):
+    """Applique les PRAGMA d'un profil sur une connexion ouverte."""
+    reglages = PROFILS_CONNEXION[choisir_profil(profil)]
+
+    for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store',
+                   'wal_autocheckpoint'):
+        valeur = reglages[pragma]
+        # Les PRAGMA n'acceptent pas de paramètres "?": on n'insère que des valeurs contrôlées
+        if pragma in _VALEURS_PRAGMAS:
+            if valeur not in _VALEURS_PRAGMAS[pragma]:
+                raise ValueError(f"Valeur invalide pour {pragma}: {valeur}")
+        else:
+            valeur = int(valeur)
+        conn.execute(f"PRAGMA {pragma} = {valeur}")
+
+
+def _ouvrir_connexion(profil, lecture_seule=False):
+    """Ouvre une nouvelle connexion configurée selon le profil."""
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        cached_statements=PROFILS_CONNEXION[profil]['cached_statements'],
+        check_same_thread=False,  # Le pool garantit qu'un seul thread l'utilise à la fois
+        timeout=DELAI_ATTENTE_POOL,
+        factory=profilage.fabrique_connexion()  # Connexion instrumentée si le profilage est actif
+    )
+    conn.row_factory = sqlite3.Row  # Pour avoir des dictionnaires
+    appliquer_profil(conn, profil)
+    if lecture_seule:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def _connexion_valide(conn):
+    """Vérifie qu'une connexion répond encore."""
+    try:
+        conn.execute("SELECT 1").fetchone()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+class PoolConnexions:
+    """Pool de connexions: plusieurs lecteurs en parallèle, un seul écrivain.
+
+    Un thread qui emprunte déjà une connexion de lecture retrouve la même dans les appels
+    imbriqués. Les écritures passent toutes par la même connexion, protégée par un verrou.
+    """
+
+    def __init__(self, profil=None, taille_max=TAILLE_POOL_LECTURE):
+        if taille_max < 1:
+            raise ValueError("taille_max doit être >= 1")
+        self.profil = choisir_profil(profil)
+        self.taille_max = taille_max
+        self._libres = []
+        self._nb_lecteurs = 0
+        self._actives = {}  # Connexion de lecture empruntée par chaque thread
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._ecrivain = None
+        self._verrou_ecriture = threading.RLock()
+        self._profondeur_ecriture = 0
+        self._ferme = False
+        self.numero = next(_numeros_pool)
+        self._sentinelle = None
+        self._verrou_sentinelle = threading.Lock()
+
+    def _emprunter(self):
+        with self._condition:
+            while True:
+                if self._ferme:
+                    raise sqlite3.ProgrammingError("Pool de connexions fermé")
+                if self._libres:
+                    conn = self._libres.pop()
+                    break
+                if self._nb_lecteurs < self.taille_max:
+                    self._nb_lecteurs += 1
+                    conn = None
+                    break
+                if not self._condition.wait(DELAI_ATTENTE_POOL):
+                    raise TimeoutError("Aucune connexion de lecture disponible")
+
+        try:
+            if conn is not None and not _connexion_valide(conn):
+                conn.close()
+                conn = None
+            if conn is None:
+                conn = _ouvrir_connexion(self.profil, lecture_seule=True)
+            return conn
+        except Exception as e:
+            with self._condition:
+                self._nb_lecteurs -= 1
+                self._condition.notify()
+            raise e
+
+    def _rendre(self, conn):
+        with self._condition:
+            self._actives.pop(threading.get_ident(), None)
+        if conn.in_transaction:
+            conn.rollback()
+        with self._condition:
+            if self._ferme:
+                conn.close()
+                self._nb_lecteurs -= 1
+            else:
+                self._libres.append(conn)
+            self._condition.notify()
+
+    @contextmanager
+    def lecture(self):
+        """Emprunte une connexion de lecture (PRAGMA query_only) le temps du bloc."""
+        local = self._local
+        if getattr(local, 'profondeur', 0) == 0:
+            local.conn = self._emprunter()
+            with self._condition:
+                self._actives[threading.get_ident()] = local.conn
+        local.profondeur = getattr(local, 'profondeur', 0) + 1
+        conn = local.conn
+        try:
+            yield conn
+        finally:
+            local.profondeur -= 1
+            if local.profondeur == 0:
+                local.conn = None
+                self._rendre(conn)
+
+    def lecture_en_cours(self):
+        """Indique si le thread courant a déjà emprunté une connexion de lecture."""
+        return getattr(self._local, 'profondeur', 0) > 0
+
+    def interrompre_lecture(self, thread_id):
+        """Interrompt la requête en cours sur la connexion de lecture d'un thread.
+
+        La requête interrompue lève sqlite3.OperationalError dans ce thread.
+        """
+        with self._condition:
+            conn = self._actives.get(thread_id)
+            if conn is not None:
+                conn.interrupt()
+            return conn is not None
+
+    def version_donnees(self):
+        """Retourne un identifiant qui change après chaque écriture validée sur la base.
+
+        PRAGMA data_version d'une connexion dédiée change dès qu'une autre connexion
+        (l'écrivain du pool ou un autre processus) valide une transaction.
+        """
+        with self._verrou_sentinelle:
+            if self._ferme:
+                raise sqlite3.ProgrammingError("Pool de connexions fermé")
+            if self._sentinelle is None:
+                self._sentinelle = _ouvrir_connexion(self.profil, lecture_seule=True)
+            return (self.numero, self._sentinelle.execute("PRAGMA data_version").fetchone()[0])
+
+    def _obtenir_ecrivain(self):
+        if self._ferme:
+            raise sqlite3.ProgrammingError("Pool de connexions fermé")
+        if self._ecrivain is not None and not _connexion_valide(self._ecrivain):
+            self._ecrivain.close()
+            self._ecrivain = None
+        if self._ecrivain is None:
+            self._ecrivain = _ouvrir_connexion(self.profil)
+        return self._ecrivain
+
+    @contextmanager
+    def ecriture(self):
+        """Réserve la connexion d'écriture: commit en fin de bloc, rollback en cas d'erreur.
+
+        Les blocs imbriqués utilisent des SAVEPOINT.
+        """
+        with self._verrou_ecriture:
+            conn = self._obtenir_ecrivain()
+            self._profondeur_ecriture += 1
+            profondeur = self._profondeur_ecriture
+            try:
+                if profondeur == 1:
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN IMMEDIATE")
+                else:
+                    conn.execute(f"SAVEPOINT ecriture_{profondeur}")
+
+                try:
+                    yield conn
+                except BaseException:
+                    if profondeur == 1:
+                        conn.rollback()
+                    else:
+                        conn.execute(f"ROLLBACK TO ecriture_{profondeur}")
+                        conn.execute(f"RELEASE ecriture_{profondeur}")
+                    raise
+
+                if profondeur == 1:
+                    conn.commit()
+                else:
+                    conn.execute(f"RELEASE ecriture_{profondeur}")
+            finally:
+                self._profondeur_ecriture -= 1
+
+    def connexion_ecriture_partagee(self):
+        """Retourne la connexion d'écriture sans verrou (usage mono-thread historique)."""
+        with self._verrou_ecriture:
+            return self._obtenir_ecrivain()
 
+    def changer_profil(self, profil):
+        """Applique un autre profil aux connexions inactives et aux prochaines ouvertures."""
+        self.profil = choisir_profil(profil)
+        with self._condition:
+            for conn in self._libres:
+                appliquer_profil(conn, self.profil)
+        with self._verrou_ecriture:
+            if self._ecrivain is not None:
+                appliquer_profil(self._ecrivain, self.profil)
 
-def obtenir_connexion():
-    """Retourne la connexion à la base de données."""
-    global connexion
+    def fermer(self):
+        """Ferme les connexions libres et l'écrivain; les connexions empruntées le seront à leur retour."""
+        with self._condition:
+            self._ferme = True
+            for conn in self._libres:
+                conn.close()
+                self._nb_lecteurs -= 1
+            self._libres = []
+            self._condition.notify_all()
+        with self._verrou_ecriture:
+            if self._ecrivain is not None:
+                self._ecrivain.close()
+                self._ecrivain = None
+        with self._verrou_sentinelle:
+            if self._sentinelle is not None:
+                self._sentinelle.close()
+                self._sentinelle = None
 
-    if connexion is None:
-        connexion = sqlite3.connect(DATABASE_PATH)
-        connexion.row_factory = sqlite3.Row  # Pour avoir des dictionnaires
 
-    return connexion
+def obtenir_pool(profil=None):
+    """Retourne le pool de connexions (créé au premier appel)."""
+    global pool
+
+    if pool is None:
+        pool = PoolConnexions(profil)
+    elif profil and choisir_profil(profil) != pool.profil:
+        pool.changer_profil(profil)
+
+    return pool
+
+
+def connexion_lecture():
+    """Context manager: connexion de lecture empruntée au pool."""
+    return obtenir_pool().lecture()
+
+
+def connexion_ecriture():
+    """Context manager: connexion d'écriture unique (transaction validée en fin de bloc)."""
+    return obtenir_pool().ecriture()
+
+
+def lecture_en_cours():
+    """Indique si le thread courant est déjà dans un bloc connexion_lecture()."""
+    return pool is not None and pool.lecture_en_cours()
+
+
+def interrompre_lecture(thread_id):
+    """Interrompt la lecture en cours d'un thread (annulation d'un calcul long)."""
+    return pool is not None and pool.interrompre_lecture(thread_id)
+
+
+def version_donnees():
+    """Identifiant de version des données (change après chaque écriture validée)."""
+    return obtenir_pool().version_donnees()
+
+
+def obtenir_connexion(profil=None):
+    """Retourne la connexion d'écriture partagée.
+
+    Conservée pour les scripts mono-thread: le code appelé depuis plusieurs threads
+    doit utiliser connexion_lecture() / connexion_ecriture().
+    """
+    return obtenir_pool(profil).connexion_ecriture_partagee()
+
+
+def expliquer_plan(sql, parametres=()):
+    """Retourne les lignes de EXPLAIN QUERY PLAN d'une requête."""
+    with connexion_lecture() as conn:
+        cursor = conn.execute("EXPLAIN QUERY PLAN " + sql, parametres)
+        return [row['detail'] for row in cursor.fetchall()]
+
+
+def obtenir_pragmas_actifs(conn=None):
+    """Retourne les PRAGMA réellement actifs sur la connexion."""
+    if conn is None:
+        with connexion_lecture() as conn_lecture:
+            return obtenir_pragmas_actifs(conn_lecture)
+
+    noms_synchronous = {0: 'off', 1: 'normal', 2: 'full', 3: 'extra'}
+    noms_temp_store = {0: 'default', 1: 'file', 2: 'memory'}
+    profil = pool.profil if pool else None
+
+    pragmas = {'profil': profil}
+    for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store',
+                   'wal_autocheckpoint', 'query_only'):
+        pragmas[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+    pragmas['synchronous'] = noms_synchronous.get(pragmas['synchronous'], pragmas['synchronous'])
+    pragmas['temp_store'] = noms_temp_store.get(pragmas['temp_store'], pragmas['temp_store'])
+    if profil:
+        pragmas['cached_statements'] = PROFILS_CONNEXION[profil]['cached_statements']
+    return pragmas
 
 
 def fermer_connexion():
-    """Ferme la connexion."""
-    global connexion
-    if connexion:
-        connexion.close()
-        connexion = None
+    """Ferme toutes les connexions du pool."""
+    global pool
+    if pool:
+        pool.fermer()
+        pool = None
+
+
+def definir_chemin_base(chemin):
+    """Change la base utilisée (les connexions ouvertes sur l'ancienne sont fermées)."""
+    global DATABASE_PATH
+    fermer_connexion()
+    DATABASE_PATH = Path(chemin)
+
+
+# Nombre maximal de bases attachées à une connexion (SQLITE_MAX_ATTACHED par défaut)
+LIMITE_BASES_ATTACHEES = 10
+
+
+def ouvrir_connexion_sites(chemins, profil=None):
+    """Ouvre une connexion en lecture seule où chaque base est attachée sous son alias.
+
+    chemins: {alias: chemin}, les tables d'une base se lisent "alias.table". La base
+    principale est en mémoire; les bases attachées sont ouvertes en mode=ro (jamais modifiées).
+    """
+    if len(chemins) > LIMITE_BASES_ATTACHEES:
+        raise ValueError(f"Au plus {LIMITE_BASES_ATTACHEES} bases attachées par connexion")
+    reglages = PROFILS_CONNEXION[choisir_profil(profil)]
+
+    conn = sqlite3.connect("file::memory:", uri=True, check_same_thread=False,
+                           timeout=DELAI_ATTENTE_POOL)
+    conn.row_factory = sqlite3.Row
+    try:
+        for alias, chemin in chemins.items():
+            if not alias.isidentifier():
+                raise ValueError(f"Alias de base invalide: {alias}")
+            chemin = Path(chemin)
+            if not chemin.exists():
+                raise FileNotFoundError(f"Base introuvable: {chemin}")
+            # Les alias sont des identifiants vérifiés: ils peuvent être insérés dans le SQL
+            try:
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (chemin.resolve().as_uri() + "?mode=ro",))
+                for pragma in ('cache_size', 'mmap_size'):
+                    conn.execute(f"PRAGMA {alias}.{pragma} = {int(reglages[pragma])}")
+            except sqlite3.DatabaseError as e:
+                raise sqlite3.DatabaseError(f"Base illisible: {chemin} ({e})") from e
+        conn.execute("PRAGMA query_only = ON")
+    except BaseException:
+        conn.close()
+        raise
+    return conn
 
 
 def init_database():
@@ -36,25 +473,59 @@ def init_database():
         schema_sql = f.read()
 
     # Créer les tables
-    conn = obtenir_connexion()
-    conn.executescript(schema_sql)
-    conn.commit()
+    with connexion_ecriture() as conn:
+        # Les tables d'archive ne sont pas dans la liste DROP de schema.sql (un nom par année)
+        tables_archive = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+                                      (PREFIXE_TABLES_ARCHIVE + "%",)).fetchall()
+        for (nom,) in tables_archive:
+            conn.execute(f'DROP TABLE "{nom}"')
+        conn.executescript(schema_sql)
     print(f"Base de données créée: {DATABASE_PATH}")
 
 
+def mettre_a_jour_schema():
+    """Ajoute à une base existante les objets du schéma apparus depuis sa création."""
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+
+    evolutions = schema_sql.split(MARQUEUR_EVOLUTIONS, 1)[1]
+    with connexion_ecriture() as conn:
+        for table, colonnes in COLONNES_GENEREES.items():
+            existantes = {row['name'] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+            for nom, definition in colonnes:
+                if nom not in existantes:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {nom} {definition}")
+        for nom, (type_objet, extrait) in DEFINITIONS_PERIMEES.items():
+            row = conn.execute("SELECT sql FROM sqlite_master WHERE type = ? AND name = ?",
+                               (type_objet, nom)).fetchone()
+            if row is not None and extrait in row['sql']:
+                conn.execute(f"DROP {type_objet.upper()} {nom}")
+        conn.executescript("BEGIN;\n" + evolutions + "\nCOMMIT;")
+
+
 def database_exists():
     """Vérifie si la base existe."""
     if not DATABASE_PATH.exists():
         return False
 
     try:
-        conn = obtenir_connexion()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT name FROM sqlite_master
-            WHERE type='table' AND name IN ('techniciens', 'equipements', 'interventions')
-        """)
-        tables = cursor.fetchall()
+        with connexion_lecture() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type='table' AND name IN ('techniciens', 'equipements', 'interventions')
+            """)
+            tables = cursor.fetchall()
         return len(tables) == 3
     except:
         return False
+
+
+if __name__ == "__main__":
+    # Affiche les PRAGMA actifs pour un profil: python db_connection.py [profil]
+    import sys
+
+    obtenir_pool(sys.argv[1] if len(sys.argv) > 1 else None)
+    for nom, valeur in obtenir_pragmas_actifs().items():
+        print(f"  {nom:18} : {valeur}")
+    fermer_connexion()
@@ -0,0 +1,272 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from itertools import chain, islice
+from pathlib import Path
+
+# Ajouter le répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import db_connection
+import data_access
+import business_logic
+
+
+# Formats d'export: CSV (en-tête puis une ligne par enregistrement) ou JSON Lines
+# (un objet JSON par ligne)
+FORMATS_EXPORT = ('csv', 'jsonl')
+# Extensions reconnues pour choisir le format d'après le nom du fichier (.gz retiré)
+EXTENSIONS_FORMAT = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+# Niveau de compression gzip (6: celui de l'outil gzip, 1: plus rapide, fichier plus gros)
+NIVEAU_GZIP = 6
+# Tampon d'écriture des fichiers non compressés (octets)
+TAILLE_TAMPON = 1 << 20
+# Chemin désignant la sortie standard
+SORTIE_STANDARD = '-'
+
+
+def _paquets_depuis_dicts(lignes, taille_paquet=data_access.TAILLE_CHUNK_EXPORT):
+    """(colonnes, paquets de tuples) depuis des lignes dict; colonnes = clés de la première ligne.
+
+    Les dicts imbriqués sont aplatis (detail_mois: {1: ...} -> detail_mois_1).
+    """
+    lignes = (_aplatir(ligne) for ligne in lignes)
+    premiere = next(lignes, None)
+    if premiere is None:
+        return (), iter(())
+    colonnes = tuple(premiere)
+    lignes = chain([premiere], lignes)
+
+    def paquets():
+        while True:
+            paquet = [tuple(ligne.get(col) for col in colonnes) for ligne in islice(lignes, taille_paquet)]
+            if not paquet:
+                return
+            yield paquet
+
+    return colonnes, paquets()
+
+
+def _aplatir(ligne, prefixe=""):
+    plate = {}
+    for cle, valeur in ligne.items():
+        if isinstance(valeur, dict):
+            plate.update(_aplatir(valeur, f"{prefixe}{cle}_"))
+        else:
+            plate[f"{prefixe}{cle}"] = valeur
+    return plate
+
+
+def _interventions(**_):
+    return tuple(data_access.COLONNES_INTERVENTIONS_DETAILLEES), \
+        data_access.iterer_paquets_interventions_detaillees()
+
+
+def _indicateurs_globaux(**_):
+    return [{
+        'cout_total': data_access.obtenir_cout_total(),
+        'nombre_interventions': data_access.obtenir_nombre_interventions(),
+        'duree_moyenne': data_access.obtenir_duree_moyenne(),
+    }]
+
+
+def _taux_disponibilite(**_):
+    return [{'type': type_eq, 'taux_disponibilite': taux}
+            for type_eq, taux in business_logic.calculer_taux_disponibilite().items()]
+
+
+# Rapports exportables: nom -> (fonction, paramètres acceptés).
+# La fonction reçoit les paramètres (annee, limite, equipement_id) et retourne des lignes dict,
+# ou directement (colonnes, paquets de tuples) pour les exports lus en flux depuis un curseur
+RAPPORTS = {
+    'interventions': (_interventions, ()),
+    'equipements': (lambda **_: data_access.iterer_tous_equipements(), ()),
+    'techniciens': (lambda **_: data_access.iterer_tous_techniciens(), ()),
+    'indicateurs_globaux': (_indicateurs_globaux, ()),
+    'equipements_sollicites': (lambda limite=None, **_: data_access.obtenir_equipements_sollicites(
+        limite or -1), ('limite',)),
+    'frequence_par_type': (lambda **_: data_access.obtenir_frequence_par_type(), ()),
+    'cout_par_type_equipement': (lambda **_: data_access.obtenir_cout_par_type_equipement(), ()),
+    'interventions_par_mois': (lambda annee, **_: data_access.obtenir_interventions_par_mois(annee),
+                               ('annee',)),
+    'performance_techniciens': (lambda **_: data_access.obtenir_performance_techniciens(), ()),
+    'historique_equipement': (lambda equipement_id, **_: data_access.iterer_historique_equipement(
+        equipement_id), ('equipement_id',)),
+    'taux_disponibilite': (_taux_disponibilite, ()),
+    'indice_fiabilite': (lambda **_: business_logic.calculer_indice_fiabilite(), ()),
+    'tendance_couts': (lambda annee, **_: [business_logic.calculer_tendance_couts(annee)], ('annee',)),
+    'alertes': (lambda **_: business_logic.generer_alertes(), ()),
+}
+
+# Valeurs par défaut des paramètres des rapports (equipement_id n'en a pas: obligatoire)
+PARAMETRES_DEFAUT = {'annee': 2024, 'limite': None}
+
+
+def format_fichier(chemin, format=None):
+    """Format demandé, sinon déduit de l'extension du fichier (.gz ignoré), csv par défaut."""
+    if format is not None:
+        if format not in FORMATS_EXPORT:
+            raise ValueError(f"Format inconnu: {format} (formats disponibles: {', '.join(FORMATS_EXPORT)})")
+        return format
+    chemin = Path(str(chemin))
+    suffixe = Path(chemin.stem).suffix if chemin.suffix == '.gz' else chemin.suffix
+    return EXTENSIONS_FORMAT.get(suffixe.lower(), 'csv')
+
+
+def ouvrir_sortie(chemin, compresser=False, niveau=NIVEAU_GZIP):
+    """Fichier texte UTF-8 (gzip si compresser); SORTIE_STANDARD = sortie standard."""
+    if chemin == SORTIE_STANDARD:
+        if compresser:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb', compresslevel=niveau),
+                                    encoding='utf-8', newline='')
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', write_through=False)
+    if compresser:
+        return gzip.open(chemin, 'wt', compresslevel=niveau, encoding='utf-8', newline='')
+    return open(chemin, 'w', encoding='utf-8', newline='', buffering=TAILLE_TAMPON)
+
+
+def ecrire_csv(sortie, colonnes, paquets):
+    """Écrit l'en-tête puis les paquets de tuples; retourne le nombre de lignes."""
+    writer = csv.writer(sortie, lineterminator="\n")
+    if colonnes:
+        writer.writerow(colonnes)
+    nombre = 0
+    for paquet in paquets:
+        writer.writerows(paquet)
+        nombre += len(paquet)
+    return nombre
+
+
+def ecrire_jsonl(sortie, colonnes, paquets):
+    """Écrit un objet JSON par ligne (dates en texte); retourne le nombre de lignes."""
+    encoder = json.JSONEncoder(ensure_ascii=False, default=str).encode
+    nombre = 0
+    for paquet in paquets:
+        sortie.write("".join(f"{encoder(dict(zip(colonnes, ligne)))}\n" for ligne in paquet))
+        nombre += len(paquet)
+    return nombre
+
+
+ECRIVAINS = {'csv': ecrire_csv, 'jsonl': ecrire_jsonl}
+
+
+def lire_rapport(nom, **parametres):
+    """(colonnes, paquets de tuples) d'un rapport de RAPPORTS, lus au fil de l'eau."""
+    if nom not in RAPPORTS:
+        raise ValueError(f"Rapport inconnu: {nom} (rapports disponibles: {', '.join(RAPPORTS)})")
+    fonction, acceptes = RAPPORTS[nom]
+    valeurs = {cle: parametres.get(cle, PARAMETRES_DEFAUT.get(cle)) for cle in acceptes}
+    manquants = [cle for cle, valeur in valeurs.items() if valeur is None and cle not in PARAMETRES_DEFAUT]
+    if manquants:
+        raise ValueError(f"Paramètre obligatoire pour {nom}: {', '.join(manquants)}")
+
+    resultat = fonction(**valeurs)
+    if isinstance(resultat, tuple):
+        return resultat
+    return _paquets_depuis_dicts(resultat)
+
+
+def exporter(nom, chemin, format=None, compresser=None, niveau=NIVEAU_GZIP, **parametres):
+    """Exporte un rapport en CSV ou JSON Lines, paquet par paquet (mémoire bornée).
+
+    format: déduit de l'extension si None. compresser: gzip si None et chemin en .gz.
+    Le fichier est écrit sous un nom temporaire puis renommé: un export interrompu ne
+    laisse pas de fichier incomplet. Retourne {'rapport', 'format', 'fichier', 'lignes',
+    'octets', 'secondes', 'lignes_par_seconde'}.
+    """
+    format = format_fichier(chemin, format)
+    if compresser is None:
+        compresser = str(chemin).endswith('.gz')
+    debut = time.perf_counter()
+    colonnes, paquets = lire_rapport(nom, **parametres)
+
+    try:
+        if chemin == SORTIE_STANDARD:
+            sortie = ouvrir_sortie(chemin, compresser, niveau)
+            try:
+                nombre = ECRIVAINS[format](sortie, colonnes, paquets)
+            finally:
+                sortie.flush()
+                if compresser:
+                    sortie.close()
+                else:
+                    sortie.detach()
+            octets = None
+        else:
+            chemin = Path(chemin)
+            temporaire = chemin.with_name(chemin.name + ".partiel")
+            try:
+                with ouvrir_sortie(temporaire, compresser, niveau) as sortie:
+                    nombre = ECRIVAINS[format](sortie, colonnes, paquets)
+                os.replace(temporaire, chemin)
+            except BaseException:
+                temporaire.unlink(missing_ok=True)
+                raise
+            octets = chemin.stat().st_size
+    finally:
+        # Export interrompu: le générateur libère tout de suite sa connexion de lecture
+        if hasattr(paquets, 'close'):
+            paquets.close()
+
+    duree = time.perf_counter() - debut
+    return {
+        'rapport': nom,
+        'format': format + ('.gz' if compresser else ''),
+        'fichier': str(chemin),
+        'lignes': nombre,
+        'octets': octets,
+        'secondes': round(duree, 3),
+        'lignes_par_seconde': round(nombre / duree) if duree else None,
+    }
+
+
+def lire_arguments(argv=None):
+    """Analyse les options de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Exporte un rapport en CSV ou JSON Lines")
+    parser.add_argument("rapport", choices=RAPPORTS, help="rapport à exporter")
+    parser.add_argument("fichier", help=f"fichier de sortie ({SORTIE_STANDARD} = sortie standard, "
+                                        "compressé si l'extension est .gz)")
+    parser.add_argument("--format", choices=FORMATS_EXPORT,
+                        help="format (défaut: d'après l'extension du fichier, sinon csv)")
+    parser.add_argument("--gzip", action="store_true", help="compresse la sortie (gzip)")
+    parser.add_argument("--annee", type=int, default=PARAMETRES_DEFAUT['annee'],
+                        help="année (interventions_par_mois, tendance_couts)")
+    parser.add_argument("--limite", type=int, help="nombre de lignes (equipements_sollicites, défaut: toutes)")
+    parser.add_argument("--equipement", type=int, dest="equipement_id",
+                        help="ID de l'équipement (historique_equipement)")
+    parser.add_argument("--base", help="base à exporter (défaut: database/maintenance.db)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande (bilan sur la sortie d'erreur)."""
+    arguments = lire_arguments(argv)
+    if arguments.base:
+        db_connection.definir_chemin_base(arguments.base)
+    if not db_connection.database_exists():
+        print(f"  Base de données non trouvée: {db_connection.DATABASE_PATH}", file=sys.stderr)
+        return 2
+    db_connection.mettre_a_jour_schema()
+
+    try:
+        bilan = exporter(arguments.rapport, arguments.fichier, arguments.format,
+                         True if arguments.gzip else None, annee=arguments.annee,
+                         limite=arguments.limite, equipement_id=arguments.equipement_id)
+    except (OSError, ValueError) as e:
+        print(f"  Erreur: {e}", file=sys.stderr)
+        return 2
+    finally:
+        db_connection.fermer_connexion()
+
+    for nom, valeur in bilan.items():
+        print(f"  {nom:18} : {valeur}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Ajouter le répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import db_connection
+import data_access
+
+
+# Tailles de parc prédéfinies: (nombre d'équipements, nombre d'interventions)
+ECHELLES = {
+    'mini': (1_000, 10_000),
+    'petite': (1_000, 100_000),
+    'moyenne': (10_000, 1_000_000),
+    'grande': (100_000, 10_000_000),
+}
+
+GRAINE_DEFAUT = 42
+# Les dates générées se terminent ici (et non à la date du jour) pour que deux
+# générations avec la même graine donnent exactement la même base
+DATE_FIN = date(2024, 12, 31)
+NB_ANNEES_HISTORIQUE = 5
+TAILLE_LOT_GENERATION = 10_000
+
+# Répartitions observées sur le parc réel (poids relatifs)
+POIDS_TYPE_EQUIPEMENT = {'ordinateur': 50, 'machine': 25, 'equipement_technique': 25}
+POIDS_STATUT_EQUIPEMENT = {'actif': 82, 'en_maintenance': 8, 'en_panne': 5, 'reforme': 5}
+POIDS_TYPE_INTERVENTION = {'preventive': 45, 'corrective': 30, 'mise_a_jour': 15, 'installation': 10}
+POIDS_STATUT_INTERVENTION = {'terminee': 86, 'planifiee': 6, 'en_cours': 4, 'annulee': 4}
+
+# (durée moyenne en minutes, coût moyen en euros) par type d'intervention
+PROFILS_INTERVENTION = {
+    'preventive': (90, 110.0),
+    'corrective': (180, 400.0),
+    'mise_a_jour': (75, 90.0),
+    'installation': (150, 120.0),
+}
+
+MARQUES = {
+    'ordinateur': [('Dell', 'OptiPlex 7090'), ('HP', 'EliteDesk 800'), ('Lenovo', 'ThinkPad T14'),
+                   ('Dell', 'PowerEdge R740')],
+    'machine': [('Haas', 'ST-10'), ('DMG Mori', 'CMX 600 V'), ('Fanuc', 'Arc Mate 100iD')],
+    'equipement_technique': [('Canon', 'imageRUNNER C3530i'), ('Daikin', 'RZAG140MV1'),
+                             ('APC', 'Smart-UPS 3000')],
+}
+LOCALISATIONS = ['Bureau 101', 'Bureau 102', 'Salle serveur', 'Atelier A', 'Atelier B',
+                 'Couloir principal', 'Mobile', 'Entrepôt', 'Laboratoire']
+SPECIALITES = ['Informatique', 'Électromécanique', 'Équipements industriels', 'Polyvalent']
+DESCRIPTIONS = {
+    'preventive': ['Maintenance préventive', 'Nettoyage et contrôle', 'Révision périodique'],
+    'corrective': ['Remplacement pièce défectueuse', 'Diagnostic et réparation', 'Réparation panne'],
+    'mise_a_jour': ['Mise à jour logicielle', 'Mise à jour firmware', 'Patchs de sécurité'],
+    'installation': ['Installation et configuration', 'Mise en service'],
+}
+
+
+def _tirage(rng, poids, k):
+    """Tire k valeurs selon un dictionnaire {valeur: poids}."""
+    return rng.choices(list(poids), weights=list(poids.values()), k=k)
+
+
+def generer_techniciens(rng, nombre):
+    """Génère des techniciens (tuples dans l'ordre de COLONNES_TECHNICIEN)."""
+    debut = date(2010, 1, 1)
+    for i in range(1, nombre + 1):
+        yield (f"Nom{i}", f"Prenom{i}", rng.choice(SPECIALITES), f"technicien{i}@maintenance.fr",
+               (debut + timedelta(days=rng.randrange(5000))).isoformat())
+
+
+def generer_equipements(rng, nombre):
+    """Génère des équipements (tuples dans l'ordre de COLONNES_EQUIPEMENT)."""
+    types = _tirage(rng, POIDS_TYPE_EQUIPEMENT, nombre)
+    statuts = _tirage(rng, POIDS_STATUT_EQUIPEMENT, nombre)
+    debut = DATE_FIN - timedelta(days=365 * 15)
+    for i in range(nombre):
+        marque, modele = rng.choice(MARQUES[types[i]])
+        yield (f"{types[i].capitalize()} {i + 1}", types[i], marque, modele, f"SN-{i + 1:08d}",
+               (debut + timedelta(days=rng.randrange(365 * 15))).isoformat(),
+               rng.choice(LOCALISATIONS), statuts[i])
+
+
+def generer_interventions(rng, nombre, nb_equipements, nb_techniciens, taille_lot=TAILLE_LOT_GENERATION):
+    """Génère des interventions (tuples dans l'ordre de COLONNES_INTERVENTION).
+
+    Quelques équipements concentrent beaucoup d'interventions (poids de Pareto),
+    comme sur un vrai parc.
+    """
+    poids = [rng.paretovariate(1.5) for _ in range(nb_equipements)]
+    cumul = []
+    total = 0.0
+    for p in poids:
+        total += p
+        cumul.append(total)
+    ids_equipements = range(1, nb_equipements + 1)
+    ids_techniciens = range(1, nb_techniciens + 1)
+    debut = DATE_FIN - timedelta(days=365 * NB_ANNEES_HISTORIQUE)
+    nb_jours = (DATE_FIN - debut).days + 1
+
+    restant = nombre
+    while restant > 0:
+        k = min(taille_lot, restant)
+        equipements = rng.choices(ids_equipements, cum_weights=cumul, k=k)
+        types = _tirage(rng, POIDS_TYPE_INTERVENTION, k)
+        statuts = _tirage(rng, POIDS_STATUT_INTERVENTION, k)
+        for i in range(k):
+            duree_moyenne, cout_moyen = PROFILS_INTERVENTION[types[i]]
+            yield (equipements[i], rng.choice(ids_techniciens),
+                   (debut + timedelta(days=rng.randrange(nb_jours))).isoformat(),
+                   types[i], rng.choice(DESCRIPTIONS[types[i]]),
+                   max(15, int(rng.expovariate(1 / duree_moyenne))),
+                   round(rng.expovariate(1 / cout_moyen), 2), statuts[i])
+        restant -= k
+
+
+def _vider_base():
+    """Retire les données d'exemple de schema.sql (les règles d'alerte sont conservées)."""
+    with db_connection.connexion_ecriture() as conn:
+        conn.execute("DELETE FROM interventions")
+        conn.execute("DELETE FROM equipements")
+        conn.execute("DELETE FROM techniciens")
+        conn.execute("DELETE FROM stats_equipement")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name IN ('interventions', 'equipements', 'techniciens')")
+
+
+def generer_base(chemin, nb_equipements, nb_interventions, nb_techniciens=None,
+                 graine=GRAINE_DEFAUT, taille_lot=TAILLE_LOT_GENERATION):
+    """Crée une base de test complète (écrase le fichier existant).
+
+    Retourne le nombre de lignes insérées par table et la durée de génération.
+    """
+    chemin = Path(chemin)
+    nb_techniciens = nb_techniciens or max(5, nb_equipements // 50)
+    rng = random.Random(graine)
+
+    for suffixe in ('', '-wal', '-shm'):
+        Path(str(chemin) + suffixe).unlink(missing_ok=True)
+    db_connection.definir_chemin_base(chemin)
+    db_connection.obtenir_pool('ecriture_intensive')
+    debut = time.perf_counter()
+    db_connection.init_database()
+    _vider_base()
+
+    resultats = {
+        'techniciens': data_access.ajouter_techniciens_en_masse(
+            generer_techniciens(rng, nb_techniciens), taille_lot),
+        'equipements': data_access.ajouter_equipements_en_masse(
+            generer_equipements(rng, nb_equipements), taille_lot),
+        'interventions': data_access.ajouter_interventions_en_masse(
+            generer_interventions(rng, nb_interventions, nb_equipements, nb_techniciens, taille_lot),
+            taille_lot),
+    }
+    with db_connection.connexion_ecriture() as conn:
+        conn.execute("ANALYZE")
+    duree = time.perf_counter() - debut
+
+    bilan = {table: r['inseres'] for table, r in resultats.items()}
+    bilan['rejets'] = sum(len(r['rejets']) for r in resultats.values())
+    bilan['secondes'] = round(duree, 3)
+    return bilan
+
+
+def chemin_echelle(dossier, echelle, graine=GRAINE_DEFAUT):
+    """Nom de fichier d'une base générée pour une échelle et une graine."""
+    return Path(dossier) / f"parc_{echelle}_{graine}.db"
+
+
+def lire_arguments(argv=None):
+    """Analyse les options de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Génère une base de maintenance de test")
+    parser.add_argument("chemin", help="fichier de base à créer (écrasé s'il existe)")
+    parser.add_argument("--echelle", choices=ECHELLES, default='mini',
+                        help="taille prédéfinie (ignorée si --equipements/--interventions)")
+    parser.add_argument("--equipements", type=int, help="nombre d'équipements")
+    parser.add_argument("--interventions", type=int, help="nombre d'interventions")
+    parser.add_argument("--techniciens", type=int, help="nombre de techniciens (défaut: équipements / 50)")
+    parser.add_argument("--graine", type=int, default=GRAINE_DEFAUT, help="graine du générateur aléatoire")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande."""
+    arguments = lire_arguments(argv)
+    nb_equipements, nb_interventions = ECHELLES[arguments.echelle]
+    bilan = generer_base(arguments.chemin,
+                         arguments.equipements or nb_equipements,
+                         arguments.interventions or nb_interventions,
+                         arguments.techniciens, arguments.graine)
+    db_connection.fermer_connexion()
+    for nom, valeur in bilan.items():
+        print(f"  {nom:14} : {valeur}")
+
+
+if __name__ == "__main__":
+    main()
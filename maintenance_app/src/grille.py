@@ -0,0 +1,260 @@
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from lectures_asynchrones import LecturesAsynchrones
+
+
+# Lignes lues par requête
+TAILLE_PAGE_DEFAUT = 100
+# Pages gardées en mémoire (les moins récemment affichées sont oubliées)
+PAGES_EN_MEMOIRE = 20
+# Hauteur d'une ligne du Treeview (pixels)
+HAUTEUR_LIGNE = 20
+# Texte des lignes dont la page n'est pas encore lue
+TEXTE_CHARGEMENT = "Chargement..."
+
+
+class Colonne:
+    """Colonne d'une grille: clé du dictionnaire de ligne, titre, largeur et format d'affichage."""
+
+    def __init__(self, cle, titre, largeur=100, formatage=str, triable=True, ancre="w"):
+        self.cle = cle
+        self.titre = titre
+        self.largeur = largeur
+        self.formatage = formatage
+        self.triable = triable
+        self.ancre = ancre
+
+
+class SourceParCurseur:
+    """Source de GrilleVirtuelle lue par pagination par clé pour la colonne tri_cle.
+
+    paginer(descendant, limite, curseur) retourne (lignes dans l'ordre du tri, curseur de la
+    page suivante ou None); curseur None = première page. Le curseur de chaque page lue est
+    gardé: la page n+1 reprend l'index là où la page n s'est arrêtée au lieu de sauter
+    OFFSET lignes. Une page dont le curseur n'est pas connu (saut de la barre de défilement)
+    est atteinte en lisant les pages depuis la plus proche déjà connue.
+    Les autres colonnes de tri sont lues par source_decalage(tri, descendant, limite, decalage).
+    """
+
+    def __init__(self, tri_cle, paginer, source_decalage):
+        self.tri_cle = tri_cle
+        self.paginer = paginer
+        self.source_decalage = source_decalage
+        self._curseurs = {}  # {(descendant, limite, numéro de page): curseur}
+        self._verrou = threading.Lock()
+
+    def __call__(self, tri, descendant, limite, decalage):
+        if tri != self.tri_cle or decalage % limite:
+            return self.source_decalage(tri, descendant, limite, decalage)
+        numero = decalage // limite
+        with self._verrou:
+            connues = [n for (sens, taille, n) in self._curseurs
+                       if sens == descendant and taille == limite and n <= numero]
+            depart = max(connues, default=0)
+            curseur = self._curseurs.get((descendant, limite, depart))
+
+        for page in range(depart, numero + 1):
+            lignes, suivant = self.paginer(descendant, limite, curseur)
+            if suivant is not None:
+                with self._verrou:
+                    self._curseurs[(descendant, limite, page + 1)] = suivant
+            if page < numero and suivant is None:
+                return []
+            curseur = suivant
+        return lignes
+
+
+class GrilleVirtuelle(ttk.Frame):
+    """Tableau sur ttk.Treeview qui ne crée que les lignes visibles.
+
+    source(tri, descendant, limite, decalage) retourne une page de lignes (dicts),
+    compter() le nombre total de lignes (SourceParCurseur: pages lues par clé). Les pages sont lues à la demande pendant le
+    défilement; un clic sur un en-tête trie côté base (nouvelle requête).
+    Les requêtes partent dans le pool executeur (LecturesAsynchrones): le thread Tk
+    n'attend jamais la base, les lignes pas encore lues affichent TEXTE_CHARGEMENT.
+    total et premiere_page, s'ils sont fournis (calculés hors du thread Tk), évitent
+    les deux premières requêtes.
+    """
+
+    def __init__(self, parent, colonnes, source, compter, tri=None, descendant=False,
+                 taille_page=TAILLE_PAGE_DEFAUT, total=None, premiere_page=None, executeur=None,
+                 **options):
+        super().__init__(parent, **options)
+        self.colonnes = colonnes
+        self.source = source
+        self.compter = compter
+        self.tri = tri or colonnes[0].cle
+        self.descendant = descendant
+        self.taille_page = taille_page
+        self.total = 0
+        self.debut = 0
+        self.nb_visibles = 1
+        self._pages = OrderedDict()
+        self._erreurs = {}
+        self._lectures = LecturesAsynchrones(self, executeur)
+
+        ttk.Style(self).configure("Grille.Treeview", rowheight=HAUTEUR_LIGNE)
+        self.tree = ttk.Treeview(self, columns=[c.cle for c in colonnes], show="headings",
+                                 selectmode="browse", height=1, style="Grille.Treeview")
+        for colonne in colonnes:
+            self.tree.heading(colonne.cle, text=colonne.titre, anchor=colonne.ancre,
+                              command=(lambda cle=colonne.cle: self.trier(cle)) if colonne.triable else "")
+            self.tree.column(colonne.cle, width=colonne.largeur, anchor=colonne.ancre, stretch=True)
+
+        # La barre de défilement représente toutes les lignes, pas seulement celles du Treeview
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._defiler)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self._redimensionner)
+        self.tree.bind("<MouseWheel>", self._molette)
+        self.tree.bind("<Button-4>", lambda e: self.deplacer(-3))
+        self.tree.bind("<Button-5>", lambda e: self.deplacer(3))
+        self.tree.bind("<Prior>", lambda e: self.deplacer(-self.nb_visibles))
+        self.tree.bind("<Next>", lambda e: self.deplacer(self.nb_visibles))
+        self.tree.bind("<Home>", lambda e: self.aller_a(0))
+        self.tree.bind("<End>", lambda e: self.aller_a(self.total))
+        self.bind("<Destroy>", self._detruire)
+
+        if total is None:
+            self.recharger()
+        else:
+            self.total = total
+            if premiere_page is not None:
+                self._pages[0] = premiere_page
+            self._mettre_a_jour_entetes()
+            self._afficher()
+
+    def recharger(self):
+        """Relit le nombre de lignes et réaffiche depuis le début."""
+        self._lectures.invalider()
+        self._pages.clear()
+        self._erreurs.clear()
+        self.debut = 0
+        self._mettre_a_jour_entetes()
+        self._lectures.lancer('total', self.compter, (), self._recevoir_total,
+                              lambda erreur: self._recevoir_erreur('total', erreur))
+
+    def _recevoir_total(self, total):
+        self.total = total
+        self._afficher()
+
+    def trier(self, cle):
+        """Trie sur une colonne; un second clic inverse le sens."""
+        if cle == self.tri:
+            self.descendant = not self.descendant
+        else:
+            self.tri = cle
+            self.descendant = False
+        # Les pages demandées avec l'ancien tri ne sont plus utiles
+        self._lectures.invalider()
+        self._pages.clear()
+        self._erreurs.clear()
+        self.debut = 0
+        self._mettre_a_jour_entetes()
+        self._afficher()
+
+    def _mettre_a_jour_entetes(self):
+        for colonne in self.colonnes:
+            fleche = (" ▼" if self.descendant else " ▲") if colonne.cle == self.tri else ""
+            self.tree.heading(colonne.cle, text=colonne.titre + fleche)
+
+    def _page(self, numero):
+        """Page numero si elle est lue; sinon None et sa lecture est lancée dans le pool."""
+        if numero in self._pages:
+            self._pages.move_to_end(numero)
+            return self._pages[numero]
+        if numero not in self._erreurs:
+            # Une page en erreur n'est relue qu'après un tri ou recharger()
+            self._lectures.lancer(numero, self.source,
+                                  (self.tri, self.descendant, self.taille_page, numero * self.taille_page),
+                                  lambda lignes, numero=numero: self._recevoir_page(numero, lignes),
+                                  lambda erreur, numero=numero: self._recevoir_erreur(numero, erreur))
+        return None
+
+    def _recevoir_page(self, numero, lignes):
+        self._pages[numero] = lignes
+        while len(self._pages) > PAGES_EN_MEMOIRE:
+            self._pages.popitem(last=False)
+        self._afficher()
+
+    def _recevoir_erreur(self, numero, erreur):
+        self._erreurs[numero] = str(erreur)
+        self._afficher()
+
+    def _lignes(self, debut, nombre):
+        """Lignes [debut, debut + nombre[ assemblées depuis les pages (None: page pas encore lue)."""
+        lignes = []
+        position = debut
+        fin = min(debut + nombre, self.total)
+        while position < fin:
+            numero, decalage = divmod(position, self.taille_page)
+            page = self._page(numero)
+            if page is None:
+                morceau = [None] * min(self.taille_page - decalage, fin - position)
+            else:
+                morceau = page[decalage:decalage + fin - position]
+                if not morceau:
+                    break  # Moins de lignes que prévu (base modifiée entre-temps)
+            lignes.extend(morceau)
+            position += len(morceau)
+        return lignes
+
+    def _afficher(self):
+        """Remplace les lignes du Treeview par la fenêtre visible."""
+        self.debut = max(0, min(self.debut, self.total - self.nb_visibles))
+        self.tree.delete(*self.tree.get_children())
+        erreur = next(iter(self._erreurs.values()), None)
+        attente = [f"Erreur: {erreur}" if erreur else TEXTE_CHARGEMENT] + [""] * (len(self.colonnes) - 1)
+        for ligne in self._lignes(self.debut, self.nb_visibles):
+            if ligne is None:
+                self.tree.insert("", tk.END, values=attente)
+            else:
+                self.tree.insert("", tk.END, values=[c.formatage(ligne[c.cle]) for c in self.colonnes])
+        if 'total' in self._erreurs:
+            self.tree.insert("", tk.END, values=attente)
+
+        # Défilement rapide: les pages demandées qui ne sont plus visibles ne partent pas
+        premiere, derniere = self.debut // self.taille_page, (self.debut + self.nb_visibles) // self.taille_page
+        self._lectures.abandonner({'total', *range(premiere, derniere + 1)})
+
+        if self.total:
+            self.scrollbar.set(self.debut / self.total,
+                               min(1.0, (self.debut + self.nb_visibles) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def aller_a(self, position):
+        """Affiche la fenêtre commençant à la ligne position."""
+        self.debut = int(position)
+        self._afficher()
+
+    def deplacer(self, nombre):
+        """Fait défiler de nombre lignes (négatif vers le haut)."""
+        self.aller_a(self.debut + nombre)
+        return "break"
+
+    def _defiler(self, action, valeur, unite=None):
+        # Protocole des barres de défilement Tk: ("moveto", fraction) ou ("scroll", n, "units"/"pages")
+        if action == "moveto":
+            self.aller_a(float(valeur) * self.total)
+        elif action == "scroll":
+            pas = self.nb_visibles if unite == "pages" else 1
+            self.deplacer(int(valeur) * pas)
+
+    def _molette(self, event):
+        return self.deplacer(-3 if event.delta > 0 else 3)
+
+    def _redimensionner(self, event):
+        # Nombre de lignes qui tiennent dans la hauteur (moins l'en-tête)
+        nb_visibles = max(1, event.height // HAUTEUR_LIGNE - 1)
+        if nb_visibles != self.nb_visibles:
+            self.nb_visibles = nb_visibles
+            self._afficher()
+
+    def _detruire(self, event):
+        if event.widget is self:
+            self._lectures.arreter()
@@ -1,14 +1,66 @@
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, filedialog
 
 # Ajouter le répertoire src au path pour les imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from db_connection import init_database, database_exists, fermer_connexion
+from db_connection import (init_database, database_exists, fermer_connexion, mettre_a_jour_schema,
+                           interrompre_lecture)
 import data_access
 import business_logic
+import export
+from grille import Colonne, GrilleVirtuelle, SourceParCurseur, TAILLE_PAGE_DEFAUT
+from rendu_tableau import ecrire_tableau
+from selecteur import SelecteurRecherche
+
+
+# Nombre de threads pour les calculs de rapports
+NB_THREADS_RAPPORTS = 2
+# Intervalle de vérification des calculs en cours (ms)
+DELAI_SCRUTATION_MS = 50
+# Marqueurs des termes trouvés dans les extraits de recherche (remplacés par une mise en forme)
+MARQUES_SURLIGNAGE = ("\x02", "\x03")
+# Valeur des listes de filtres signifiant "pas de filtre"
+TOUS = "(tous)"
+
+
+def libelle_equipement(eq):
+    """Texte d'un equipement dans les selecteurs."""
+    return f"{eq['nom']} ({eq['type']}) - {eq['numero_serie']} - {eq['localisation']}"
+
+
+def libelle_technicien(t):
+    """Texte d'un technicien dans les selecteurs."""
+    return f"{t['prenom']} {t['nom']} ({t['specialite']})"
+
+
+class TacheRapport:
+    """Calcul lancé en arrière-plan pour un rapport."""
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.annulee = False
+        self.thread_id = None
+        self.debut = time.perf_counter()
+        self.future = None
+
+    def executer(self, calcul):
+        """Exécuté dans un thread du pool."""
+        self.thread_id = threading.get_ident()
+        if self.annulee:
+            return None
+        return calcul()
+
+    def annuler(self):
+        """Annule la tâche: retirée de la file, ou requête SQL en cours interrompue."""
+        self.annulee = True
+        if self.future is not None and not self.future.cancel() and self.thread_id is not None:
+            interrompre_lecture(self.thread_id)
 
 
 class MaintenanceApp:
@@ -30,6 +82,16 @@ class MaintenanceApp:
 
         self.root.configure(bg=self.bg_color)
 
+        # Calculs des rapports en arriere-plan (la boucle Tk ne doit jamais bloquer)
+        self.executeur = ThreadPoolExecutor(max_workers=NB_THREADS_RAPPORTS,
+                                            thread_name_prefix="rapport")
+        self._generation = 0
+        self._tache = None
+
+        # Derniers criteres de recherche (pre-remplis a la recherche suivante)
+        self.criteres_recherche = {'texte': "", 'date_debut': "", 'date_fin': "",
+                                   'type_equipement': TOUS, 'type_intervention': TOUS}
+
         # Initialiser la base de donnees
         self._init_database()
 
@@ -43,6 +105,8 @@ class MaintenanceApp:
         """Initialise la base de donnees si necessaire."""
         if not database_exists():   
             init_database()
+        else:
+            mettre_a_jour_schema()
 
     def _create_widgets(self):
         """Cree tous les widgets de l'interface."""
@@ -147,7 +211,9 @@ class MaintenanceApp:
             ("Interventions/mois", self.show_interventions_mois),
             ("Performance techniciens", self.show_performance_techniciens),
             ("Historique equipement", self.show_historique_equipement),
+            ("Recherche interventions", self.show_recherche_interventions),
             ("Rapport complet", self.show_rapport_synthese),
+            ("Exporter", self.show_export),
         ]
 
         for text, command in menu_items:
@@ -210,10 +276,26 @@ class MaintenanceApp:
         # Separateur
         ttk.Separator(self.content_frame, orient="horizontal").pack(fill=tk.X, pady=(0, 15))
 
+        # Zone d'affichage: texte ou grille selon la vue
+        self.zone_frame = tk.Frame(self.content_frame, bg=self.bg_color)
+        self.zone_frame.pack(fill=tk.BOTH, expand=True)
+        self.grid_frame = None
+
         # Zone de texte avec scrollbar
-        text_frame = tk.Frame(self.content_frame, bg=self.bg_color)
+        text_frame = tk.Frame(self.zone_frame, bg=self.bg_color)
         text_frame.pack(fill=tk.BOTH, expand=True)
 
+        # Indicateur de calcul en cours (affiche seulement pendant un calcul)
+        self.busy_frame = tk.Frame(self.content_frame, bg=self.bg_color)
+        self.busy_label = tk.Label(self.busy_frame, text="", font=("Segoe UI", 9),
+                                   fg=self.text_color, bg=self.bg_color)
+        self.busy_label.pack(side=tk.LEFT)
+        self.progress = ttk.Progressbar(self.busy_frame, mode="indeterminate", length=200)
+        self.progress.pack(side=tk.LEFT, padx=10)
+        tk.Button(self.busy_frame, text="Annuler", command=self._annuler_rapport, bg="#95a5a6",
+                  fg="white", font=("Segoe UI", 9), padx=10, cursor="hand2").pack(side=tk.LEFT)
+        self.text_frame = text_frame
+
         self.scrollbar = ttk.Scrollbar(text_frame)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
@@ -231,10 +313,12 @@ class MaintenanceApp:
         )
         self.text_area.pack(fill=tk.BOTH, expand=True)
         self.scrollbar.config(command=self.text_area.yview)
+        self.text_area.tag_configure("surligne", background="#f9e79f")
 
     def _clear_and_set_title(self, title: str):
         """Efface la zone de texte et met a jour le titre."""
         self.section_title.config(text=title)
+        self._afficher_texte()
         self.text_area.config(state=tk.NORMAL)
         self.text_area.delete(1.0, tk.END)
 
@@ -246,25 +330,136 @@ class MaintenanceApp:
         """Finalise l'affichage du texte."""
         self.text_area.config(state=tk.DISABLED)
 
-    def _format_table(self, headers: list, rows: list, col_widths: list = None) -> str:
-        """Formate un tableau en texte."""
-        if not rows:
-            return "  Aucune donnee\n"
+    def _afficher_texte(self):
+        """Remet la zone de texte a la place de la grille."""
+        if self.grid_frame is not None:
+            self.grid_frame.destroy()
+            self.grid_frame = None
+            self.text_frame.pack(fill=tk.BOTH, expand=True)
+
+    def _afficher_grille(self, colonnes: list, source, compter, tri: str, descendant: bool,
+                         total: int, premiere_page: list, entete: str = ""):
+        """Remplace la zone de texte par une grille paginee (GrilleVirtuelle)."""
+        self._afficher_texte()
+        self.text_frame.pack_forget()
+        self.grid_frame = tk.Frame(self.zone_frame, bg=self.bg_color)
+        self.grid_frame.pack(fill=tk.BOTH, expand=True)
+
+        if entete:
+            tk.Label(self.grid_frame, text=entete, font=("Consolas", 10), fg=self.text_color,
+                     bg=self.bg_color, justify=tk.LEFT, anchor="w").pack(fill=tk.X, pady=(0, 10))
+        tk.Label(self.grid_frame, text=f"{total} ligne(s) - cliquer sur un titre de colonne pour trier",
+                 font=("Segoe UI", 9), fg="#7f8c8d", bg=self.bg_color, anchor="w").pack(fill=tk.X)
+        GrilleVirtuelle(self.grid_frame, colonnes, source, compter, tri=tri, descendant=descendant,
+                        total=total, premiere_page=premiere_page,
+                        executeur=self.executeur).pack(fill=tk.BOTH, expand=True)
+
+    def _afficher_occupation(self, occupe: bool):
+        """Affiche ou masque l'indicateur de calcul en cours."""
+        if occupe:
+            self.busy_frame.pack(fill=tk.X, pady=(0, 10), before=self.zone_frame)
+            self.progress.start(15)
+            self.root.configure(cursor="watch")
+        else:
+            self.progress.stop()
+            self.busy_frame.pack_forget()
+            self.root.configure(cursor="")
+
+    def _lancer_rapport(self, titre: str, calcul, affichage):
+        """Execute calcul() dans le pool de threads puis affichage(resultat) dans la boucle Tk.
+
+        Un nouveau rapport annule le precedent: son resultat, s'il arrive, est ignore.
+        """
+        self._annuler_rapport()
+        self._clear_and_set_title(titre)
+        self._append_text("\n  Calcul en cours...\n")
+        self._finalize_text()
+
+        tache = TacheRapport(self._generation)
+        tache.future = self.executeur.submit(tache.executer, calcul)
+        self._tache = tache
+        self._afficher_occupation(True)
+        self.root.after(DELAI_SCRUTATION_MS, self._verifier_rapport, tache, titre, affichage)
+
+    def _verifier_rapport(self, tache: TacheRapport, titre: str, affichage):
+        """Scrute la tache (via root.after) et affiche son resultat une fois termine."""
+        if tache.generation != self._generation or tache.annulee:
+            return  # Resultat perime: un autre rapport a ete demande ou celui-ci annule
+        if not tache.future.done():
+            self.busy_label.config(text=f"Calcul en cours... {time.perf_counter() - tache.debut:.1f} s")
+            self.root.after(DELAI_SCRUTATION_MS, self._verifier_rapport, tache, titre, affichage)
+            return
+
+        self._tache = None
+        self._afficher_occupation(False)
+        self._clear_and_set_title(titre)
+        try:
+            affichage(tache.future.result())
+        except Exception as e:
+            self._append_text(f"\n  Erreur: {e}\n")
+        self._finalize_text()
+
+    def _annuler_rapport(self):
+        """Annule le rapport en cours (bouton Annuler, ou nouvel affichage)."""
+        self._generation += 1
+        tache, self._tache = self._tache, None
+        if tache is None:
+            return
+        tache.annuler()
+        self._afficher_occupation(False)
+        self._clear_and_set_title(self.section_title.cget("text"))
+        self._append_text("\n  Calcul annule.\n")
+        self._finalize_text()
 
-        if col_widths is None:
-            col_widths = [max(len(str(h)), max(len(str(row[i])) for row in rows))
-                          for i, h in enumerate(headers)]
+    def _append_surligne(self, text: str):
+        """Ajoute un texte dont les passages entre MARQUES_SURLIGNAGE sont surlignes."""
+        debut, fin = MARQUES_SURLIGNAGE
+        for i, morceau in enumerate(text.replace(fin, debut).split(debut)):
+            # Morceaux d'indice impair: entre une marque de debut et une marque de fin
+            self.text_area.insert(tk.END, morceau, "surligne" if i % 2 else ())
 
-        result = ""
-        header_line = " | ".join(str(h).ljust(col_widths[i]) for i, h in enumerate(headers))
-        result += f"  {header_line}\n"
-        result += f"  {'-' * len(header_line)}\n"
+    def _append_table(self, headers: list, rows, col_widths: list = None):
+        """Ajoute un tableau a la zone de texte, insere par paquets de lignes."""
+        ecrire_tableau(headers, rows, col_widths, ecrire=self._append_text, message_vide="Aucune donnee")
 
-        for row in rows:
-            line = " | ".join(str(row[i]).ljust(col_widths[i]) for i in range(len(headers)))
-            result += f"  {line}\n"
+    def _choisir_par_recherche(self, titre: str, message: str, rechercher, libelle):
+        """Fenetre modale de recherche; retourne la ligne choisie ou None si annule."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(titre)
+        dialog.configure(bg=self.bg_color)
+        dialog.transient(self.root)
+
+        # Centrer la fenêtre
+        dialog.update_idletasks()
+        x = (dialog.winfo_screenwidth() // 2) - (520 // 2)
+        y = (dialog.winfo_screenheight() // 2) - (380 // 2)
+        dialog.geometry(f'520x380+{x}+{y}')
+
+        tk.Label(dialog, text=message, bg=self.bg_color, fg=self.text_color,
+                 font=("Segoe UI", 10)).pack(padx=20, pady=(15, 5), anchor="w")
+
+        choix = {}
+
+        def valider(ligne=None):
+            choix['ligne'] = ligne or selecteur.selection
+            dialog.destroy()
+
+        selecteur = SelecteurRecherche(dialog, rechercher, libelle, hauteur=10, largeur=60, au_choix=valider,
+                                       executeur=self.executeur)
+        selecteur.pack(padx=20, fill=tk.BOTH, expand=True)
+
+        buttons_frame = tk.Frame(dialog, bg=self.bg_color)
+        buttons_frame.pack(pady=10)
+        tk.Button(buttons_frame, text="Choisir", command=valider, bg=self.accent_color,
+                  fg="white", font=("Segoe UI", 10), padx=20, pady=5, cursor="hand2").pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Annuler", command=dialog.destroy, bg="#95a5a6",
+                  fg="white", font=("Segoe UI", 10), padx=20, pady=5, cursor="hand2").pack(side=tk.LEFT, padx=5)
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
 
-        return result
+        dialog.grab_set()
+        selecteur.focus_set()
+        self.root.wait_window(dialog)
+        return choix.get('ligne')
 
     def _show_welcome(self):
         """Affiche le message de bienvenue."""
@@ -304,203 +499,202 @@ class MaintenanceApp:
 
     def show_indicateurs_globaux(self):
         """Affiche les indicateurs globaux."""
-        self._clear_and_set_title("Indicateurs Globaux")
-
-        cout_total = data_access.obtenir_cout_total()
-        nb_interventions = data_access.obtenir_nombre_interventions()
-        duree_moyenne = data_access.obtenir_duree_moyenne()
-
-        self._append_text(f"""
+        def calcul():
+            return (data_access.obtenir_cout_total(),
+                    data_access.obtenir_nombre_interventions(),
+                    data_access.obtenir_duree_moyenne())
+
+        def affichage(resultat):
+            cout_total, nb_interventions, duree_moyenne = resultat
+            self._append_text(f"""
   Cout total de maintenance     : {cout_total:,.2f} EUR
   Nombre total d'interventions  : {nb_interventions}
   Duree moyenne d'intervention  : {duree_moyenne:.1f} minutes ({duree_moyenne/60:.1f} heures)
 """)
-        self._finalize_text()
+
+        self._lancer_rapport("Indicateurs Globaux", calcul, affichage)
 
     def show_equipements_sollicites(self):
-        """Affiche les equipements les plus sollicites."""
-        self._clear_and_set_title("Equipements les Plus Sollicites")
+        """Affiche les equipements les plus sollicites (grille triable)."""
+        colonnes = [
+            Colonne('nom', "Equipement", 220),
+            Colonne('type', "Type", 140),
+            Colonne('nombre_interventions', "Nb Interv.", 80, ancre="e"),
+            Colonne('cout_total', "Cout Total", 100, lambda v: f"{v or 0:.2f} EUR", ancre="e"),
+            Colonne('duree_totale', "Duree (min)", 90, ancre="e"),
+        ]
 
-        equipements = data_access.obtenir_equipements_sollicites(10)
+        def calcul():
+            return (data_access.compter_equipements_sollicites(),
+                    data_access.obtenir_page_equipements_sollicites('nombre_interventions', True,
+                                                                    TAILLE_PAGE_DEFAUT, 0))
 
-        headers = ["Equipement", "Type", "Nb Interv.", "Cout Total", "Duree (min)"]
-        rows = [
-            (eq['nom'][:25], eq['type'], eq['nombre_interventions'],
-             f"{eq['cout_total']:.2f} EUR", eq['duree_totale'])
-            for eq in equipements
-        ]
+        def affichage(resultat):
+            total, premiere_page = resultat
+            self._afficher_grille(colonnes, data_access.obtenir_page_equipements_sollicites,
+                                  data_access.compter_equipements_sollicites,
+                                  'nombre_interventions', True, total, premiere_page)
 
-        self._append_text("\n")
-        self._append_text(self._format_table(headers, rows, [25, 18, 10, 12, 12]))
-        self._finalize_text()
+        self._lancer_rapport("Equipements les Plus Sollicites", calcul, affichage)
 
     def show_frequence_par_type(self):
         """Affiche la frequence des interventions par type."""
-        self._clear_and_set_title("Frequence des Interventions par Type")
+        def affichage(frequences):
+            headers = ["Type", "Nombre", "Cout Total", "Cout Moyen", "Duree Moy."]
+            rows = [
+                (f['type_intervention'], f['nombre'], f"{f['cout_total']:.2f} EUR",
+                 f"{f['cout_moyen']:.2f} EUR", f"{f['duree_moyenne']:.0f} min")
+                for f in frequences
+            ]
 
-        frequences = data_access.obtenir_frequence_par_type()
+            self._append_text("\n")
+            self._append_table(headers, rows, [15, 8, 12, 12, 12])
 
-        headers = ["Type", "Nombre", "Cout Total", "Cout Moyen", "Duree Moy."]
-        rows = [
-            (f['type_intervention'], f['nombre'], f"{f['cout_total']:.2f} EUR",
-             f"{f['cout_moyen']:.2f} EUR", f"{f['duree_moyenne']:.0f} min")
-            for f in frequences
-        ]
-
-        self._append_text("\n")
-        self._append_text(self._format_table(headers, rows, [15, 8, 12, 12, 12]))
-        self._finalize_text()
+        self._lancer_rapport("Frequence des Interventions par Type",
+                             data_access.obtenir_frequence_par_type, affichage)
 
     def show_cout_par_type(self):
         """Affiche le cout par type d'equipement."""
-        self._clear_and_set_title("Cout de Maintenance par Type d'Equipement")
+        def affichage(couts):
+            headers = ["Type Equipement", "Nb Equip.", "Nb Interv.", "Cout Total", "Cout Moy."]
+            rows = [
+                (c['type'], c['nombre_equipements'], c['nombre_interventions'],
+                 f"{c['cout_total'] or 0:.2f} EUR", f"{c['cout_moyen_intervention'] or 0:.2f} EUR")
+                for c in couts
+            ]
 
-        couts = data_access.obtenir_cout_par_type_equipement()
+            self._append_text("\n")
+            self._append_table(headers, rows, [20, 10, 10, 12, 12])
 
-        headers = ["Type Equipement", "Nb Equip.", "Nb Interv.", "Cout Total", "Cout Moy."]
-        rows = [
-            (c['type'], c['nombre_equipements'], c['nombre_interventions'],
-             f"{c['cout_total'] or 0:.2f} EUR", f"{c['cout_moyen_intervention'] or 0:.2f} EUR")
-            for c in couts
-        ]
-
-        self._append_text("\n")
-        self._append_text(self._format_table(headers, rows, [20, 10, 10, 12, 12]))
-        self._finalize_text()
+        self._lancer_rapport("Cout de Maintenance par Type d'Equipement",
+                             data_access.obtenir_cout_par_type_equipement, affichage)
 
     def show_taux_disponibilite(self):
         """Affiche le taux de disponibilite."""
-        self._clear_and_set_title("Taux de Disponibilite par Type (Calcul Python)")
+        def affichage(taux):
+            self._append_text("\n  [Indicateur calcule cote Python, pas en SQL]\n\n")
 
-        taux = business_logic.calculer_taux_disponibilite()
+            for type_eq, pourcentage in taux.items():
+                barre = "=" * int(pourcentage / 5) + "-" * (20 - int(pourcentage / 5))
+                self._append_text(f"  {type_eq:22} : [{barre}] {pourcentage:.1f}%\n")
 
-        self._append_text("\n  [Indicateur calcule cote Python, pas en SQL]\n\n")
-
-        for type_eq, pourcentage in taux.items():
-            barre = "=" * int(pourcentage / 5) + "-" * (20 - int(pourcentage / 5))
-            self._append_text(f"  {type_eq:22} : [{barre}] {pourcentage:.1f}%\n")
-
-        self._finalize_text()
+        self._lancer_rapport("Taux de Disponibilite par Type (Calcul Python)",
+                             business_logic.calculer_taux_disponibilite, affichage)
 
     def show_indice_fiabilite(self):
         """Affiche l'indice de fiabilite."""
-        self._clear_and_set_title("Indice de Fiabilite des Equipements (Calcul Python)")
-
-        fiabilite = business_logic.calculer_indice_fiabilite()
+        def affichage(fiabilite):
+            self._append_text("\n  [Indicateur calcule cote Python: score base sur pannes, couts et age]\n\n")
 
-        self._append_text("\n  [Indicateur calcule cote Python: score base sur pannes, couts et age]\n\n")
+            headers = ["Equipement", "Type", "Age", "Pannes", "Cout", "Indice"]
+            rows = [
+                (f['nom'][:22], f['type'][:15], f"{f['age_annees']}a",
+                 f['nb_pannes'], f"{f['cout_total']:.0f} EUR", f"{f['indice_fiabilite']}/100")
+                for f in fiabilite
+            ]
 
-        headers = ["Equipement", "Type", "Age", "Pannes", "Cout", "Indice"]
-        rows = [
-            (f['nom'][:22], f['type'][:15], f"{f['age_annees']}a",
-             f['nb_pannes'], f"{f['cout_total']:.0f} EUR", f"{f['indice_fiabilite']}/100")
-            for f in fiabilite
-        ]
+            self._append_table(headers, rows, [22, 15, 5, 7, 10, 8])
 
-        self._append_text(self._format_table(headers, rows, [22, 15, 5, 7, 10, 8]))
-        self._finalize_text()
+        self._lancer_rapport("Indice de Fiabilite des Equipements (Calcul Python)",
+                             business_logic.calculer_indice_fiabilite, affichage)
 
     def show_tendance_couts(self):
         """Affiche la tendance des couts."""
-        self._clear_and_set_title("Tendance des Couts 2024 (Calcul Python)")
-
-        tendance = business_logic.calculer_tendance_couts(2024)
-
-        self._append_text("\n  [Indicateur calcule cote Python: analyse semestrielle]\n")
-        self._append_text(f"""
+        def affichage(tendance):
+            self._append_text("\n  [Indicateur calcule cote Python: analyse semestrielle]\n")
+            self._append_text(f"""
   Tendance globale    : {tendance['tendance'].upper()}
   Variation S1 -> S2  : {tendance['variation_pct']:+.1f}%
   Cout 1er semestre   : {tendance.get('cout_s1', 0):,.2f} EUR
   Cout 2nd semestre   : {tendance.get('cout_s2', 0):,.2f} EUR
 """)
 
-        self._append_text("\n  Detail par mois:\n")
-        noms_mois = ['', 'Jan', 'Fev', 'Mar', 'Avr', 'Mai', 'Jun',
-                     'Jul', 'Aou', 'Sep', 'Oct', 'Nov', 'Dec']
+            self._append_text("\n  Detail par mois:\n")
+            noms_mois = ['', 'Jan', 'Fev', 'Mar', 'Avr', 'Mai', 'Jun',
+                         'Jul', 'Aou', 'Sep', 'Oct', 'Nov', 'Dec']
 
-        for mois, cout in tendance['detail_mois'].items():
-            barre = "=" * int(cout / 50) if cout > 0 else ""
-            self._append_text(f"    {noms_mois[mois]:3} : {barre} {cout:.0f} EUR\n")
+            for mois, cout in tendance['detail_mois'].items():
+                barre = "=" * int(cout / 50) if cout > 0 else ""
+                self._append_text(f"    {noms_mois[mois]:3} : {barre} {cout:.0f} EUR\n")
 
-        self._finalize_text()
+        self._lancer_rapport("Tendance des Couts 2024 (Calcul Python)",
+                             lambda: business_logic.calculer_tendance_couts(2024), affichage)
 
     def show_alertes(self):
         """Affiche les alertes de maintenance."""
-        self._clear_and_set_title("Alertes de Maintenance (Calcul Python)")
+        def affichage(alertes):
+            self._append_text("\n  [Alertes generees par analyse Python des donnees]\n\n")
 
-        alertes = business_logic.generer_alertes()
-
-        self._append_text("\n  [Alertes generees par analyse Python des donnees]\n\n")
-
-        if not alertes:
-            self._append_text("  Aucune alerte\n")
-        else:
-            for niveau in ['CRITIQUE', 'ATTENTION', 'INFO']:
-                alertes_niveau = [a for a in alertes if a['niveau'] == niveau]
-                if alertes_niveau:
-                    symbole = {'CRITIQUE': '[!]', 'ATTENTION': '[*]', 'INFO': '[i]'}[niveau]
-                    self._append_text(f"  {symbole} {niveau}:\n")
-                    for alerte in alertes_niveau:
-                        self._append_text(f"     - {alerte['equipement']}: {alerte['message']}\n")
-                    self._append_text("\n")
-
-        self._finalize_text()
+            if not alertes:
+                self._append_text("  Aucune alerte\n")
+            else:
+                for niveau in ['CRITIQUE', 'ATTENTION', 'INFO']:
+                    alertes_niveau = [a for a in alertes if a['niveau'] == niveau]
+                    if alertes_niveau:
+                        symbole = {'CRITIQUE': '[!]', 'ATTENTION': '[*]', 'INFO': '[i]'}[niveau]
+                        self._append_text(f"  {symbole} {niveau}:\n")
+                        for alerte in alertes_niveau:
+                            self._append_text(f"     - {alerte['equipement']}: {alerte['message']}\n")
+                        self._append_text("\n")
+
+        self._lancer_rapport("Alertes de Maintenance (Calcul Python)",
+                             business_logic.generer_alertes, affichage)
 
     def show_interventions_mois(self):
         """Affiche les interventions par mois."""
-        self._clear_and_set_title("Interventions par Mois (2024)")
-
-        interventions = data_access.obtenir_interventions_par_mois(2024)
-
-        noms_mois = {
-            '01': 'Janvier', '02': 'Fevrier', '03': 'Mars', '04': 'Avril',
-            '05': 'Mai', '06': 'Juin', '07': 'Juillet', '08': 'Aout',
-            '09': 'Septembre', '10': 'Octobre', '11': 'Novembre', '12': 'Decembre'
-        }
-
-        headers = ["Mois", "Nb Interv.", "Cout Total", "Duree Totale"]
-        rows = [
-            (noms_mois.get(i['mois'], i['mois']), i['nombre_interventions'],
-             f"{i['cout_total']:.2f} EUR", f"{i['duree_totale']} min")
-            for i in interventions
-        ]
-
-        self._append_text("\n")
-        self._append_text(self._format_table(headers, rows, [12, 12, 12, 14]))
-        self._finalize_text()
+        def affichage(interventions):
+            noms_mois = {
+                '01': 'Janvier', '02': 'Fevrier', '03': 'Mars', '04': 'Avril',
+                '05': 'Mai', '06': 'Juin', '07': 'Juillet', '08': 'Aout',
+                '09': 'Septembre', '10': 'Octobre', '11': 'Novembre', '12': 'Decembre'
+            }
+
+            headers = ["Mois", "Nb Interv.", "Cout Total", "Duree Totale"]
+            rows = [
+                (noms_mois.get(i['mois'], i['mois']), i['nombre_interventions'],
+                 f"{i['cout_total']:.2f} EUR", f"{i['duree_totale']} min")
+                for i in interventions
+            ]
+
+            self._append_text("\n")
+            self._append_table(headers, rows, [12, 12, 12, 14])
+
+        self._lancer_rapport("Interventions par Mois (2024)",
+                             lambda: data_access.obtenir_interventions_par_mois(2024), affichage)
 
     def show_performance_techniciens(self):
-        """Affiche la performance des techniciens."""
-        self._clear_and_set_title("Performance des Techniciens")
+        """Affiche la performance des techniciens (grille triable)."""
+        colonnes = [
+            Colonne('technicien', "Technicien", 180),
+            Colonne('specialite', "Specialite", 160),
+            Colonne('nombre_interventions', "Nb Interv.", 80, ancre="e"),
+            Colonne('temps_total', "Temps Total", 100, lambda v: f"{v or 0} min", ancre="e"),
+            Colonne('valeur_interventions', "Valeur", 100, lambda v: f"{v or 0:.0f} EUR", ancre="e"),
+        ]
 
-        perf = data_access.obtenir_performance_techniciens()
+        def calcul():
+            return (data_access.compter_techniciens(),
+                    data_access.obtenir_page_performance_techniciens('nombre_interventions', True,
+                                                                     TAILLE_PAGE_DEFAUT, 0))
 
-        headers = ["Technicien", "Specialite", "Nb Interv.", "Temps Total", "Valeur"]
-        rows = [
-            (p['technicien'], p['specialite'][:12], p['nombre_interventions'],
-             f"{p['temps_total'] or 0} min", f"{p['valeur_interventions'] or 0:.0f} EUR")
-            for p in perf
-        ]
+        def affichage(resultat):
+            total, premiere_page = resultat
+            self._afficher_grille(colonnes, data_access.obtenir_page_performance_techniciens,
+                                  data_access.compter_techniciens,
+                                  'nombre_interventions', True, total, premiere_page)
 
-        self._append_text("\n")
-        self._append_text(self._format_table(headers, rows, [20, 12, 10, 12, 10]))
-        self._finalize_text()
+        self._lancer_rapport("Performance des Techniciens", calcul, affichage)
 
     def show_historique_equipement(self):
         """Affiche l'historique d'un equipement."""
+        self._annuler_rapport()
         self._clear_and_set_title("Historique d'un Equipement")
 
-        # Lister les equipements
-        equipements = data_access.obtenir_tous_equipements()
-
-        # Creer la liste pour le choix
-        choix_list = [f"{eq['id']}. {eq['nom']} ({eq['type']})" for eq in equipements]
-
-        # Boite de dialogue pour choisir
-        choix = simpledialog.askstring(
+        # Recherche de l'equipement (nom, numero de serie ou localisation)
+        choix = self._choisir_par_recherche(
             "Choix de l'equipement",
-            "Entrez le numero de l'equipement:\n\n" + "\n".join(choix_list),
-            parent=self.root
+            "Rechercher un equipement (nom, numero de serie, localisation):",
+            data_access.rechercher_equipements, libelle_equipement
         )
 
         if not choix:
@@ -508,85 +702,315 @@ class MaintenanceApp:
             self._finalize_text()
             return
 
-        try:
-            eq_id = int(choix)
+        eq_id = choix['id']
+
+        colonnes = [
+            Colonne('date_intervention', "Date", 90),
+            Colonne('type_intervention', "Type", 90),
+            Colonne('description', "Description", 240),
+            Colonne('duree_minutes', "Duree", 60, lambda v: f"{v}m", ancre="e"),
+            Colonne('cout', "Cout", 80, lambda v: f"{v:.0f} EUR", ancre="e"),
+            Colonne('statut', "Statut", 80),
+            Colonne('technicien', "Technicien", 140),
+        ]
+
+        def paginer(descendant, limite, curseur):
+            # Tri par date: pagination par cle; en ordre croissant, depuis les plus anciennes
+            # avec curseur_precedent (pages rendues du plus recent au plus ancien)
+            if descendant:
+                page = data_access.paginer_historique_equipement(eq_id, limite, curseur)
+                return page['lignes'], page['curseur_suivant']
+            page = data_access.paginer_historique_equipement(eq_id, limite, curseur, depuis_la_fin=True)
+            return page['lignes'][::-1], page['curseur_precedent']
+
+        def page_decalage(tri, descendant, limite, decalage):
+            return data_access.obtenir_page_historique_equipement(eq_id, tri, descendant, limite, decalage)
+
+        # Pagination par cle pour le tri par date, LIMIT / OFFSET pour les autres colonnes
+        source = SourceParCurseur('date_intervention', paginer, page_decalage)
+
+        def compter():
+            return data_access.compter_historique_equipement(eq_id)
+
+        def calcul():
             equipement = data_access.obtenir_equipement_par_id(eq_id)
+            if not equipement:
+                return None, 0, []
+            return equipement, compter(), source('date_intervention', True, TAILLE_PAGE_DEFAUT, 0)
 
+        def affichage(resultat):
+            equipement, total, premiere_page = resultat
             if not equipement:
                 self._append_text("\n  Equipement non trouve.\n")
-                self._finalize_text()
                 return
 
-            self._append_text(f"\n  Historique de: {equipement['nom']}\n")
-            self._append_text(f"  Type: {equipement['type']} | Localisation: {equipement['localisation']}\n")
-            self._append_text(f"  Statut actuel: {equipement['statut']}\n\n")
-
-            historique = data_access.obtenir_historique_equipement(eq_id)
-
-            if historique:
-                headers = ["Date", "Type", "Description", "Duree", "Cout", "Technicien"]
-                rows = [
-                    (h['date_intervention'], h['type_intervention'][:10],
-                     h['description'][:25], f"{h['duree_minutes']}m",
-                     f"{h['cout']:.0f} EUR", h['technicien'][:15])
-                    for h in historique
-                ]
-                self._append_text(self._format_table(headers, rows, [12, 10, 25, 6, 8, 15]))
+            entete = [
+                f"Historique de: {equipement['nom']}",
+                f"Type: {equipement['type']} | Localisation: {equipement['localisation']}",
+                f"Statut actuel: {equipement['statut']}",
+            ]
+            if total:
+                self._afficher_grille(colonnes, source, compter, 'date_intervention', True,
+                                      total, premiere_page, "\n".join(entete))
             else:
+                self._append_text("\n" + "".join(f"  {ligne}\n" for ligne in entete) + "\n")
                 self._append_text("  Aucune intervention enregistree.\n")
 
-        except ValueError:
-            self._append_text("\n  Entree invalide.\n")
+        self._lancer_rapport("Historique d'un Equipement", calcul, affichage)
 
-        self._finalize_text()
+    def _demander_criteres_recherche(self):
+        """Fenetre modale des criteres de recherche; retourne les criteres ou None si annule."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Recherche dans les interventions")
+        dialog.configure(bg=self.bg_color)
+        dialog.transient(self.root)
+
+        # Centrer la fenêtre
+        dialog.update_idletasks()
+        x = (dialog.winfo_screenwidth() // 2) - (460 // 2)
+        y = (dialog.winfo_screenheight() // 2) - (300 // 2)
+        dialog.geometry(f'460x300+{x}+{y}')
+
+        fields_frame = tk.Frame(dialog, bg=self.bg_color)
+        fields_frame.pack(padx=20, pady=15, fill=tk.BOTH, expand=True)
+
+        criteres = self.criteres_recherche
+        fields = {}
+        libelles = [
+            ('texte', "Mots recherches *"),
+            ('date_debut', "Depuis le\n(YYYY-MM-DD)"),
+            ('date_fin', "Avant le (exclu)\n(YYYY-MM-DD)"),
+        ]
+        for row, (cle, libelle) in enumerate(libelles):
+            tk.Label(fields_frame, text=libelle, bg=self.bg_color, font=("Segoe UI", 9)).grid(row=row, column=0, sticky="w", pady=5)
+            fields[cle] = tk.Entry(fields_frame, font=("Segoe UI", 10), width=28)
+            fields[cle].grid(row=row, column=1, pady=5, padx=10)
+            fields[cle].insert(0, criteres[cle])
+
+        listes = [
+            ('type_equipement', "Type d'equipement", data_access.TYPES_EQUIPEMENT),
+            ('type_intervention', "Type d'intervention", data_access.TYPES_INTERVENTION),
+        ]
+        for row, (cle, libelle, valeurs) in enumerate(listes, len(libelles)):
+            tk.Label(fields_frame, text=libelle, bg=self.bg_color, font=("Segoe UI", 9)).grid(row=row, column=0, sticky="w", pady=5)
+            fields[cle] = ttk.Combobox(fields_frame, font=("Segoe UI", 10), width=26,
+                                       values=[TOUS, *valeurs], state='readonly')
+            fields[cle].grid(row=row, column=1, pady=5, padx=10)
+            fields[cle].set(criteres[cle])
+
+        resultat = {}
+
+        def rechercher(event=None):
+            texte = fields['texte'].get().strip()
+            if not texte:
+                messagebox.showerror("Erreur", "Saisissez au moins un mot", parent=dialog)
+                return
+            resultat.update({cle: champ.get().strip() for cle, champ in fields.items()})
+            dialog.destroy()
+
+        buttons_frame = tk.Frame(dialog, bg=self.bg_color)
+        buttons_frame.pack(pady=10)
+        tk.Button(buttons_frame, text="Rechercher", command=rechercher, bg=self.accent_color,
+                  fg="white", font=("Segoe UI", 10), padx=20, pady=5, cursor="hand2").pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Annuler", command=dialog.destroy, bg="#95a5a6",
+                  fg="white", font=("Segoe UI", 10), padx=20, pady=5, cursor="hand2").pack(side=tk.LEFT, padx=5)
+        dialog.bind("<Return>", rechercher)
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+
+        dialog.grab_set()
+        fields['texte'].focus_set()
+        self.root.wait_window(dialog)
+        if resultat:
+            self.criteres_recherche = resultat
+        return resultat or None
+
+    def show_recherche_interventions(self):
+        """Recherche plein texte dans les descriptions d'interventions."""
+        self._annuler_rapport()
+        self._clear_and_set_title("Recherche dans les Interventions")
+
+        criteres = self._demander_criteres_recherche()
+        if not criteres:
+            self._append_text("\n  Operation annulee.\n")
+            self._finalize_text()
+            return
+
+        # Champs vides et "(tous)": pas de filtre
+        filtres = {cle: valeur for cle, valeur in criteres.items()
+                   if cle != 'texte' and valeur and valeur != TOUS}
+
+        def calcul():
+            return data_access.rechercher_interventions(criteres['texte'], marques=MARQUES_SURLIGNAGE,
+                                                        **filtres)
+
+        def affichage(resultats):
+            self._append_text(f"\n  Recherche: {criteres['texte']}\n")
+            if filtres:
+                self._append_text("  Filtres: " + ", ".join(f"{cle}={valeur}" for cle, valeur in filtres.items()) + "\n")
+            if not resultats:
+                self._append_text("\n  Aucune intervention trouvee.\n")
+                return
+
+            limite = " (limite atteinte)" if len(resultats) >= data_access.LIMITE_RECHERCHE_TEXTE else ""
+            self._append_text(f"  {len(resultats)} intervention(s), les plus pertinentes d'abord{limite}\n\n")
+            for r in resultats:
+                self._append_text(f"  {r['date_intervention']}  {r['equipement']} ({r['equipement_type']})"
+                                  f"  -  {r['type_intervention']}, {r['technicien']}, {r['cout']:.0f} EUR\n")
+                self._append_text("      ")
+                self._append_surligne(r['extrait'])
+                self._append_text("\n\n")
+
+        self._lancer_rapport("Recherche dans les Interventions", calcul, affichage)
 
     def show_rapport_synthese(self):
         """Affiche le rapport de synthese complet."""
-        self._clear_and_set_title("Rapport de Synthese Complet")
-
-        rapport = business_logic.generer_rapport_synthese()
-
-        # Indicateurs globaux
-        self._append_text("\n  INDICATEURS GLOBAUX\n")
-        self._append_text("  " + "-" * 40 + "\n")
-        ig = rapport['indicateurs_globaux']
-        self._append_text(f"    Cout total        : {ig['cout_total']:,.2f} EUR\n")
-        self._append_text(f"    Interventions     : {ig['nombre_interventions']}\n")
-        self._append_text(f"    Duree moyenne     : {ig['duree_moyenne_minutes']:.1f} min\n")
-
-        # Taux de disponibilite
-        self._append_text("\n  TAUX DE DISPONIBILITE\n")
-        self._append_text("  " + "-" * 40 + "\n")
-        for type_eq, taux in rapport['taux_disponibilite'].items():
-            self._append_text(f"    {type_eq:22} : {taux:.1f}%\n")
-
-        # Tendance
-        self._append_text("\n  TENDANCE DES COUTS\n")
-        self._append_text("  " + "-" * 40 + "\n")
-        tend = rapport['tendance_couts']
-        self._append_text(f"    Tendance  : {tend['tendance'].upper()}\n")
-        self._append_text(f"    Variation : {tend['variation_pct']:+.1f}%\n")
-
-        # Top equipements
-        self._append_text("\n  TOP 5 EQUIPEMENTS SOLLICITES\n")
-        self._append_text("  " + "-" * 40 + "\n")
-        for i, eq in enumerate(rapport['top_equipements_sollicites'][:5], 1):
-            self._append_text(f"    {i}. {eq['nom'][:25]} - {eq['nombre_interventions']} interv. ({eq['cout_total']:.0f} EUR)\n")
-
-        # Alertes
-        self._append_text("\n  ALERTES\n")
-        self._append_text("  " + "-" * 40 + "\n")
-        alertes_critiques = [a for a in rapport['alertes'] if a['niveau'] == 'CRITIQUE']
-        if alertes_critiques:
-            for a in alertes_critiques[:3]:
-                self._append_text(f"    [!] {a['equipement']}: {a['message'][:45]}\n")
-        else:
-            self._append_text("    Aucune alerte critique\n")
+        def affichage(rapport):
+            # Indicateurs globaux
+            self._append_text("\n  INDICATEURS GLOBAUX\n")
+            self._append_text("  " + "-" * 40 + "\n")
+            ig = rapport['indicateurs_globaux']
+            self._append_text(f"    Cout total        : {ig['cout_total']:,.2f} EUR\n")
+            self._append_text(f"    Interventions     : {ig['nombre_interventions']}\n")
+            self._append_text(f"    Duree moyenne     : {ig['duree_moyenne_minutes']:.1f} min\n")
+
+            # Taux de disponibilite
+            self._append_text("\n  TAUX DE DISPONIBILITE\n")
+            self._append_text("  " + "-" * 40 + "\n")
+            for type_eq, taux in rapport['taux_disponibilite'].items():
+                self._append_text(f"    {type_eq:22} : {taux:.1f}%\n")
+
+            # Tendance
+            self._append_text("\n  TENDANCE DES COUTS\n")
+            self._append_text("  " + "-" * 40 + "\n")
+            tend = rapport['tendance_couts']
+            self._append_text(f"    Tendance  : {tend['tendance'].upper()}\n")
+            self._append_text(f"    Variation : {tend['variation_pct']:+.1f}%\n")
+
+            # Top equipements
+            self._append_text("\n  TOP 5 EQUIPEMENTS SOLLICITES\n")
+            self._append_text("  " + "-" * 40 + "\n")
+            for i, eq in enumerate(rapport['top_equipements_sollicites'][:5], 1):
+                self._append_text(f"    {i}. {eq['nom'][:25]} - {eq['nombre_interventions']} interv. ({eq['cout_total']:.0f} EUR)\n")
+
+            # Alertes
+            self._append_text("\n  ALERTES\n")
+            self._append_text("  " + "-" * 40 + "\n")
+            alertes_critiques = [a for a in rapport['alertes'] if a['niveau'] == 'CRITIQUE']
+            if alertes_critiques:
+                for a in alertes_critiques[:3]:
+                    self._append_text(f"    [!] {a['equipement']}: {a['message'][:45]}\n")
+            else:
+                self._append_text("    Aucune alerte critique\n")
 
-        self._finalize_text()
+        self._lancer_rapport("Rapport de Synthese Complet",
+                             business_logic.generer_rapport_synthese, affichage)
+
+    def _demander_export(self):
+        """Fenetre modale du choix de l'export; retourne les options ou None si annule."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Exporter un rapport")
+        dialog.configure(bg=self.bg_color)
+        dialog.transient(self.root)
+
+        # Centrer la fenêtre
+        dialog.update_idletasks()
+        x = (dialog.winfo_screenwidth() // 2) - (420 // 2)
+        y = (dialog.winfo_screenheight() // 2) - (240 // 2)
+        dialog.geometry(f'420x240+{x}+{y}')
+
+        fields_frame = tk.Frame(dialog, bg=self.bg_color)
+        fields_frame.pack(padx=20, pady=15, fill=tk.BOTH, expand=True)
+
+        listes = [
+            ('rapport', "Rapport", list(export.RAPPORTS)),
+            ('format', "Format", list(export.FORMATS_EXPORT)),
+        ]
+        fields = {}
+        for row, (cle, libelle, valeurs) in enumerate(listes):
+            tk.Label(fields_frame, text=libelle, bg=self.bg_color, font=("Segoe UI", 9)).grid(row=row, column=0, sticky="w", pady=5)
+            fields[cle] = ttk.Combobox(fields_frame, font=("Segoe UI", 10), width=26, values=valeurs, state='readonly')
+            fields[cle].grid(row=row, column=1, pady=5, padx=10)
+            fields[cle].set(valeurs[0])
+
+        tk.Label(fields_frame, text="Annee", bg=self.bg_color, font=("Segoe UI", 9)).grid(row=2, column=0, sticky="w", pady=5)
+        fields['annee'] = tk.Entry(fields_frame, font=("Segoe UI", 10), width=28)
+        fields['annee'].grid(row=2, column=1, pady=5, padx=10)
+        fields['annee'].insert(0, str(export.PARAMETRES_DEFAUT['annee']))
+
+        compresser = tk.BooleanVar(value=False)
+        tk.Checkbutton(fields_frame, text="Compresser (gzip)", variable=compresser, bg=self.bg_color,
+                       font=("Segoe UI", 9)).grid(row=3, column=1, sticky="w", pady=5, padx=10)
+
+        resultat = {}
+
+        def valider(event=None):
+            try:
+                annee = int(fields['annee'].get().strip())
+            except ValueError:
+                messagebox.showerror("Erreur", "Annee invalide", parent=dialog)
+                return
+            resultat.update(rapport=fields['rapport'].get(), format=fields['format'].get(),
+                            compresser=compresser.get(), annee=annee)
+            dialog.destroy()
+
+        buttons_frame = tk.Frame(dialog, bg=self.bg_color)
+        buttons_frame.pack(pady=10)
+        tk.Button(buttons_frame, text="Exporter", command=valider, bg=self.accent_color,
+                  fg="white", font=("Segoe UI", 10), padx=20, pady=5, cursor="hand2").pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Annuler", command=dialog.destroy, bg="#95a5a6",
+                  fg="white", font=("Segoe UI", 10), padx=20, pady=5, cursor="hand2").pack(side=tk.LEFT, padx=5)
+        dialog.bind("<Return>", valider)
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+        return resultat or None
+
+    def show_export(self):
+        """Exporte un rapport en CSV ou JSON Lines (ecriture en arriere-plan, par paquets)."""
+        self._annuler_rapport()
+        self._clear_and_set_title("Export")
+
+        options = self._demander_export()
+        parametres = {}
+        if options and 'equipement_id' in export.RAPPORTS[options['rapport']][1]:
+            choix = self._choisir_par_recherche(
+                "Choix de l'equipement",
+                "Rechercher un equipement (nom, numero de serie, localisation):",
+                data_access.rechercher_equipements, libelle_equipement
+            )
+            parametres['equipement_id'] = choix['id'] if choix else None
+            if not choix:
+                options = None
+        if options:
+            extension = f".{options['format']}" + (".gz" if options['compresser'] else "")
+            chemin = filedialog.asksaveasfilename(parent=self.root, title="Exporter vers",
+                                                  initialfile=options['rapport'] + extension,
+                                                  defaultextension=extension)
+            if not chemin:
+                options = None
+
+        if not options:
+            self._append_text("\n  Operation annulee.\n")
+            self._finalize_text()
+            return
+
+        def calcul():
+            return export.exporter(options['rapport'], chemin, options['format'], options['compresser'],
+                                   annee=options['annee'], **parametres)
+
+        def affichage(bilan):
+            self._append_text(f"\n  Export termine: {bilan['fichier']}\n\n")
+            self._append_text(f"    Rapport  : {bilan['rapport']} ({bilan['format']})\n")
+            self._append_text(f"    Lignes   : {bilan['lignes']}\n")
+            self._append_text(f"    Taille   : {bilan['octets'] / 1024:,.0f} Kio\n")
+            self._append_text(f"    Duree    : {bilan['secondes']:.1f} s ({bilan['lignes_par_seconde'] or 0} lignes/s)\n")
+
+        self._lancer_rapport("Export", calcul, affichage)
 
     def add_technicien(self):
         """Formulaire d'ajout de technicien."""
+        self._annuler_rapport()
         self._clear_and_set_title("Ajouter un Technicien")
 
         # Créer une fenêtre de dialogue personnalisée
@@ -682,6 +1106,7 @@ class MaintenanceApp:
 
     def add_equipement(self):
         """Formulaire d'ajout d'équipement."""
+        self._annuler_rapport()
         self._clear_and_set_title("Ajouter un Equipement")
 
         dialog = tk.Toplevel(self.root)
@@ -806,20 +1231,21 @@ class MaintenanceApp:
 
     def add_intervention(self):
         """Formulaire d'ajout d'intervention."""
+        self._annuler_rapport()
         self._clear_and_set_title("Ajouter une Intervention")
 
         dialog = tk.Toplevel(self.root)
         dialog.title("Nouvelle Intervention")
-        dialog.geometry("500x500")
+        dialog.geometry("560x680")
         dialog.configure(bg=self.bg_color)
         dialog.transient(self.root)
         dialog.grab_set()
 
         # Centrer la fenêtre
         dialog.update_idletasks()
-        x = (dialog.winfo_screenwidth() // 2) - (500 // 2)
-        y = (dialog.winfo_screenheight() // 2) - (500 // 2)
-        dialog.geometry(f'500x500+{x}+{y}')
+        x = (dialog.winfo_screenwidth() // 2) - (560 // 2)
+        y = (dialog.winfo_screenheight() // 2) - (680 // 2)
+        dialog.geometry(f'560x680+{x}+{y}')
 
         tk.Label(dialog, text="Nouvelle Intervention", font=("Segoe UI", 14, "bold"),
                 bg=self.bg_color, fg=self.text_color).pack(pady=15)
@@ -830,28 +1256,19 @@ class MaintenanceApp:
         fields = {}
         row = 0
 
-        # Récupérer les équipements et techniciens
-        equipements = data_access.obtenir_tous_equipements()
-        techniciens = data_access.obtenir_tous_techniciens()
-
-        # Equipement (liste déroulante)
-        tk.Label(fields_frame, text="Equipement *", bg=self.bg_color, font=("Segoe UI", 9)).grid(row=row, column=0, sticky="w", pady=5)
-        equipement_choices = [f"{eq['id']} - {eq['nom']}" for eq in equipements]
-        fields['equipement'] = ttk.Combobox(fields_frame, font=("Segoe UI", 9), width=30,
-                                           values=equipement_choices, state='readonly')
+        # Equipement et technicien: recherche en base pendant la saisie (pas de liste complète)
+        tk.Label(fields_frame, text="Equipement *\n(recherche)", bg=self.bg_color, font=("Segoe UI", 9)).grid(row=row, column=0, sticky="nw", pady=5)
+        fields['equipement'] = SelecteurRecherche(fields_frame, data_access.rechercher_equipements,
+                                                  libelle_equipement, hauteur=4, largeur=42,
+                                                  executeur=self.executeur)
         fields['equipement'].grid(row=row, column=1, pady=5, padx=10)
-        if equipements:
-            fields['equipement'].current(0)
         row += 1
 
-        # Technicien (liste déroulante)
-        tk.Label(fields_frame, text="Technicien *", bg=self.bg_color, font=("Segoe UI", 9)).grid(row=row, column=0, sticky="w", pady=5)
-        technicien_choices = [f"{t['id']} - {t['prenom']} {t['nom']}" for t in techniciens]
-        fields['technicien'] = ttk.Combobox(fields_frame, font=("Segoe UI", 9), width=30,
-                                           values=technicien_choices, state='readonly')
+        tk.Label(fields_frame, text="Technicien *\n(recherche)", bg=self.bg_color, font=("Segoe UI", 9)).grid(row=row, column=0, sticky="nw", pady=5)
+        fields['technicien'] = SelecteurRecherche(fields_frame, data_access.rechercher_techniciens,
+                                                  libelle_technicien, hauteur=4, largeur=42,
+                                                  executeur=self.executeur)
         fields['technicien'].grid(row=row, column=1, pady=5, padx=10)
-        if techniciens:
-            fields['technicien'].current(0)
         row += 1
 
         # Date intervention
@@ -902,7 +1319,9 @@ class MaintenanceApp:
         def save():
             try:
                 # Validation
-                if not fields['equipement'].get() or not fields['technicien'].get():
+                equipement = fields['equipement'].selection
+                technicien = fields['technicien'].selection
+                if not equipement or not technicien:
                     messagebox.showerror("Erreur", "Veuillez sélectionner un équipement et un technicien", parent=dialog)
                     return
 
@@ -928,14 +1347,10 @@ class MaintenanceApp:
                     messagebox.showerror("Erreur", "Durée et coût doivent être des nombres valides", parent=dialog)
                     return
 
-                # Extraire les IDs
-                equipement_id = int(fields['equipement'].get().split(' - ')[0])
-                technicien_id = int(fields['technicien'].get().split(' - ')[0])
-
                 # Insertion
                 intervention_id = data_access.ajouter_intervention(
-                    equipement_id,
-                    technicien_id,
+                    equipement['id'],
+                    technicien['id'],
                     fields['date_intervention'].get().strip(),
                     fields['type_intervention'].get(),
                     description,
@@ -944,12 +1359,13 @@ class MaintenanceApp:
                     fields['statut'].get()
                 )
 
+                type_intervention = fields['type_intervention'].get()
                 messagebox.showinfo("Succès", f"Intervention ajoutée avec l'ID {intervention_id}", parent=dialog)
                 dialog.destroy()
 
                 self._append_text(f"\n✓ Intervention ajoutée (ID: {intervention_id})\n")
-                self._append_text(f"  Equipement: {fields['equipement'].get()}\n")
-                self._append_text(f"  Type: {fields['type_intervention'].get()}\n")
+                self._append_text(f"  Equipement: {libelle_equipement(equipement)}\n")
+                self._append_text(f"  Type: {type_intervention}\n")
                 self._append_text(f"  Cout: {cout_float} EUR\n")
                 self._finalize_text()
 
@@ -967,6 +1383,8 @@ class MaintenanceApp:
     def quit_app(self):
         """Ferme l'application."""
         if messagebox.askyesno("Quitter", "Voulez-vous vraiment quitter?"):
+            self._annuler_rapport()
+            self.executeur.shutdown(wait=False, cancel_futures=True)
             fermer_connexion()
             self.root.destroy()
 
@@ -0,0 +1,186 @@
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import db_connection
+import data_access
+
+
+# Tables importables: fonction d'insertion en masse et colonnes de la table
+TABLES = {
+    'techniciens': (data_access.ajouter_techniciens_en_masse, data_access.COLONNES_TECHNICIEN),
+    'equipements': (data_access.ajouter_equipements_en_masse, data_access.COLONNES_EQUIPEMENT),
+    'interventions': (data_access.ajouter_interventions_en_masse, data_access.COLONNES_INTERVENTION),
+}
+
+# Colonnes qui ont une valeur par défaut dans le schéma (facultatives dans le fichier)
+COLONNES_FACULTATIVES = {
+    'techniciens': (),
+    'equipements': ('marque', 'modele', 'statut'),
+    'interventions': ('statut',),
+}
+
+# Colonnes ajoutées au fichier des rejets
+COLONNES_REJET = ('ligne', 'lot', 'raison')
+
+# Délai minimal entre deux lignes de progression (secondes)
+INTERVALLE_PROGRESSION = 1.0
+
+
+def verifier_entete(table, entete):
+    """Liste des colonnes obligatoires absentes de l'en-tête du fichier."""
+    presentes = set(entete or ())
+    manquantes = []
+    for col in TABLES[table][1]:
+        if col in presentes or col in COLONNES_FACULTATIVES[table]:
+            continue
+        # Interventions: l'ID peut être remplacé par sa clé naturelle (numero_serie, email_technicien)
+        cle_naturelle = data_access.CLES_NATURELLES_INTERVENTION.get(col) if table == 'interventions' else None
+        if cle_naturelle and cle_naturelle[0] in presentes:
+            continue
+        manquantes.append(col if not cle_naturelle else f"{col} (ou {cle_naturelle[0]})")
+    return manquantes
+
+
+class FichierRejets:
+    """Fichier CSV des lignes rejetées: colonnes du fichier importé, puis ligne, lot et raison.
+
+    Le fichier n'est créé qu'au premier rejet.
+    """
+
+    def __init__(self, chemin, entete, colonnes_table, separateur=',', encodage='utf-8-sig'):
+        self.chemin = Path(chemin)
+        self.entete = [col for col in entete if col not in COLONNES_REJET]
+        self.colonnes_table = colonnes_table
+        self.separateur = separateur
+        self.encodage = encodage
+        self.nombre = 0
+        self._fichier = None
+        self._writer = None
+
+    def ecrire(self, rejet):
+        """Ajoute un rejet de data_access (valeurs: ligne lue, ou tuple inséré si la base l'a refusé)."""
+        if self._writer is None:
+            self._fichier = open(self.chemin, 'w', newline='', encoding=self.encodage)
+            self._writer = csv.DictWriter(self._fichier, self.entete + list(COLONNES_REJET),
+                                          delimiter=self.separateur, restval='', extrasaction='ignore')
+            self._writer.writeheader()
+        valeurs = rejet['valeurs']
+        if not isinstance(valeurs, dict):
+            valeurs = dict(zip(self.colonnes_table, valeurs))
+        # Numéro de ligne dans le fichier (l'en-tête est la ligne 1)
+        self._writer.writerow({**valeurs, 'ligne': rejet['ligne'] + 1, 'lot': rejet['lot'],
+                               'raison': rejet['raison']})
+        self.nombre += 1
+
+    def fermer(self):
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+            self._writer = None
+
+
+def importer_fichier(table, chemin, chemin_rejets=None, taille_lot=data_access.TAILLE_LOT_DEFAUT,
+                     separateur=',', encodage='utf-8-sig', afficher=print):
+    """Importe un fichier CSV dans une table, ligne par ligne, en lots d'une transaction.
+
+    La mémoire utilisée ne dépend pas de la taille du fichier: les lignes sont lues au fil
+    de l'eau et les rejets écrits dans chemin_rejets (défaut: <fichier>.rejets.csv) à la fin
+    de chaque lot. Retourne {'lues', 'inseres', 'rejetes', 'lots', 'secondes', 'lignes_par_seconde',
+    'fichier_rejets'}.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Table inconnue: {table} (tables disponibles: {', '.join(TABLES)})")
+    ajouter_en_masse, colonnes_table = TABLES[table]
+    chemin = Path(chemin)
+    chemin_rejets = Path(chemin_rejets) if chemin_rejets else chemin.with_name(chemin.stem + ".rejets.csv")
+
+    with open(chemin, newline='', encoding=encodage) as fichier:
+        reader = csv.DictReader(fichier, delimiter=separateur)
+        manquantes = verifier_entete(table, reader.fieldnames)
+        if manquantes:
+            raise ValueError(f"Colonnes absentes de {chemin.name}: {', '.join(manquantes)}")
+
+        rejets = FichierRejets(chemin_rejets, reader.fieldnames, colonnes_table, separateur, encodage)
+        debut = time.perf_counter()
+        progression = {'lues': 0, 'inseres': 0, 'rejetes': 0, 'affichage': debut}
+
+        def au_lot(bilan):
+            progression['lues'] += bilan['inseres'] + bilan['rejetes']
+            progression['inseres'] += bilan['inseres']
+            progression['rejetes'] += bilan['rejetes']
+            maintenant = time.perf_counter()
+            if afficher and maintenant - progression['affichage'] >= INTERVALLE_PROGRESSION:
+                progression['affichage'] = maintenant
+                debit = progression['lues'] / (maintenant - debut)
+                afficher(f"  lot {bilan['lot']}: {progression['lues']} lignes lues, "
+                         f"{progression['inseres']} insérées, {progression['rejetes']} rejetées "
+                         f"({debit:.0f} lignes/s)")
+
+        options = {'cles_naturelles': True} if table == 'interventions' else {}
+        try:
+            resultat = ajouter_en_masse(reader, taille_lot, au_rejet=rejets.ecrire, au_lot=au_lot, **options)
+        finally:
+            rejets.fermer()
+
+    duree = time.perf_counter() - debut
+    return {
+        'lues': progression['lues'],
+        'inseres': resultat['inseres'],
+        'rejetes': rejets.nombre,
+        'lots': len(resultat['lots']),
+        'secondes': round(duree, 3),
+        'lignes_par_seconde': round(progression['lues'] / duree) if duree else None,
+        'fichier_rejets': str(chemin_rejets) if rejets.nombre else None,
+    }
+
+
+def lire_arguments(argv=None):
+    """Analyse les options de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        description="Importe un fichier CSV (en-tête = noms des colonnes de la table)",
+        epilog="Interventions: numero_serie et email_technicien peuvent remplacer "
+               "equipement_id et technicien_id.")
+    parser.add_argument("table", choices=TABLES, help="table à alimenter")
+    parser.add_argument("fichier", help="fichier CSV à importer")
+    parser.add_argument("--rejets", help="fichier CSV des lignes rejetées (défaut: <fichier>.rejets.csv)")
+    parser.add_argument("--taille-lot", type=int, default=data_access.TAILLE_LOT_DEFAUT,
+                        help="lignes par transaction")
+    parser.add_argument("--separateur", default=',', help="séparateur de colonnes")
+    parser.add_argument("--encodage", default='utf-8-sig', help="encodage du fichier")
+    parser.add_argument("--base", help="base à alimenter (défaut: database/maintenance.db)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande (code de sortie 1 si des lignes sont rejetées)."""
+    arguments = lire_arguments(argv)
+    if arguments.base:
+        db_connection.definir_chemin_base(arguments.base)
+    if not db_connection.database_exists():
+        print(f"  Base de données non trouvée: {db_connection.DATABASE_PATH}")
+        return 2
+    db_connection.obtenir_pool('ecriture_intensive')
+    db_connection.mettre_a_jour_schema()
+
+    try:
+        bilan = importer_fichier(arguments.table, arguments.fichier, arguments.rejets,
+                                 arguments.taille_lot, arguments.separateur, arguments.encodage)
+    except (OSError, ValueError) as e:
+        print(f"  Erreur: {e}")
+        return 2
+    finally:
+        db_connection.fermer_connexion()
+
+    for nom, valeur in bilan.items():
+        print(f"  {nom:18} : {valeur}")
+    return 1 if bilan['rejetes'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Intervalle de vérification des lectures en cours (ms)
+DELAI_SCRUTATION_MS = 30
+# Threads du pool partagé, pour les widgets qui ne reçoivent pas de pool
+NB_THREADS_DEFAUT = 2
+
+_executeur = None
+_verrou = threading.Lock()
+
+
+def executeur_defaut():
+    """Pool de threads partagé, créé à la première utilisation."""
+    global _executeur
+    with _verrou:
+        if _executeur is None:
+            _executeur = ThreadPoolExecutor(max_workers=NB_THREADS_DEFAUT, thread_name_prefix="lecture")
+        return _executeur
+
+
+class LecturesAsynchrones:
+    """Lectures en base exécutées dans un pool de threads, résultats livrés dans le thread Tk.
+
+    Un widget ne doit être modifié que par la boucle Tk: les lectures terminées sont
+    scrutées avec widget.after, puis leur résultat est passé à au_resultat (ou l'exception
+    à a_l_erreur). Chaque lecture a une clé: une lecture déjà en cours n'est pas relancée.
+    invalider() change de génération: les lectures lancées avant sont annulées si elles
+    n'ont pas commencé, et leur résultat est ignoré sinon.
+    """
+
+    def __init__(self, widget, executeur=None):
+        self.widget = widget
+        self.executeur = executeur or executeur_defaut()
+        self.generation = 0
+        self._taches = {}
+        self._attente = None
+
+    def lancer(self, cle, fonction, args, au_resultat, a_l_erreur=None):
+        """Lance fonction(*args) dans le pool, sauf si la lecture cle est déjà en cours."""
+        if cle in self._taches:
+            return False
+        future = self.executeur.submit(fonction, *args)
+        self._taches[cle] = (self.generation, future, au_resultat, a_l_erreur)
+        if self._attente is None:
+            self._attente = self.widget.after(DELAI_SCRUTATION_MS, self._verifier)
+        return True
+
+    def en_cours(self, cle):
+        """Vrai si la lecture cle est lancée et pas encore livrée."""
+        return cle in self._taches
+
+    def abandonner(self, cles_utiles):
+        """Annule les lectures pas encore commencées dont la clé n'est plus utile."""
+        for cle, (_, future, _, _) in list(self._taches.items()):
+            if cle not in cles_utiles and future.cancel():
+                del self._taches[cle]
+
+    def invalider(self):
+        """Nouvelle génération: les lectures en cours sont annulées ou ignorées."""
+        self.generation += 1
+        for _, future, _, _ in self._taches.values():
+            future.cancel()
+        self._taches.clear()
+
+    def arreter(self):
+        """Invalide les lectures et arrête la scrutation (destruction du widget)."""
+        self.invalider()
+        if self._attente is not None:
+            self.widget.after_cancel(self._attente)
+            self._attente = None
+
+    def _verifier(self):
+        self._attente = None
+        for cle, (generation, future, au_resultat, a_l_erreur) in list(self._taches.items()):
+            if not future.done():
+                continue
+            if self._taches.get(cle, (None,))[0] == generation:
+                del self._taches[cle]
+            # Résultat périmé: invalider() appelé depuis le lancement (y compris par un
+            # au_resultat exécuté juste avant dans cette boucle)
+            if generation != self.generation or future.cancelled():
+                continue
+            erreur = future.exception()
+            if erreur is None:
+                au_resultat(future.result())
+            elif a_l_erreur is not None:
+                a_l_erreur(erreur)
+        if self._taches and self._attente is None:
+            self._attente = self.widget.after(DELAI_SCRUTATION_MS, self._verifier)
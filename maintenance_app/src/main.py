@@ -1,12 +1,26 @@
+import argparse
+import sqlite3
 import sys
 from pathlib import Path
 
 # Ajouter le répertoire src au path pour les imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from db_connection import init_database, database_exists, fermer_connexion
+from db_connection import init_database, database_exists, fermer_connexion, mettre_a_jour_schema
 import data_access
+import archivage
 import business_logic
+import multi_sites
+from rendu_tableau import FORMATS, ecrire_tableau
+
+
+# Nombre d'interventions affichées par page dans l'historique
+TAILLE_PAGE_HISTORIQUE = 15
+# Nombre de résultats proposés par la recherche d'équipement
+LIMITE_RECHERCHE = 15
+
+# Format des tableaux affichés (option --format)
+format_sortie = 'texte'
 
 
 def print_separator(title: str = "", char: str = "=", width: int = 70):
@@ -18,25 +32,9 @@ def print_separator(title: str = "", char: str = "=", width: int = 70):
         print(char * width)
 
 
-def print_table(headers: list, rows: list, col_widths: list = None):
-    """Affiche un tableau formaté."""
-    if not rows:
-        print("  Aucune donnée")
-        return
-
-    if col_widths is None:
-        col_widths = [max(len(str(h)), max(len(str(row[i])) for row in rows))
-                      for i, h in enumerate(headers)]
-
-    # En-têtes
-    header_line = " | ".join(str(h).ljust(col_widths[i]) for i, h in enumerate(headers))
-    print(f"  {header_line}")
-    print(f"  {'-' * len(header_line)}")
-
-    # Lignes
-    for row in rows:
-        line = " | ".join(str(row[i]).ljust(col_widths[i]) for i in range(len(headers)))
-        print(f"  {line}")
+def print_table(headers: list, rows, col_widths: list = None):
+    """Affiche un tableau formaté (texte aligné, CSV ou TSV selon --format)."""
+    ecrire_tableau(headers, rows, col_widths, format_sortie)
 
 
 def afficher_menu():
@@ -55,6 +53,7 @@ def afficher_menu():
   10. Performance des techniciens
   11. Historique d'un équipement
   12. Rapport de synthèse complet
+  13. Recherche dans les interventions
   0. Quitter
 """)
 
@@ -236,23 +235,38 @@ def afficher_performance_techniciens():
     print_table(headers, rows, [20, 12, 10, 12, 10])
 
 
+def choisir_equipement():
+    """Recherche un équipement (nom, n° de série, localisation) et le fait choisir; None si abandon."""
+    texte = input("\n  Rechercher un équipement (nom, n° de série, localisation; Entrée pour annuler): ").strip()
+    while texte:
+        resultats = data_access.rechercher_equipements(texte, LIMITE_RECHERCHE)
+        if not resultats:
+            texte = input("  Aucun équipement trouvé. Nouvelle recherche (Entrée pour annuler): ").strip()
+            continue
+
+        print()
+        for rang, eq in enumerate(resultats, 1):
+            print(f"    {rang:2}. {eq['nom']} ({eq['type']}) - {eq['numero_serie']} - {eq['localisation']}")
+        if len(resultats) >= LIMITE_RECHERCHE:
+            print(f"    ... {LIMITE_RECHERCHE} premiers résultats, précisez la recherche")
+
+        choix = input("\n  Numéro dans la liste, nouvelle recherche, ou Entrée pour annuler: ").strip()
+        if choix.isdigit() and 1 <= int(choix) <= len(resultats):
+            return resultats[int(choix) - 1]
+        texte = choix
+    return None
+
+
 def afficher_historique_equipement():
     """Affiche l'historique d'un équipement spécifique."""
     print_separator("HISTORIQUE D'UN ÉQUIPEMENT")
 
-    # Lister les équipements disponibles
-    equipements = data_access.obtenir_tous_equipements()
-    print("\n  Équipements disponibles:")
-    for eq in equipements:
-        print(f"    {eq['id']:2}. {eq['nom']} ({eq['type']})")
-
     try:
-        choix = input("\n  Numéro de l'équipement (ou 0 pour annuler): ")
-        eq_id = int(choix)
-
-        if eq_id == 0:
+        choix = choisir_equipement()
+        if not choix:
             return
 
+        eq_id = choix['id']
         equipement = data_access.obtenir_equipement_par_id(eq_id)
         if not equipement:
             print("  Équipement non trouvé")
@@ -262,25 +276,87 @@ def afficher_historique_equipement():
         print(f"  Type: {equipement['type']} | Localisation: {equipement['localisation']}")
         print(f"  Statut actuel: {equipement['statut']}")
 
-        historique = data_access.obtenir_historique_equipement(eq_id)
+        # Historique page par page (pagination par clé: chaque page est lue directement)
+        page = data_access.paginer_historique_equipement(eq_id, TAILLE_PAGE_HISTORIQUE)
+        if not page['lignes']:
+            print("  Aucune intervention enregistrée")
+            return
 
-        if historique:
-            headers = ["Date", "Type", "Description", "Durée", "Coût", "Technicien"]
+        headers = ["Date", "Type", "Description", "Durée", "Coût", "Technicien"]
+        while True:
             rows = [
                 (h['date_intervention'], h['type_intervention'][:10],
                  h['description'][:25], f"{h['duree_minutes']}m",
                  f"{h['cout']:.0f}€", h['technicien'][:15])
-                for h in historique
+                for h in page['lignes']
             ]
             print()
             print_table(headers, rows, [12, 10, 25, 6, 8, 15])
-        else:
-            print("  Aucune intervention enregistrée")
+
+            actions = []
+            if page['curseur_suivant']:
+                actions.append("[s]uivante")
+            if page['curseur_precedent']:
+                actions.append("[p]récédente")
+            if not actions:
+                break
+            action = input(f"\n  Page {' / '.join(actions)} / Entrée pour terminer: ").strip().lower()
+            if action == 's' and page['curseur_suivant']:
+                page = data_access.paginer_historique_equipement(eq_id, TAILLE_PAGE_HISTORIQUE,
+                                                                 page['curseur_suivant'])
+            elif action == 'p' and page['curseur_precedent']:
+                page = data_access.paginer_historique_equipement(eq_id, TAILLE_PAGE_HISTORIQUE,
+                                                                 page['curseur_precedent'])
+            else:
+                break
 
     except ValueError:
         print("  Entrée invalide")
 
 
+def _saisir_filtre(message, valeurs=None):
+    """Saisie facultative d'un filtre (None si vide); valeurs: choix proposés par numéro."""
+    if valeurs:
+        options = ", ".join(f"{i}={v}" for i, v in enumerate(valeurs, 1))
+        choix = input(f"  {message} ({options}; Entrée pour tous): ").strip()
+        if choix.isdigit() and 1 <= int(choix) <= len(valeurs):
+            return valeurs[int(choix) - 1]
+        return None
+    return input(f"  {message} (Entrée pour ignorer): ").strip() or None
+
+
+def afficher_recherche_interventions():
+    """Recherche plein texte dans les descriptions d'interventions."""
+    print_separator("RECHERCHE DANS LES INTERVENTIONS")
+
+    texte = input("\n  Mots recherchés (ex: fuite hydraulique): ").strip()
+    if not texte:
+        return
+
+    filtres = {}
+    if input("  Ajouter des filtres (période, types) ? [o/N]: ").strip().lower() == 'o':
+        filtres['date_debut'] = _saisir_filtre("Depuis le (AAAA-MM-JJ)")
+        filtres['date_fin'] = _saisir_filtre("Avant le (AAAA-MM-JJ, exclu)")
+        filtres['type_equipement'] = _saisir_filtre("Type d'équipement", data_access.TYPES_EQUIPEMENT)
+        filtres['type_intervention'] = _saisir_filtre("Type d'intervention", data_access.TYPES_INTERVENTION)
+
+    resultats = data_access.rechercher_interventions(texte, **filtres)
+    print(f"\n  {len(resultats)} intervention(s) trouvée(s), les plus pertinentes d'abord"
+          + (f" (limitées à {data_access.LIMITE_RECHERCHE_TEXTE})"
+             if len(resultats) >= data_access.LIMITE_RECHERCHE_TEXTE else ""))
+    if not resultats:
+        return
+
+    headers = ["Date", "Équipement", "Type", "Intervention", "Extrait"]
+    rows = [
+        (r['date_intervention'], r['equipement'][:22], r['equipement_type'][:12],
+         r['type_intervention'][:12], r['extrait'][:60])
+        for r in resultats
+    ]
+    print()
+    print_table(headers, rows)
+
+
 def afficher_rapport_synthese():
     """Affiche le rapport de synthèse complet."""
     print_separator("RAPPORT DE SYNTHÈSE COMPLET", "=", 70)
@@ -327,8 +403,98 @@ def afficher_rapport_synthese():
     print()
 
 
-def main():
+def afficher_statistiques_sites(chemins, mode='attach'):
+    """Affiche le tableau de bord consolidé de plusieurs sites (une base par site)."""
+    statistiques = multi_sites.statistiques_sites(
+        chemins, ['synthese', 'frequence_par_type', 'equipements_sollicites'], mode=mode)
+
+    print_separator("SYNTHÈSE PAR SITE")
+    synthese = statistiques['synthese']
+    headers = ["Site", "Équipements", "Interventions", "Coût Total", "Durée Moy."]
+    rows = [
+        (s['site'], s['nombre_equipements'], s['nombre_interventions'], f"{s['cout_total']:.2f}€",
+         f"{s['duree_totale'] / s['nombre_terminees']:.0f} min" if s['nombre_terminees'] else "-")
+        for s in synthese['par_site']
+    ]
+    groupe = synthese['groupe'][0]
+    rows.append(("GROUPE", groupe['nombre_equipements'], groupe['nombre_interventions'],
+                 f"{groupe['cout_total']:.2f}€",
+                 f"{groupe['duree_moyenne']:.0f} min" if groupe['duree_moyenne'] is not None else "-"))
+    print_table(headers, rows, [15, 12, 14, 15, 12])
+
+    print_separator("FRÉQUENCE DES INTERVENTIONS PAR TYPE (GROUPE)")
+    headers = ["Type", "Nombre", "Coût Total", "Coût Moyen", "Durée Moy."]
+    rows = [
+        (f['type_intervention'], f['nombre'], f"{f['cout_total']:.2f}€",
+         f"{f['cout_moyen']:.2f}€", f"{f['duree_moyenne']:.0f} min")
+        for f in statistiques['frequence_par_type']['groupe']
+    ]
+    print_table(headers, rows, [15, 8, 14, 12, 12])
+
+    print_separator("ÉQUIPEMENTS LES PLUS SOLLICITÉS (GROUPE)")
+    headers = ["Site", "Équipement", "Type", "Interventions", "Coût Total"]
+    rows = [
+        (e['site'], e['nom'], e['type'], e['nombre_interventions'], f"{e['cout_total']:.2f}€")
+        for e in statistiques['equipements_sollicites']['groupe']
+    ]
+    print_table(headers, rows, [15, 25, 20, 14, 12])
+
+
+def lire_arguments(argv=None):
+    """Analyse les options de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Application de suivi de maintenance")
+    parser.add_argument("--reconstruire-stats", action="store_true",
+                        help="recalcule la table stats_equipement puis quitte")
+    parser.add_argument("--format", choices=FORMATS, default='texte',
+                        help="format des tableaux affichés (texte aligné, csv ou tsv)")
+    parser.add_argument("--archiver", action="store_true",
+                        help="archive les interventions des années plus anciennes que l'horizon puis quitte")
+    parser.add_argument("--horizon", type=int, default=archivage.HORIZON_ANNEES_DEFAUT,
+                        help="années gardées hors archive en plus de l'année en cours (défaut: %(default)s)")
+    parser.add_argument("--sites", nargs="+", metavar="BASE",
+                        help="affiche le tableau de bord consolidé de ces bases de sites puis quitte")
+    parser.add_argument("--mode-sites", choices=multi_sites.MODES_SITES, default='attach',
+                        help="interrogation des sites: bases attachées à une connexion ou une connexion par site")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Point d'entrée principal de l'application."""
+    global format_sortie
+    arguments = lire_arguments(argv)
+    format_sortie = arguments.format
+
+    if arguments.reconstruire_stats:
+        if not database_exists():
+            print("  Base de données non trouvée.")
+            return
+        mettre_a_jour_schema()
+        nb_lignes = data_access.reconstruire_stats_equipement()
+        print(f"  stats_equipement reconstruite: {nb_lignes} ligne(s).")
+        fermer_connexion()
+        return
+
+    if arguments.archiver:
+        if not database_exists():
+            print("  Base de données non trouvée.")
+            return
+        mettre_a_jour_schema()
+        archivees = archivage.archiver_interventions(arguments.horizon)
+        if not archivees:
+            print("  Aucune intervention à archiver.")
+        for annee, nombre in archivees.items():
+            print(f"  {annee}: {nombre} intervention(s) archivée(s) dans {archivage.nom_table_archive(annee)}")
+        fermer_connexion()
+        return
+
+    if arguments.sites:
+        try:
+            afficher_statistiques_sites(arguments.sites, arguments.mode_sites)
+        except (FileNotFoundError, ValueError, sqlite3.Error) as e:
+            print(f"  Erreur: {e}")
+            return 2
+        return
+
     print_separator("APPLICATION DE SUIVI DE MAINTENANCE", "=", 70)
     print("        Gestion du parc matériel et indicateurs de fiabilité")
 
@@ -338,6 +504,7 @@ def main():
         init_database()
         print("  Base de données initialisée avec les données de test.")
     else:
+        mettre_a_jour_schema()
         print("\n  Base de données connectée.")
 
     # Boucle principale
@@ -375,6 +542,8 @@ def main():
                 afficher_historique_equipement()
             elif choix == '12':
                 afficher_rapport_synthese()
+            elif choix == '13':
+                afficher_recherche_interventions()
             else:
                 print("  Choix invalide")
 
@@ -390,4 +559,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,358 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import calcul_parallele
+from db_connection import LIMITE_BASES_ATTACHEES, ouvrir_connexion_sites
+
+
+# Modes d'interrogation des sites:
+# 'attach'    : une connexion, bases attachées par groupes de LIMITE_BASES_ATTACHEES, UNION ALL
+# 'threads'   : une connexion par site, requêtes en parallèle dans des threads
+#               (sqlite3 libère le GIL pendant l'exécution des requêtes)
+# 'processus' : une connexion par site, dans les processus de calcul_parallele
+MODES_SITES = ('attach', 'threads', 'processus')
+
+# Nombre d'équipements du classement des plus sollicités (par site et pour le groupe)
+LIMITE_CLASSEMENT = 10
+
+
+def _bornes_annee(annee):
+    annee = int(annee)
+    return (f"{annee:04d}-01-01", f"{annee + 1:04d}-01-01")
+
+
+def _parametres_mois(annee):
+    # Bornes de l'année pour interventions, puis l'année pour agregats_archives
+    return (*_bornes_annee(annee), int(annee))
+
+
+# Statistiques fédérées. Chaque requête est exécutée sur un site ({base}: schéma de la base
+# du site) et retourne des agrégats additifs, fusionnés ensuite pour le groupe:
+# ordre    : ORDER BY des lignes d'un site (noms de colonnes du résultat)
+# limite   : True = LIMIT ? (paramètre limite) après l'ordre, sur chaque site
+# cles     : colonnes de regroupement (les lignes de même clé sont additionnées)
+# sommes   : colonnes additionnées entre sites
+# moyennes : {colonne: (numérateur, dénominateur)}, recalculées après fusion
+#            (une moyenne de moyennes serait fausse si les sites n'ont pas la même taille)
+# tri      : (colonne, décroissant) des lignes fusionnées
+# classement: True = pas de fusion, les lignes de tous les sites sont classées ensemble
+# parametres(annee): paramètres de la requête
+# Les années archivées (archivage.py) ne sont plus dans {base}.interventions: les statistiques
+# sur les interventions additionnent leurs agrégats figés ({base}.agregats_archives)
+STATISTIQUES = {
+    'synthese': {
+        'sql': """
+            SELECT (SELECT COUNT(*) FROM {base}.equipements) as nombre_equipements,
+                   SUM(nombre_interventions) as nombre_interventions,
+                   COALESCE(SUM(cout_total), 0) as cout_total,
+                   COALESCE(SUM(nombre_terminees), 0) as nombre_terminees,
+                   SUM(duree_totale) as duree_totale
+            FROM (
+                SELECT COUNT(*) as nombre_interventions,
+                       SUM(CASE WHEN statut = 'terminee' THEN cout END) as cout_total,
+                       SUM(statut = 'terminee') as nombre_terminees,
+                       SUM(CASE WHEN statut = 'terminee' THEN duree_minutes END) as duree_totale
+                FROM {base}.interventions
+                UNION ALL
+                SELECT SUM(nb_interventions),
+                       SUM(CASE WHEN statut = 'terminee' THEN cout_total END),
+                       SUM(CASE WHEN statut = 'terminee' THEN nb_interventions END),
+                       SUM(CASE WHEN statut = 'terminee' THEN duree_totale END)
+                FROM {base}.agregats_archives
+            )
+        """,
+        'cles': (),
+        'sommes': ('nombre_equipements', 'nombre_interventions', 'cout_total', 'nombre_terminees',
+                   'duree_totale'),
+        'moyennes': {'duree_moyenne': ('duree_totale', 'nombre_terminees')},
+    },
+    'frequence_par_type': {
+        'sql': """
+            SELECT type_intervention,
+                   SUM(nombre) as nombre,
+                   SUM(cout_total) as cout_total,
+                   SUM(duree_totale) as duree_totale
+            FROM (
+                SELECT type_intervention, COUNT(*) as nombre, SUM(cout) as cout_total,
+                       SUM(duree_minutes) as duree_totale
+                FROM {base}.interventions
+                WHERE statut = 'terminee'
+                GROUP BY type_intervention
+                UNION ALL
+                SELECT type_intervention, SUM(nb_interventions), SUM(cout_total), SUM(duree_totale)
+                FROM {base}.agregats_archives
+                WHERE statut = 'terminee'
+                GROUP BY type_intervention
+            )
+            GROUP BY type_intervention
+        """,
+        'ordre': "nombre DESC, type_intervention",
+        'cles': ('type_intervention',),
+        'sommes': ('nombre', 'cout_total', 'duree_totale'),
+        'moyennes': {'cout_moyen': ('cout_total', 'nombre'), 'duree_moyenne': ('duree_totale', 'nombre')},
+        'tri': ('nombre', True),
+    },
+    'cout_par_type_equipement': {
+        'sql': """
+            SELECT e.type,
+                   COUNT(e.id) as nombre_equipements,
+                   COALESCE(SUM(s.nb_interventions), 0) as nombre_interventions,
+                   SUM(s.cout_total) as cout_total
+            FROM {base}.equipements e
+            LEFT JOIN {base}.stats_equipement s ON e.id = s.equipement_id AND s.statut = 'terminee'
+            GROUP BY e.type
+        """,
+        'ordre': "cout_total DESC, type",
+        'cles': ('type',),
+        'sommes': ('nombre_equipements', 'nombre_interventions', 'cout_total'),
+        'moyennes': {'cout_moyen_intervention': ('cout_total', 'nombre_interventions')},
+        'tri': ('cout_total', True),
+    },
+    'interventions_par_mois': {
+        'sql': """
+            SELECT mois,
+                   SUM(nombre_interventions) as nombre_interventions,
+                   SUM(cout_total) as cout_total,
+                   SUM(duree_totale) as duree_totale
+            FROM (
+                SELECT mois, COUNT(*) as nombre_interventions, SUM(cout) as cout_total,
+                       SUM(duree_minutes) as duree_totale
+                FROM {base}.interventions
+                WHERE statut = 'terminee'
+                  AND date_intervention >= ? AND date_intervention < ?
+                GROUP BY mois
+                UNION ALL
+                SELECT mois, SUM(nb_interventions), SUM(cout_total), SUM(duree_totale)
+                FROM {base}.agregats_archives
+                WHERE statut = 'terminee' AND annee = ?
+                GROUP BY mois
+            )
+            GROUP BY mois
+        """,
+        'ordre': "mois",
+        'cles': ('mois',),
+        'sommes': ('nombre_interventions', 'cout_total', 'duree_totale'),
+        'tri': ('mois', False),
+        'parametres': _parametres_mois,
+    },
+    'equipements_sollicites': {
+        'sql': """
+            SELECT e.id, e.nom, e.type,
+                   SUM(s.nb_interventions) as nombre_interventions,
+                   SUM(s.cout_total) as cout_total
+            FROM {base}.stats_equipement s
+            INNER JOIN {base}.equipements e ON e.id = s.equipement_id
+            GROUP BY e.id
+        """,
+        'ordre': "nombre_interventions DESC, id",
+        'limite': True,
+        'classement': True,
+        'tri': ('nombre_interventions', True),
+    },
+}
+
+
+# Tables et colonnes lues par STATISTIQUES dans la base d'un site. Les sites sont ouverts en
+# lecture seule: une base créée avant l'une d'elles doit d'abord passer par
+# db_connection.mettre_a_jour_schema()
+SCHEMA_REQUIS = {
+    'equipements': ('id', 'nom', 'type'),
+    'interventions': ('date_intervention', 'type_intervention', 'duree_minutes', 'cout', 'statut', 'mois'),
+    'stats_equipement': ('equipement_id', 'statut', 'nb_interventions', 'cout_total'),
+    'agregats_archives': ('annee', 'mois', 'statut', 'type_intervention', 'nb_interventions', 'cout_total',
+                          'duree_totale'),
+}
+
+
+def normaliser_sites(sites):
+    """{nom du site: chemin} depuis un dict ou une liste de chemins (nom = nom du fichier sans extension)."""
+    if isinstance(sites, dict):
+        sites = {str(nom): Path(chemin) for nom, chemin in sites.items()}
+    else:
+        chemins = [Path(chemin) for chemin in sites]
+        sites = {chemin.stem: chemin for chemin in chemins}
+        if len(sites) != len(chemins):
+            raise ValueError("Deux sites ont le même nom de fichier: passer un dict {nom: chemin}")
+    if not sites:
+        raise ValueError("Aucun site")
+    for nom, chemin in sites.items():
+        if not chemin.exists():
+            raise FileNotFoundError(f"Base du site {nom} introuvable: {chemin}")
+    return sites
+
+
+def _schema_manquant(conn, base):
+    # Tables (ou table.colonne) de SCHEMA_REQUIS absentes du schéma base de la connexion
+    # (table_xinfo: les colonnes calculées comme mois sont listées)
+    manquants = []
+    for table, colonnes in SCHEMA_REQUIS.items():
+        existantes = {row['name'] for row in conn.execute(f"PRAGMA {base}.table_xinfo({table})")}
+        if not existantes:
+            manquants.append(table)
+        else:
+            manquants.extend(f"{table}.{colonne}" for colonne in colonnes if colonne not in existantes)
+    return manquants
+
+
+def verifier_schemas(sites):
+    """Vérifie avant toute statistique que chaque site a le schéma lu par STATISTIQUES.
+
+    sites: {nom: chemin} (voir normaliser_sites). Lève ValueError en nommant chaque site
+    dont la base doit être mise à jour (db_connection.mettre_a_jour_schema()).
+    """
+    elements = list(sites.items())
+    a_mettre_a_jour = []
+    for debut in range(0, len(elements), LIMITE_BASES_ATTACHEES):
+        groupe = elements[debut:debut + LIMITE_BASES_ATTACHEES]
+        conn = ouvrir_connexion_sites({f"site_{numero}": chemin for numero, (_, chemin) in enumerate(groupe)})
+        try:
+            for numero, (site, chemin) in enumerate(groupe):
+                try:
+                    manquants = _schema_manquant(conn, f"site_{numero}")
+                except sqlite3.DatabaseError as e:
+                    raise sqlite3.DatabaseError(f"Base du site {site} illisible: {chemin} ({e})") from e
+                if manquants:
+                    a_mettre_a_jour.append(f"{site} ({chemin}): {', '.join(manquants)}")
+        finally:
+            conn.close()
+    if a_mettre_a_jour:
+        raise ValueError("Base(s) de site à mettre à jour avec db_connection.mettre_a_jour_schema(), "
+                         "objets absents: " + "; ".join(a_mettre_a_jour))
+
+
+def _requete(nom, base):
+    definition = STATISTIQUES[nom]
+    sql = definition['sql'].format(base=base)
+    if definition.get('ordre'):
+        sql += f" ORDER BY {definition['ordre']}"
+    if definition.get('limite'):
+        sql += " LIMIT ?"
+    return sql
+
+
+def _parametres(nom, annee, limite):
+    definition = STATISTIQUES[nom]
+    parametres = tuple(definition['parametres'](annee)) if definition.get('parametres') else ()
+    return parametres + ((limite,) if definition.get('limite') else ())
+
+
+def interroger_site(site, chemin, noms, annee=2024, limite=LIMITE_CLASSEMENT):
+    """{statistique: lignes} d'un site, sur sa propre connexion (modes 'threads' et 'processus')."""
+    conn = ouvrir_connexion_sites({'site': chemin})
+    try:
+        resultats = {}
+        for nom in noms:
+            cursor = conn.execute(_requete(nom, 'site'), _parametres(nom, annee, limite))
+            resultats[nom] = [{'site': site, **dict(row)} for row in cursor.fetchall()]
+        return resultats
+    finally:
+        conn.close()
+
+
+def _interroger_groupe_attache(groupe, noms, annee, limite):
+    # Un groupe de sites attachés à une connexion: une requête UNION ALL par statistique.
+    # L'ordre des lignes d'une sous-requête n'est pas garanti: le tri est refait à l'extérieur
+    # (rang du site, puis ordre de la statistique)
+    alias = {f"site_{numero}": (site, chemin) for numero, (site, chemin) in enumerate(groupe)}
+    conn = ouvrir_connexion_sites({nom_alias: chemin for nom_alias, (_, chemin) in alias.items()})
+    try:
+        resultats = {}
+        for nom in noms:
+            sql = "\nUNION ALL\n".join(f"SELECT ? as site, {rang} as rang_site, * FROM ({_requete(nom, nom_alias)})"
+                                      for rang, nom_alias in enumerate(alias))
+            ordre = STATISTIQUES[nom].get('ordre')
+            sql += f"\nORDER BY rang_site{', ' + ordre if ordre else ''}"
+            parametres = []
+            for site, _ in alias.values():
+                parametres.append(site)
+                parametres.extend(_parametres(nom, annee, limite))
+            lignes = []
+            for row in conn.execute(sql, parametres).fetchall():
+                ligne = dict(row)
+                del ligne['rang_site']
+                lignes.append(ligne)
+            resultats[nom] = lignes
+        return resultats
+    finally:
+        conn.close()
+
+
+def _additionner(a, b):
+    # SUM SQL: NULL sans valeur, les NULL sont ignorés
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a + b
+
+
+def fusionner(nom, lignes, limite=LIMITE_CLASSEMENT):
+    """Lignes du groupe à partir des lignes de tous les sites (voir STATISTIQUES)."""
+    definition = STATISTIQUES[nom]
+    colonne_tri, decroissant = definition.get('tri', (None, False))
+
+    if definition.get('classement'):
+        # Tri stable: à égalité, l'ordre des sites puis celui de chaque site est conservé
+        classement = sorted(lignes, key=lambda ligne: ligne[colonne_tri] or 0, reverse=decroissant)
+        return classement[:limite]
+
+    groupes = {}
+    for ligne in lignes:
+        cle = tuple(ligne[colonne] for colonne in definition['cles'])
+        groupe = groupes.get(cle)
+        if groupe is None:
+            groupes[cle] = {colonne: ligne[colonne] for colonne in definition['cles'] + definition['sommes']}
+        else:
+            for colonne in definition['sommes']:
+                groupe[colonne] = _additionner(groupe[colonne], ligne[colonne])
+
+    fusion = list(groupes.values())
+    for ligne in fusion:
+        for colonne, (numerateur, denominateur) in definition.get('moyennes', {}).items():
+            ligne[colonne] = (round(ligne[numerateur] / ligne[denominateur], 2)
+                              if ligne[numerateur] is not None and ligne[denominateur] else None)
+    if colonne_tri:
+        # Valeurs NULL en dernier, comme ORDER BY ... DESC dans SQLite
+        if decroissant:
+            fusion.sort(key=lambda ligne: (ligne[colonne_tri] is not None, ligne[colonne_tri]), reverse=True)
+        else:
+            fusion.sort(key=lambda ligne: (ligne[colonne_tri] is None, ligne[colonne_tri]))
+    return fusion
+
+
+def statistiques_sites(sites, noms=None, mode='attach', annee=2024, limite=LIMITE_CLASSEMENT,
+                       nb_workers=None):
+    """Statistiques de plusieurs sites, sans copier les données.
+
+    sites: {nom: chemin} ou liste de chemins. noms: statistiques de STATISTIQUES (toutes
+    par défaut). Le schéma de chaque site est vérifié d'abord (verifier_schemas). Retourne {statistique: {'par_site': lignes avec une colonne site,
+    'groupe': lignes fusionnées}}.
+    """
+    if mode not in MODES_SITES:
+        raise ValueError(f"Mode inconnu: {mode} (modes disponibles: {', '.join(MODES_SITES)})")
+    sites = normaliser_sites(sites)
+    noms = list(noms or STATISTIQUES)
+    for nom in noms:
+        if nom not in STATISTIQUES:
+            raise ValueError(f"Statistique inconnue: {nom}")
+    verifier_schemas(sites)
+
+    elements = list(sites.items())
+    if mode == 'attach':
+        groupes = [elements[debut:debut + LIMITE_BASES_ATTACHEES]
+                   for debut in range(0, len(elements), LIMITE_BASES_ATTACHEES)]
+        resultats = [_interroger_groupe_attache(groupe, noms, annee, limite) for groupe in groupes]
+    else:
+        taches = [(site, str(chemin), noms, annee, limite) for site, chemin in elements]
+        if mode == 'threads':
+            with ThreadPoolExecutor(max_workers=nb_workers or len(taches)) as executeur:
+                resultats = list(executeur.map(lambda tache: interroger_site(*tache), taches))
+        else:
+            resultats = calcul_parallele.executer_en_parallele(interroger_site, taches, nb_workers)
+
+    statistiques = {}
+    for nom in noms:
+        par_site = [ligne for resultat in resultats for ligne in resultat[nom]]
+        statistiques[nom] = {'par_site': par_site, 'groupe': fusionner(nom, par_site, limite)}
+    return statistiques
@@ -0,0 +1,334 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+# Variables d'environnement: MAINTENANCE_PROFILAGE=<seuil en ms> active le profilage
+VARIABLE_PROFILAGE = "MAINTENANCE_PROFILAGE"
+VARIABLE_JOURNAL = "MAINTENANCE_JOURNAL_LENT"
+
+JOURNAL_DEFAUT = Path(__file__).parent.parent / "database" / "requetes_lentes.jsonl"
+SEUIL_LENT_DEFAUT_MS = 100.0
+
+# Fichiers ignorés pour retrouver la fonction appelante
+_FICHIERS_INTERNES = {'profilage.py', 'db_connection.py', 'cache_resultats.py', 'contextlib.py'}
+# Instructions sans plan d'exécution utile
+_SANS_PLAN = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'EXPLAIN', 'ANALYZE')
+
+
+def normaliser_sql(sql):
+    """Texte d'une requête sur une ligne (clé des statistiques)."""
+    return " ".join(sql.split())
+
+
+def est_scan_complet(ligne_plan):
+    """Indique si une ligne de EXPLAIN QUERY PLAN est un parcours complet de table ("SCAN t" sans index)."""
+    return ligne_plan.startswith("SCAN ") and "USING" not in ligne_plan and "CONSTANT ROW" not in ligne_plan
+
+
+def _appelant():
+    """Retourne 'module.fonction:ligne' du premier appelant hors de la couche connexion."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        fichier = os.path.basename(frame.f_code.co_filename)
+        if fichier not in _FICHIERS_INTERNES:
+            return f"{fichier[:-3] if fichier.endswith('.py') else fichier}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return None
+
+
+def _parametres_lisibles(parametres):
+    """Paramètres convertis pour le journal JSON (valeurs longues tronquées)."""
+    if parametres is None:
+        return None
+    if isinstance(parametres, dict):
+        return {cle: _valeur_lisible(v) for cle, v in parametres.items()}
+    return [_valeur_lisible(v) for v in parametres]
+
+
+def _valeur_lisible(valeur):
+    if isinstance(valeur, (int, float)) or valeur is None:
+        return valeur
+    texte = str(valeur)
+    return texte if len(texte) <= 200 else texte[:200] + "..."
+
+
+class StatistiquesRequetes:
+    """Agrégats par requête: nombre d'exécutions, durées, lignes, appelants et plan."""
+
+    def __init__(self):
+        self.requetes = {}
+
+    def ajouter(self, enregistrement):
+        stats = self.requetes.get(enregistrement['sql'])
+        if stats is None:
+            stats = self.requetes[enregistrement['sql']] = {
+                'sql': enregistrement['sql'],
+                'nb_executions': 0,
+                'duree_totale_ms': 0.0,
+                'duree_max_ms': 0.0,
+                'lignes': 0,
+                'appelants': set(),
+                'plan': None,
+            }
+        stats['nb_executions'] += 1
+        stats['duree_totale_ms'] += enregistrement['duree_ms']
+        stats['duree_max_ms'] = max(stats['duree_max_ms'], enregistrement['duree_ms'])
+        stats['lignes'] += enregistrement['lignes']
+        if enregistrement.get('appelant'):
+            stats['appelants'].add(enregistrement['appelant'])
+        if enregistrement.get('plan') is not None:
+            stats['plan'] = enregistrement['plan']
+
+    def classement(self, top=10):
+        """Les requêtes les plus coûteuses (durée cumulée décroissante)."""
+        lignes = []
+        for stats in sorted(self.requetes.values(), key=lambda s: s['duree_totale_ms'], reverse=True)[:top]:
+            plan = stats['plan'] or []
+            lignes.append({
+                'sql': stats['sql'],
+                'nb_executions': stats['nb_executions'],
+                'duree_totale_ms': round(stats['duree_totale_ms'], 3),
+                'duree_moyenne_ms': round(stats['duree_totale_ms'] / stats['nb_executions'], 3),
+                'duree_max_ms': round(stats['duree_max_ms'], 3),
+                'lignes': stats['lignes'],
+                'appelants': sorted(stats['appelants']),
+                'plan': plan,
+                'scans_complets': [ligne for ligne in plan if est_scan_complet(ligne)],
+            })
+        return lignes
+
+
+class Profileur:
+    """Collecte les mesures de toutes les connexions profilées du processus."""
+
+    def __init__(self, seuil_ms=SEUIL_LENT_DEFAUT_MS, journal=JOURNAL_DEFAUT):
+        self.seuil_ms = seuil_ms
+        self.journal = Path(journal) if journal else None
+        self.statistiques = StatistiquesRequetes()
+        self._plans = {}
+        self._verrou = threading.Lock()
+        # Les connexions ouvertes gardent le profileur actif à leur ouverture
+        self.classe_connexion = type('ConnexionProfilee', (ConnexionProfilee,), {'profileur': self})
+
+    def plan_connu(self, sql):
+        return sql in self._plans
+
+    def memoriser_plan(self, sql, plan):
+        with self._verrou:
+            self._plans.setdefault(sql, plan)
+
+    def enregistrer(self, enregistrement):
+        """Ajoute une exécution terminée; l'écrit dans le journal si elle dépasse le seuil."""
+        with self._verrou:
+            enregistrement['plan'] = self._plans.get(enregistrement['sql'])
+            self.statistiques.ajouter(enregistrement)
+            if self.journal is not None and enregistrement['duree_ms'] >= self.seuil_ms:
+                self.journal.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.journal, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(enregistrement, ensure_ascii=False) + "\n")
+
+    def resume(self, top=10):
+        with self._verrou:
+            return self.statistiques.classement(top)
+
+
+class CurseurProfile(sqlite3.Cursor):
+    """Curseur qui mesure chaque requête: exécution plus lecture des lignes."""
+
+    _mesure = None
+
+    def _commencer(self, sql, parametres, plusieurs=False):
+        self._terminer()
+        sql_normalise = normaliser_sql(sql)
+        profileur = self.connection.profileur
+        if not plusieurs and not profileur.plan_connu(sql_normalise):
+            profileur.memoriser_plan(sql_normalise, self.connection.expliquer(sql, parametres))
+        self._mesure = {
+            'date': datetime.now().isoformat(timespec='milliseconds'),
+            'sql': sql_normalise,
+            'parametres': None if plusieurs else _parametres_lisibles(parametres),
+            'duree_ms': 0.0,
+            'lignes': 0,
+            'appelant': _appelant(),
+        }
+
+    def _terminer(self):
+        mesure, self._mesure = self._mesure, None
+        if mesure is not None:
+            mesure['duree_ms'] = round(mesure['duree_ms'], 3)
+            self.connection.profileur.enregistrer(mesure)
+
+    def _chronometrer(self, action, *args):
+        debut = time.perf_counter()
+        try:
+            return action(*args)
+        finally:
+            if self._mesure is not None:
+                self._mesure['duree_ms'] += (time.perf_counter() - debut) * 1000
+
+    def execute(self, sql, parametres=()):
+        self._commencer(sql, parametres)
+        self._chronometrer(super().execute, sql, parametres)
+        if self.description is None:
+            # INSERT / UPDATE / DELETE: rien à lire
+            if self._mesure is not None:
+                self._mesure['lignes'] = max(self.rowcount, 0)
+            self._terminer()
+        return self
+
+    def executemany(self, sql, sequence_parametres):
+        self._commencer(sql, None, plusieurs=True)
+        self._chronometrer(super().executemany, sql, sequence_parametres)
+        if self._mesure is not None:
+            self._mesure['lignes'] = max(self.rowcount, 0)
+        self._terminer()
+        return self
+
+    def _compter(self, lignes, epuise):
+        if self._mesure is not None:
+            self._mesure['lignes'] += lignes
+            if epuise:
+                self._terminer()
+
+    def fetchone(self):
+        ligne = self._chronometrer(super().fetchone)
+        self._compter(0 if ligne is None else 1, ligne is None)
+        return ligne
+
+    def fetchmany(self, size=None):
+        taille = self.arraysize if size is None else size
+        lignes = self._chronometrer(super().fetchmany, taille)
+        self._compter(len(lignes), len(lignes) < taille)
+        return lignes
+
+    def fetchall(self):
+        lignes = self._chronometrer(super().fetchall)
+        self._compter(len(lignes), True)
+        return lignes
+
+    def __next__(self):
+        try:
+            ligne = self._chronometrer(super().__next__)
+        except StopIteration:
+            self._compter(0, True)
+            raise
+        self._compter(1, False)
+        return ligne
+
+    def close(self):
+        self._terminer()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._terminer()
+        except Exception:
+            pass
+
+
+class ConnexionProfilee(sqlite3.Connection):
+    """Connexion dont tous les curseurs sont des CurseurProfile."""
+
+    profileur = None
+
+    def cursor(self, factory=CurseurProfile):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametres=()):
+        return self.cursor().execute(sql, parametres)
+
+    def executemany(self, sql, sequence_parametres):
+        return self.cursor().executemany(sql, sequence_parametres)
+
+    def expliquer(self, sql, parametres):
+        """EXPLAIN QUERY PLAN de la requête (None si non applicable)."""
+        if sql.lstrip().upper().startswith(_SANS_PLAN):
+            return None
+        try:
+            curseur = super().cursor()
+            curseur.execute("EXPLAIN QUERY PLAN " + sql, parametres)
+            return [ligne[3] for ligne in curseur.fetchall()]
+        except sqlite3.Error:
+            return None
+
+
+# Profileur actif (None = profilage désactivé)
+profileur = None
+
+
+def activer_profilage(seuil_ms=SEUIL_LENT_DEFAUT_MS, journal=JOURNAL_DEFAUT):
+    """Active le profilage pour les connexions ouvertes ensuite.
+
+    Appeler db_connection.fermer_connexion() pour que les connexions déjà ouvertes
+    soient recréées avec l'instrumentation.
+    """
+    global profileur
+    profileur = Profileur(seuil_ms, journal)
+    return profileur
+
+
+def desactiver_profilage():
+    """Désactive le profilage des prochaines connexions."""
+    global profileur
+    profileur = None
+
+
+def fabrique_connexion():
+    """Classe de connexion à passer à sqlite3.connect(factory=...)."""
+    if profileur is None:
+        return sqlite3.Connection
+    return profileur.classe_connexion
+
+
+def lire_journal(journal=JOURNAL_DEFAUT):
+    """Agrège les requêtes lentes d'un journal JSONL."""
+    statistiques = StatistiquesRequetes()
+    with open(journal, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            if ligne.strip():
+                statistiques.ajouter(json.loads(ligne))
+    return statistiques
+
+
+def afficher_resume(classement):
+    """Affiche les requêtes les plus coûteuses et signale les parcours complets."""
+    if not classement:
+        print("  Aucune requête enregistrée")
+        return
+    for rang, stats in enumerate(classement, 1):
+        alerte = "  [SCAN COMPLET]" if stats['scans_complets'] else ""
+        print(f"\n  {rang}. {stats['duree_totale_ms']:.1f} ms au total, {stats['nb_executions']} exécution(s), "
+              f"moyenne {stats['duree_moyenne_ms']:.1f} ms, max {stats['duree_max_ms']:.1f} ms, "
+              f"{stats['lignes']} ligne(s){alerte}")
+        print(f"     {stats['sql'][:150]}")
+        for appelant in stats['appelants']:
+            print(f"     appelée par {appelant}")
+        for ligne in stats['plan']:
+            marque = "!!" if est_scan_complet(ligne) else "  "
+            print(f"     {marque} {ligne}")
+
+
+# Activation par variable d'environnement (valeur = seuil des requêtes lentes en ms)
+if os.environ.get(VARIABLE_PROFILAGE):
+    activer_profilage(float(os.environ[VARIABLE_PROFILAGE]),
+                      os.environ.get(VARIABLE_JOURNAL) or JOURNAL_DEFAUT)
+
+
+if __name__ == "__main__":
+    # Résumé du journal des requêtes lentes: python profilage.py [journal] [--top N]
+    parser = argparse.ArgumentParser(description="Résumé du journal des requêtes lentes")
+    parser.add_argument("journal", nargs="?", default=JOURNAL_DEFAUT)
+    parser.add_argument("--top", type=int, default=10, help="nombre de requêtes affichées")
+    arguments = parser.parse_args()
+
+    if not Path(arguments.journal).exists():
+        print(f"  Journal introuvable: {arguments.journal}")
+        sys.exit(1)
+    afficher_resume(lire_journal(arguments.journal).classement(arguments.top))
@@ -0,0 +1,109 @@
+import csv
+import io
+import sys
+from itertools import chain, islice
+
+
+# Formats de sortie disponibles
+FORMATS = ('texte', 'csv', 'tsv')
+# Lignes écrites d'un coup (un appel à la sortie par paquet)
+TAILLE_PAQUET = 1000
+# Au-delà de ce nombre de lignes, les largeurs sont calculées sur un échantillon
+# (les lignes suivantes sont tronquées à ces largeurs)
+TAILLE_ECHANTILLON = 1000
+# Indentation des tableaux texte
+INDENTATION = "  "
+
+
+def calculer_largeurs(headers, rows):
+    """Largeur de chaque colonne (en-tête compris), en un seul parcours des lignes."""
+    largeurs = [len(str(h)) for h in headers]
+    nb_colonnes = len(largeurs)
+    for row in rows:
+        for i in range(nb_colonnes):
+            longueur = len(str(row[i]))
+            if longueur > largeurs[i]:
+                largeurs[i] = longueur
+    return largeurs
+
+
+def lignes_texte(headers, rows, col_widths=None, echantillon=TAILLE_ECHANTILLON,
+                 message_vide="Aucune donnée"):
+    """Génère les lignes d'un tableau texte aligné (sans retour à la ligne).
+
+    Sans col_widths, les largeurs viennent des echantillon premières lignes; si le
+    tableau en a davantage, les valeurs plus longues sont tronquées. Les valeurs sont
+    prises dans l'ordre des en-têtes (colonnes en trop ignorées).
+    """
+    rows = iter(rows)
+    tronquer = False
+    if col_widths is None:
+        debut = list(islice(rows, echantillon))
+        col_widths = calculer_largeurs(headers, debut)
+        suite = next(rows, None)
+        if suite is not None:
+            tronquer = True
+            rows = chain(debut, [suite], rows)
+        else:
+            rows = iter(debut)
+
+    premiere = next(rows, None)
+    if premiere is None:
+        yield f"{INDENTATION}{message_vide}"
+        return
+
+    largeurs = col_widths[:len(headers)]
+    modele = INDENTATION + " | ".join(f"{{:<{largeur}}}" for largeur in largeurs)
+    header_line = modele.format(*map(str, headers))
+    yield header_line
+    yield f"{INDENTATION}{'-' * (len(header_line) - len(INDENTATION))}"
+
+    # "{:<12.12}" complète et tronque à 12 caractères en une seule opération de formatage
+    if tronquer:
+        modele = INDENTATION + " | ".join(f"{{:<{largeur}.{largeur}}}" for largeur in largeurs)
+    for row in chain([premiere], rows):
+        yield modele.format(*map(str, row))
+
+
+def lignes_delimitees(headers, rows, separateur):
+    """Génère les lignes CSV / TSV (en-tête puis données, échappement du module csv)."""
+    tampon = io.StringIO()
+    writer = csv.writer(tampon, delimiter=separateur, lineterminator="\n")
+    for row in chain([headers], rows):
+        writer.writerow(row)
+        yield tampon.getvalue()[:-1]
+        tampon.seek(0)
+        tampon.truncate()
+
+
+def lignes_tableau(headers, rows, col_widths=None, format='texte', **options):
+    """Lignes d'un tableau dans le format demandé (voir FORMATS)."""
+    if format == 'texte':
+        return lignes_texte(headers, rows, col_widths, **options)
+    if format == 'csv':
+        return lignes_delimitees(headers, rows, ",")
+    if format == 'tsv':
+        return lignes_delimitees(headers, rows, "\t")
+    raise ValueError(f"Format inconnu: {format} (formats disponibles: {', '.join(FORMATS)})")
+
+
+def ecrire_tableau(headers, rows, col_widths=None, format='texte', ecrire=None,
+                   taille_paquet=TAILLE_PAQUET, **options):
+    """Écrit un tableau par paquets de lignes via ecrire(texte) (sys.stdout.write par défaut).
+
+    rows peut être un itérable quelconque (générateur iterer_*): il n'est parcouru qu'une fois.
+    """
+    ecrire = ecrire or sys.stdout.write
+    paquet = []
+    for ligne in lignes_tableau(headers, rows, col_widths, format, **options):
+        paquet.append(ligne)
+        if len(paquet) >= taille_paquet:
+            ecrire("\n".join(paquet) + "\n")
+            paquet = []
+    if paquet:
+        ecrire("\n".join(paquet) + "\n")
+
+
+def formater_tableau(headers, rows, col_widths=None, format='texte', **options):
+    """Retourne le tableau complet sous forme de texte."""
+    return "".join(ligne + "\n" for ligne in lignes_tableau(headers, rows, col_widths, format, **options))
@@ -0,0 +1,144 @@
+import tkinter as tk
+from tkinter import ttk
+
+from lectures_asynchrones import LecturesAsynchrones
+
+
+# Délai entre la dernière frappe et la requête (ms): une seule recherche par saisie
+DELAI_RECHERCHE_MS = 250
+# Nombre maximal de résultats affichés
+LIMITE_RESULTATS = 20
+
+
+class SelecteurRecherche(ttk.Frame):
+    """Champ de saisie et liste de résultats cherchés en base pendant la frappe.
+
+    rechercher(texte, limite) retourne des lignes (dicts), libelle(ligne) leur texte
+    dans la liste. La requête part DELAI_RECHERCHE_MS après la dernière frappe et ne
+    ramène que limite lignes: la table n'est jamais chargée en entier. Elle s'exécute dans
+    le pool executeur (LecturesAsynchrones), le résultat d'une saisie dépassée est ignoré.
+    selection contient la ligne choisie (None si aucun résultat); au_choix(ligne) est
+    appelé sur Entrée ou double-clic.
+    """
+
+    def __init__(self, parent, rechercher, libelle, limite=LIMITE_RESULTATS, hauteur=6,
+                 largeur=40, au_choix=None, executeur=None, **options):
+        super().__init__(parent, **options)
+        self.rechercher = rechercher
+        self.libelle = libelle
+        self.limite = limite
+        self.au_choix = au_choix
+        self.selection = None
+        self._resultats = []
+        self._attente = None
+        self._valider_apres = False
+        self._lectures = LecturesAsynchrones(self, executeur)
+
+        self.texte = tk.StringVar(self)
+        self.entree = ttk.Entry(self, textvariable=self.texte, width=largeur)
+        self.entree.pack(fill=tk.X)
+        self.liste = tk.Listbox(self, height=hauteur, width=largeur, exportselection=False,
+                                activestyle="none")
+        self.liste.pack(fill=tk.BOTH, expand=True, pady=(2, 0))
+        self.info = ttk.Label(self, text="", foreground="#7f8c8d")
+        self.info.pack(anchor="w")
+
+        self.texte.trace_add("write", self._programmer)
+        self.entree.bind("<Down>", lambda e: self._deplacer(1))
+        self.entree.bind("<Up>", lambda e: self._deplacer(-1))
+        self.entree.bind("<Return>", self._valider)
+        self.liste.bind("<<ListboxSelect>>", self._choisir)
+        self.liste.bind("<Double-Button-1>", self._valider)
+        self.liste.bind("<Return>", self._valider)
+        self.bind("<Destroy>", self._detruire)
+
+        self._chercher()
+
+    def focus_set(self):
+        self.entree.focus_set()
+
+    def _programmer(self, *args):
+        # Chaque frappe repousse la recherche: seule la dernière saisie est envoyée
+        if self._attente is not None:
+            self.after_cancel(self._attente)
+        self._attente = self.after(DELAI_RECHERCHE_MS, self._chercher)
+
+    def _chercher(self):
+        self._attente = None
+        # Une nouvelle saisie rend périmée la recherche précédente
+        self._lectures.invalider()
+        self.info.configure(text="Recherche...")
+        self._lectures.lancer('recherche', self.rechercher, (self.texte.get(), self.limite),
+                              self._afficher_resultats, self._afficher_erreur)
+
+    def _afficher_erreur(self, erreur):
+        self._valider_apres = False
+        self.info.configure(text=f"Erreur: {erreur}")
+
+    def _afficher_resultats(self, resultats):
+        precedente = self.selection
+        self._resultats = resultats
+
+        self.liste.delete(0, tk.END)
+        for ligne in self._resultats:
+            self.liste.insert(tk.END, self.libelle(ligne))
+
+        if not self._resultats:
+            self.info.configure(text="Aucun resultat")
+        elif len(self._resultats) >= self.limite:
+            self.info.configure(text=f"{self.limite} premiers resultats, precisez la recherche")
+        else:
+            self.info.configure(text=f"{len(self._resultats)} resultat(s)")
+
+        # Garde la ligne choisie si elle est toujours dans les résultats, sinon la première
+        ids = [ligne['id'] for ligne in self._resultats]
+        index = ids.index(precedente['id']) if precedente and precedente['id'] in ids else 0
+        self._selectionner(index)
+
+        if self._valider_apres:
+            # Entrée pressée pendant la recherche: la validation attendait ce résultat
+            self._valider_apres = False
+            self._valider()
+
+    def _selectionner(self, index):
+        self.liste.selection_clear(0, tk.END)
+        if not self._resultats:
+            self.selection = None
+            return
+        index = max(0, min(index, len(self._resultats) - 1))
+        self.liste.selection_set(index)
+        self.liste.activate(index)
+        self.liste.see(index)
+        self.selection = self._resultats[index]
+
+    def _deplacer(self, pas):
+        indices = self.liste.curselection()
+        self._selectionner((indices[0] if indices else -1) + pas)
+        return "break"
+
+    def _choisir(self, event=None):
+        indices = self.liste.curselection()
+        if indices:
+            self.selection = self._resultats[indices[0]]
+
+    def _valider(self, event=None):
+        if self._attente is not None:
+            # Entrée avant la fin du délai: la recherche en attente part tout de suite,
+            # la validation se fait à son résultat
+            self.after_cancel(self._attente)
+            self._chercher()
+        if self._lectures.en_cours('recherche'):
+            self._valider_apres = True
+            return "break"
+        self._choisir()
+        if self.selection is not None and self.au_choix:
+            self.au_choix(self.selection)
+        return "break"
+
+    def _detruire(self, event):
+        if event.widget is not self:
+            return
+        self._lectures.arreter()
+        if self._attente is not None:
+            self.after_cancel(self._attente)
+            self._attente = None
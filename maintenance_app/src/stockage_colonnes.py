@@ -0,0 +1,251 @@
+import operator
+import threading
+from array import array
+from datetime import date
+
+import cache_resultats
+import data_access
+from db_connection import connexion_lecture
+
+try:
+    import numpy as np
+except ImportError:
+    # Repli sans NumPy: mêmes colonnes (module array), regroupements par boucles Python
+    np = None
+
+
+# Lignes lues par fetchmany pendant le chargement
+TAILLE_CHUNK_CHARGEMENT = 5000
+
+# Jour julien (entier) = date.toordinal() + DECALAGE_JULIEN
+# (CAST(julianday('AAAA-MM-JJ') AS INTEGER) côté SQLite)
+DECALAGE_JULIEN = 1721424
+
+# Codes des colonnes catégorielles: indice de la valeur dans les tuples de data_access
+CODE_CORRECTIVE = data_access.TYPES_INTERVENTION.index('corrective')
+CODE_TERMINEE = data_access.STATUTS_INTERVENTION.index('terminee')
+CODE_ACTIF = data_access.STATUTS_EQUIPEMENT.index('actif')
+
+# Opérateurs des règles d'alerte (acceptent des scalaires ou des tableaux NumPy)
+OPERATEURS = {'<': operator.lt, '<=': operator.le, '=': operator.eq, '>=': operator.ge, '>': operator.gt}
+
+
+def _code_sql(colonne, valeurs):
+    """CASE SQL remplaçant une valeur catégorielle par son indice dans valeurs (-1 si inconnue)."""
+    cas = " ".join(f"WHEN '{valeur}' THEN {code}" for code, valeur in enumerate(valeurs))
+    return f"CASE {colonne} {cas} ELSE -1 END"
+
+
+# Colonnes chargées: (nom, code de type array, expression SQL). Les dates deviennent des
+# jours juliens et les textes catégoriels des codes, calculés par SQLite pendant la lecture.
+# Les interventions sont lues dans interventions_historique (archives comprises), qui n'a pas
+# les colonnes calculées annee et mois de interventions.
+COLONNES_INTERVENTIONS = (
+    ('equipement_id', 'i', "equipement_id"),
+    ('jour', 'i', "CAST(julianday(date_intervention) AS INTEGER)"),
+    ('annee', 'h', "CAST(substr(date_intervention, 1, 4) AS INTEGER)"),
+    ('mois', 'b', "CAST(substr(date_intervention, 6, 2) AS INTEGER)"),
+    ('type', 'b', _code_sql('type_intervention', data_access.TYPES_INTERVENTION)),
+    ('statut', 'b', _code_sql('statut', data_access.STATUTS_INTERVENTION)),
+    ('duree', 'i', "duree_minutes"),
+    ('cout', 'd', "cout"),
+)
+# Le nom (texte libre) reste une liste Python; type None = pas de tableau typé
+COLONNES_EQUIPEMENTS = (
+    ('id', 'i', "id"),
+    ('nom', None, "nom"),
+    ('type', 'b', _code_sql('type', data_access.TYPES_EQUIPEMENT)),
+    ('statut', 'b', _code_sql('statut', data_access.STATUTS_EQUIPEMENT)),
+    ('jour_acquisition', 'i', "CAST(julianday(date_acquisition) AS INTEGER)"),
+)
+
+
+def jour_julien(jour):
+    """Jour julien entier d'une date (date ou texte AAAA-MM-JJ)."""
+    if isinstance(jour, str):
+        jour = date.fromisoformat(jour)
+    return jour.toordinal() + DECALAGE_JULIEN
+
+
+def _lire_colonnes(conn, table, colonnes, ordre=""):
+    """Lit une table en une passe et retourne {nom: colonne}."""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(expression for _, _, expression in colonnes)} FROM {table} {ordre}")
+    tableaux = [array(code) if code else [] for _, code, _ in colonnes]
+    while True:
+        rows = cursor.fetchmany(TAILLE_CHUNK_CHARGEMENT)
+        if not rows:
+            break
+        for tableau, valeurs in zip(tableaux, zip(*rows)):
+            tableau.extend(valeurs)
+
+    resultat = {}
+    for (nom, code, _), tableau in zip(colonnes, tableaux):
+        if np is not None and code:
+            # Vue NumPy sur le tampon de l'array (pas de copie)
+            tableau = np.frombuffer(tableau, dtype=np.dtype(code)) if len(tableau) else np.zeros(0, np.dtype(code))
+        resultat[nom] = tableau
+    return resultat
+
+
+class InstantaneColonnes:
+    """Interventions et équipements en colonnes typées, pour les regroupements en mémoire.
+
+    interventions: equipement_id, jour (julien), annee, mois, type et statut (codes),
+    duree, cout. equipements (ordre nom, id): id, nom, type et statut (codes),
+    jour_acquisition. Avec NumPy les colonnes sont des ndarray, sinon des array.array.
+    """
+
+    def __init__(self, interventions, equipements, version=None):
+        self.interventions = interventions
+        self.equipements = equipements
+        self.version = version
+        # Position de l'équipement de chaque intervention dans les colonnes d'équipements
+        self._positions = self._calculer_positions()
+
+    @property
+    def nb_interventions(self):
+        return len(self.interventions['cout'])
+
+    @property
+    def nb_equipements(self):
+        return len(self.equipements['id'])
+
+    def _calculer_positions(self):
+        ids = self.equipements['id']
+        equipement_ids = self.interventions['equipement_id']
+        if np is not None:
+            if not len(equipement_ids):
+                return np.zeros(0, dtype=np.intp)
+            taille = int(max(ids.max(initial=0), equipement_ids.max())) + 1
+            position_par_id = np.full(taille, -1, dtype=np.intp)
+            position_par_id[ids] = np.arange(len(ids))
+            return position_par_id[equipement_ids]
+        position_par_id = {eq_id: position for position, eq_id in enumerate(ids)}
+        return array('i', (position_par_id.get(eq_id, -1) for eq_id in equipement_ids))
+
+    def agregats_equipements(self):
+        """Par équipement (ordre des colonnes d'équipements), sur les interventions terminées.
+
+        Retourne nb_interventions, nb_pannes, cout_total et dernier_jour (-1 sans intervention).
+        """
+        n = self.nb_equipements
+        inter = self.interventions
+        if np is not None:
+            terminees = (inter['statut'] == CODE_TERMINEE) & (self._positions >= 0)
+            groupes = self._positions[terminees]
+            pannes = groupes[inter['type'][terminees] == CODE_CORRECTIVE]
+            dernier_jour = np.full(n, -1, dtype=np.int64)
+            np.maximum.at(dernier_jour, groupes, inter['jour'][terminees])
+            return {
+                'nb_interventions': np.bincount(groupes, minlength=n),
+                'nb_pannes': np.bincount(pannes, minlength=n),
+                'cout_total': np.bincount(groupes, weights=inter['cout'][terminees], minlength=n),
+                'dernier_jour': dernier_jour,
+            }
+
+        nb_interventions = [0] * n
+        nb_pannes = [0] * n
+        cout_total = [0.0] * n
+        dernier_jour = [-1] * n
+        for position, statut, type_code, jour, cout in zip(self._positions, inter['statut'], inter['type'],
+                                                           inter['jour'], inter['cout']):
+            if statut != CODE_TERMINEE or position < 0:
+                continue
+            nb_interventions[position] += 1
+            if type_code == CODE_CORRECTIVE:
+                nb_pannes[position] += 1
+            cout_total[position] += cout
+            if jour > dernier_jour[position]:
+                dernier_jour[position] = jour
+        return {'nb_interventions': nb_interventions, 'nb_pannes': nb_pannes,
+                'cout_total': cout_total, 'dernier_jour': dernier_jour}
+
+    def couts_par_mois(self, annee):
+        """{mois: coût total} des interventions terminées de l'année (mois sans intervention absents)."""
+        annee = int(annee)
+        inter = self.interventions
+        if np is not None:
+            selection = (inter['statut'] == CODE_TERMINEE) & (inter['annee'] == annee)
+            mois = inter['mois'][selection]
+            nombres = np.bincount(mois, minlength=13)
+            couts = np.bincount(mois, weights=inter['cout'][selection], minlength=13)
+            return {m: float(couts[m]) for m in range(1, 13) if nombres[m]}
+
+        couts = {}
+        for statut, annee_inter, mois, cout in zip(inter['statut'], inter['annee'], inter['mois'], inter['cout']):
+            if statut == CODE_TERMINEE and annee_inter == annee:
+                couts[mois] = couts.get(mois, 0.0) + cout
+        return dict(sorted(couts.items()))
+
+    def disponibilite_par_type(self):
+        """[(type, total, actifs)] par type d'équipement, dans l'ordre de première apparition."""
+        types = self.equipements['type']
+        statuts = self.equipements['statut']
+        if np is not None:
+            codes, premieres = np.unique(types, return_index=True)
+            totaux = np.bincount(types, minlength=len(data_access.TYPES_EQUIPEMENT))
+            actifs = np.bincount(types[statuts == CODE_ACTIF], minlength=len(data_access.TYPES_EQUIPEMENT))
+            ordre = [int(code) for _, code in sorted(zip(premieres, codes))]
+        else:
+            totaux = [0] * len(data_access.TYPES_EQUIPEMENT)
+            actifs = [0] * len(data_access.TYPES_EQUIPEMENT)
+            ordre = []
+            for code, statut in zip(types, statuts):
+                if not totaux[code]:
+                    ordre.append(code)
+                totaux[code] += 1
+                if statut == CODE_ACTIF:
+                    actifs[code] += 1
+        return [(data_access.TYPES_EQUIPEMENT[code], int(totaux[code]), int(actifs[code])) for code in ordre]
+
+    def ages_equipements(self, aujourd_hui):
+        """Âge en jours de chaque équipement à la date aujourd_hui."""
+        reference = jour_julien(aujourd_hui)
+        if np is not None:
+            return reference - self.equipements['jour_acquisition'].astype(np.int64)
+        return [reference - jour for jour in self.equipements['jour_acquisition']]
+
+    def selection_regle(self, valeurs, operateur, seuil, presentes=None):
+        """Positions dont la valeur vérifie "valeur operateur seuil" (presentes: masque des valeurs définies)."""
+        comparer = OPERATEURS[operateur]
+        if np is not None:
+            masque = comparer(np.asarray(valeurs), seuil)
+            if presentes is not None:
+                masque &= presentes
+            return np.flatnonzero(masque).tolist()
+        return [position for position, valeur in enumerate(valeurs)
+                if (presentes is None or presentes[position]) and comparer(valeur, seuil)]
+
+
+def charger_colonnes(version=None):
+    """Charge les colonnes d'interventions (archives comprises) et d'équipements (une lecture par table)."""
+    with connexion_lecture() as conn:
+        interventions = _lire_colonnes(conn, "interventions_historique", COLONNES_INTERVENTIONS)
+        equipements = _lire_colonnes(conn, "equipements", COLONNES_EQUIPEMENTS, "ORDER BY nom, id")
+    return InstantaneColonnes(interventions, equipements, version)
+
+
+# Dernier instantané chargé, réutilisé tant que les données n'ont pas changé
+_instantane = None
+_verrou = threading.Lock()
+
+
+def obtenir_colonnes():
+    """Instantané en colonnes des données courantes (rechargé après une écriture)."""
+    global _instantane
+    version = cache_resultats.cache.version()
+    with _verrou:
+        if _instantane is not None and _instantane.version == version:
+            return _instantane
+    instantane = charger_colonnes(version)
+    with _verrou:
+        _instantane = instantane
+    return instantane
+
+
+def oublier_colonnes():
+    """Libère l'instantané en mémoire."""
+    global _instantane
+    with _verrou:
+        _instantane = None